@@ -0,0 +1,58 @@
+"""project leaderboard daily rollup
+
+Revision ID: 0db062e3faca
+Revises: b1fefffad88d
+Create Date: 2026-10-17 12:48:51.117602
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0db062e3faca'
+down_revision: Union[str, None] = 'b1fefffad88d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('project_leaderboard_daily',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('completed', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id', 'day', 'user_id')
+    )
+
+    # done tasks closed before completions were recorded get one now, crediting the assignee
+    # at updated_at, so the backfill below and later reopens (which revoke the latest
+    # `completed` event's point) both see it; downgrade keeps these events
+    op.execute("""
+        INSERT INTO task_events (task_id, project_id, actor_id, type, created_at)
+        SELECT t.id, t.project_id, t.assignee_id, 'completed', t.updated_at
+        FROM tasks t
+        WHERE t.status = 'done' AND t.assignee_id IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM task_events e
+                          WHERE e.task_id = t.id AND e.type = 'completed')
+    """)
+
+    # backfill; same shape as app.services.leaderboard.rebuild_stmts
+    op.execute("""
+        INSERT INTO project_leaderboard_daily (project_id, day, user_id, completed)
+        SELECT e.project_id, CAST(timezone('UTC', e.created_at) AS DATE), e.actor_id, count(*)
+        FROM task_events e
+        JOIN tasks t ON t.id = e.task_id AND t.status = 'done'
+        WHERE e.actor_id IS NOT NULL
+          AND e.id = (SELECT max(e2.id) FROM task_events e2
+                      WHERE e2.task_id = t.id AND e2.type = 'completed')
+        GROUP BY e.project_id, CAST(timezone('UTC', e.created_at) AS DATE), e.actor_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('project_leaderboard_daily')
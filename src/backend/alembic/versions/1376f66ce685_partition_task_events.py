@@ -0,0 +1,116 @@
+"""partition task_events by month; archive manifest
+
+Revision ID: 1376f66ce685
+Revises: 86804f6147c6
+Create Date: 2026-10-17 17:02:44.671052
+
+Postgres: task_events becomes a table partitioned by RANGE (created_at),
+one partition per UTC month from the oldest event to three months ahead,
+plus a default partition. The primary key becomes (id, created_at), since a
+partitioned table's unique constraints must include the partition key; ids
+still come from the same sequence. Existing rows are copied across, so run
+this in a maintenance window on large databases.
+app/scripts/archive_events.py keeps partitions ahead of time and archives
+old ones.
+
+Both dialects: task_event_archives records which months live in archive
+files.
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1376f66ce685'
+down_revision: Union[str, None] = '86804f6147c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, task_id, project_id, actor_id, type, from_status, to_status, data, created_at"
+INDEXES = {
+    'ix_task_events_project_id_id': 'project_id, id',
+    'ix_task_events_task_id_id': 'task_id, id',
+    'ix_task_events_type': 'type',
+}
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def _columns_sql(pk: str) -> str:
+    return f"""(
+        id integer NOT NULL DEFAULT nextval('task_events_id_seq'),
+        task_id integer NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+        project_id integer NOT NULL REFERENCES projects (id) ON DELETE CASCADE,
+        actor_id integer REFERENCES users (id) ON DELETE SET NULL,
+        type taskeventtype NOT NULL,
+        from_status varchar(32),
+        to_status varchar(32),
+        data json,
+        created_at timestamp with time zone NOT NULL DEFAULT now(),
+        PRIMARY KEY ({pk})
+    )"""
+
+
+def _swap_in(new_table: str) -> None:
+    """Copy task_events into `new_table` (already created), then put it in its place."""
+    op.execute("ALTER SEQUENCE task_events_id_seq OWNED BY NONE")
+    op.execute(f"INSERT INTO {new_table} ({COLUMNS}) SELECT {COLUMNS} FROM task_events")
+    op.execute("DROP TABLE task_events")
+    op.execute(f"ALTER TABLE {new_table} RENAME TO task_events")
+    op.execute("ALTER SEQUENCE task_events_id_seq OWNED BY task_events.id")
+    for name, cols in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON task_events ({cols})")
+
+
+def upgrade() -> None:
+    op.create_table('task_event_archives',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('file_name', sa.String(length=255), nullable=False),
+    sa.Column('rows', sa.Integer(), nullable=False),
+    sa.Column('min_event_id', sa.Integer(), nullable=False),
+    sa.Column('max_event_id', sa.Integer(), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('month')
+    )
+
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute(f"CREATE TABLE task_events_partitioned {_columns_sql('id, created_at')} PARTITION BY RANGE (created_at)")
+    oldest = bind.scalar(sa.text("SELECT min(created_at) FROM task_events"))
+    today = datetime.now(timezone.utc).date()
+    month = (oldest.astimezone(timezone.utc).date() if oldest else today).replace(day=1)
+    last = today.replace(day=1)
+    for _ in range(3):
+        last = _next_month(last)
+    while month <= last:
+        nxt = _next_month(month)
+        op.execute(
+            f"CREATE TABLE task_events_p{month:%Y_%m} PARTITION OF task_events_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()} 00:00:00+00') TO ('{nxt.isoformat()} 00:00:00+00')"
+        )
+        month = nxt
+    op.execute("CREATE TABLE task_events_default PARTITION OF task_events_partitioned DEFAULT")
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+    _swap_in("task_events_partitioned")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # archived months are not brought back; their files stay where they are
+        op.execute(f"CREATE TABLE task_events_plain {_columns_sql('id')}")
+        for name in INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {name}")
+        _swap_in("task_events_plain")
+        op.execute("ALTER TABLE task_events RENAME CONSTRAINT task_events_plain_pkey TO task_events_pkey")
+    op.drop_table('task_event_archives')
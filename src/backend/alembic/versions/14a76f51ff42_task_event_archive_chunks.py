@@ -0,0 +1,41 @@
+"""task_event_archive_chunks: per-project offsets into archive files
+
+Revision ID: 14a76f51ff42
+Revises: a554ff9ccf3e
+Create Date: 2026-10-17 18:47:21.508136
+
+Archives keep each project's events in a gzip member of its own; this table
+says where (app/services/event_archive.py). It ships in the same release as
+task_event_archives (1376f66ce685), so every archive has its chunk rows.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '14a76f51ff42'
+down_revision: Union[str, None] = 'a554ff9ccf3e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('task_event_archive_chunks',
+    sa.Column('archive_id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('offset', sa.BigInteger(), nullable=False),
+    sa.Column('length', sa.BigInteger(), nullable=False),
+    sa.Column('rows', sa.Integer(), nullable=False),
+    sa.Column('min_event_id', sa.Integer(), nullable=False),
+    sa.Column('max_event_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['archive_id'], ['task_event_archives.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('archive_id', 'project_id')
+    )
+    op.create_index(op.f('ix_task_event_archive_chunks_project_id'), 'task_event_archive_chunks', ['project_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_task_event_archive_chunks_project_id'), table_name='task_event_archive_chunks')
+    op.drop_table('task_event_archive_chunks')
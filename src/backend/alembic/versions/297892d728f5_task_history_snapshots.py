@@ -0,0 +1,88 @@
+"""task history: event data and project snapshots
+
+Revision ID: 297892d728f5
+Revises: 0db062e3faca
+Create Date: 2026-10-17 14:05:32.904417
+
+Events recorded before this revision carry no field values, so replaying
+them rebuilds empty tasks. Each project gets a baseline snapshot of its
+current board instead; reads from now on start from it, and earlier times
+only show what the old events can.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '297892d728f5'
+down_revision: Union[str, None] = '0db062e3faca'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ADD VALUE cannot run inside a transaction block on older Postgres
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE taskeventtype ADD VALUE IF NOT EXISTS 'updated'")
+
+    op.add_column('task_events', sa.Column('data', sa.JSON(), nullable=True))
+    op.drop_index('ix_task_events_project_id', table_name='task_events')
+    op.drop_index('ix_task_events_task_id', table_name='task_events')
+    op.create_index('ix_task_events_project_id_id', 'task_events', ['project_id', 'id'], unique=False)
+    op.create_index('ix_task_events_task_id_id', 'task_events', ['task_id', 'id'], unique=False)
+
+    op.create_table('project_snapshots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('last_event_id', sa.Integer(), nullable=False),
+    sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('state', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_project_snapshots_project_taken', 'project_snapshots', ['project_id', 'taken_at'], unique=False)
+    _baseline_snapshots()
+
+
+def _baseline_snapshots() -> None:
+    bind = op.get_bind()
+    taken_at = datetime.now(timezone.utc)
+    last = dict(bind.execute(sa.text("SELECT project_id, max(id) FROM task_events GROUP BY project_id")).all())
+    boards: dict[int, dict] = {}
+    for r in bind.execute(sa.text(
+        "SELECT id, project_id, title, description, status, priority, due_date, assignee_id FROM tasks"
+    )):
+        boards.setdefault(r.project_id, {})[str(r.id)] = {
+            "title": r.title,
+            "description": r.description,
+            "status": r.status,
+            "priority": r.priority,
+            "due_date": str(r.due_date) if r.due_date else None,
+            "assignee_id": r.assignee_id,
+        }
+    snapshots = sa.table('project_snapshots',
+        sa.column('project_id', sa.Integer()),
+        sa.column('last_event_id', sa.Integer()),
+        sa.column('taken_at', sa.DateTime(timezone=True)),
+        sa.column('state', sa.JSON()),
+    )
+    rows = [
+        {"project_id": pid, "last_event_id": last.get(pid) or 0, "taken_at": taken_at, "state": board}
+        for pid, board in boards.items()
+    ]
+    if rows:
+        op.bulk_insert(snapshots, rows)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_project_snapshots_project_taken', table_name='project_snapshots')
+    op.drop_table('project_snapshots')
+    op.drop_index('ix_task_events_task_id_id', table_name='task_events')
+    op.drop_index('ix_task_events_project_id_id', table_name='task_events')
+    op.create_index(op.f('ix_task_events_task_id'), 'task_events', ['task_id'], unique=False)
+    op.create_index(op.f('ix_task_events_project_id'), 'task_events', ['project_id'], unique=False)
+    op.drop_column('task_events', 'data')
+    # Postgres cannot drop an enum value; 'updated' stays on taskeventtype
@@ -0,0 +1,37 @@
+"""count overdue tasks at read time
+
+Revision ID: 4f6a8667ca3a
+Revises: 14a76f51ff42
+Create Date: 2026-10-17 19:20:37.914265
+
+project_stats.tasks_overdue was shifted on writes using the date of each
+write, so it drifted as days passed (and could go negative). It is dropped;
+overdue counts come from ix_tasks_project_status_due when read.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4f6a8667ca3a'
+down_revision: Union[str, None] = '14a76f51ff42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_tasks_project_status_due', 'tasks', ['project_id', 'status', 'due_date'], unique=False)
+    op.drop_column('project_stats', 'tasks_overdue')
+
+
+def downgrade() -> None:
+    op.add_column('project_stats', sa.Column('tasks_overdue', sa.Integer(), server_default='0', nullable=False))
+    op.execute("""
+        UPDATE project_stats s SET tasks_overdue = (
+            SELECT count(*) FROM tasks t
+            WHERE t.project_id = s.project_id AND t.status <> 'done' AND t.due_date < CURRENT_DATE
+        )
+    """)
+    op.drop_index('ix_tasks_project_status_due', table_name='tasks')
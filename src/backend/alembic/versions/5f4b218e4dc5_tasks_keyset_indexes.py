@@ -0,0 +1,33 @@
+"""tasks keyset indexes
+
+Revision ID: 5f4b218e4dc5
+Revises: 515bf93f8218
+Create Date: 2026-10-17 09:12:41.402113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f4b218e4dc5'
+down_revision: Union[str, None] = '515bf93f8218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # (project_id) -> (project_id, id): keyset pages read in index order
+    op.drop_index('ix_tasks_project_id', table_name='tasks')
+    op.create_index('ix_tasks_project_id_id', 'tasks', ['project_id', 'id'], unique=False)
+    op.drop_index('ix_tasks_project_status', table_name='tasks')
+    op.create_index('ix_tasks_project_status', 'tasks', ['project_id', 'status', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_tasks_project_status', table_name='tasks')
+    op.create_index('ix_tasks_project_status', 'tasks', ['project_id', 'status'], unique=False)
+    op.drop_index('ix_tasks_project_id_id', table_name='tasks')
+    op.create_index(op.f('ix_tasks_project_id'), 'tasks', ['project_id'], unique=False)
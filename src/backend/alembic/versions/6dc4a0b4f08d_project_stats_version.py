@@ -0,0 +1,26 @@
+"""project stats version
+
+Revision ID: 6dc4a0b4f08d
+Revises: 297892d728f5
+Create Date: 2026-10-17 15:12:48.318905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6dc4a0b4f08d'
+down_revision: Union[str, None] = '297892d728f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('project_stats', sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('project_stats', 'version')
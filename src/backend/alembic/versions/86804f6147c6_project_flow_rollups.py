@@ -0,0 +1,44 @@
+"""project flow and cycle-time daily rollups
+
+Revision ID: 86804f6147c6
+Revises: 8da84c16489f
+Create Date: 2026-10-17 16:31:09.884213
+
+Empty on creation; fill with `python -m app.scripts.repair analytics`.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '86804f6147c6'
+down_revision: Union[str, None] = '8da84c16489f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('project_flow_daily',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('created', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('completed', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('reopened', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id', 'day')
+    )
+    op.create_table('project_cycle_time_daily',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('bucket', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id', 'day', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('project_cycle_time_daily')
+    op.drop_table('project_flow_daily')
@@ -0,0 +1,26 @@
+"""project templates
+
+Revision ID: 8da84c16489f
+Revises: 9b4317b4a42a
+Create Date: 2026-10-17 16:05:37.214480
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8da84c16489f'
+down_revision: Union[str, None] = '9b4317b4a42a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('is_template', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'is_template')
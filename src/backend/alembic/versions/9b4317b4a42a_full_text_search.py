@@ -0,0 +1,81 @@
+"""full-text search over tasks, comments and messages
+
+Revision ID: 9b4317b4a42a
+Revises: 6dc4a0b4f08d
+Create Date: 2026-10-17 15:48:21.506113
+
+Postgres: stored generated tsvector columns (kept current by the database on
+every INSERT/UPDATE) with GIN indexes. Adding a stored generated column
+rewrites the table, so run this in a maintenance window on large databases.
+
+SQLite (local runs): external-content FTS5 tables kept in step by triggers.
+
+These objects are not mapped on the models; alembic/env.py keeps
+autogenerate from trying to drop them.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4317b4a42a'
+down_revision: Union[str, None] = '6dc4a0b4f08d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (tsvector expression / FTS5 columns)
+PG_VECTORS = {
+    'tasks': "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+             "setweight(to_tsvector('english', coalesce(description, '')), 'B')",
+    'task_comments': "to_tsvector('english', coalesce(body, ''))",
+    'thread_messages': "to_tsvector('english', coalesce(body, ''))",
+}
+FTS_COLUMNS = {
+    'tasks': ['title', 'description'],
+    'task_comments': ['body'],
+    'thread_messages': ['body'],
+}
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table, expr in PG_VECTORS.items():
+            op.execute(f"ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({expr}) STORED")
+            op.create_index(f'ix_{table}_search_vector', table, ['search_vector'], postgresql_using='gin')
+        return
+
+    for table, cols in FTS_COLUMNS.items():
+        fts = f'{table}_fts'
+        col_list = ', '.join(cols)
+        new = ', '.join(f'new.{c}' for c in cols)
+        old = ', '.join(f'old.{c}' for c in cols)
+        op.execute(f"CREATE VIRTUAL TABLE {fts} USING fts5({col_list}, content='{table}', content_rowid='id')")
+        op.execute(f"""
+            CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new});
+            END""")
+        op.execute(f"""
+            CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old});
+            END""")
+        op.execute(f"""
+            CREATE TRIGGER {fts}_au AFTER UPDATE OF {col_list} ON {table} BEGIN
+                INSERT INTO {fts}({fts}, rowid, {col_list}) VALUES ('delete', old.id, {old});
+                INSERT INTO {fts}(rowid, {col_list}) VALUES (new.id, {new});
+            END""")
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        for table in PG_VECTORS:
+            op.drop_index(f'ix_{table}_search_vector', table_name=table)
+            op.drop_column(table, 'search_vector')
+        return
+
+    for table in FTS_COLUMNS:
+        fts = f'{table}_fts'
+        for suffix in ('ai', 'ad', 'au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {fts}")
@@ -0,0 +1,31 @@
+"""template visibility
+
+Revision ID: a554ff9ccf3e
+Revises: 1376f66ce685
+Create Date: 2026-10-17 18:11:05.392817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a554ff9ccf3e'
+down_revision: Union[str, None] = '1376f66ce685'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('projects', sa.Column('template_public', sa.Boolean(), server_default=sa.false(), nullable=False))
+    # only the server-created demo template stays visible to everyone; user templates become private
+    op.execute(
+        "UPDATE projects SET template_public = true "
+        "WHERE is_template AND name = 'SynergySphere Demo' AND description = 'Pre-populated demo project'"
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('projects', 'template_public')
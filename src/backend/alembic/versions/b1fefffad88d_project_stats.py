@@ -0,0 +1,49 @@
+"""project stats
+
+Revision ID: b1fefffad88d
+Revises: cc7bf5ae70a4
+Create Date: 2026-10-17 11:26:05.730184
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1fefffad88d'
+down_revision: Union[str, None] = 'cc7bf5ae70a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('project_stats',
+    sa.Column('project_id', sa.Integer(), nullable=False),
+    sa.Column('members_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('tasks_total', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('tasks_done', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('tasks_overdue', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('project_id')
+    )
+    op.create_index('ix_project_members_user_project', 'project_members', ['user_id', 'project_id'], unique=False)
+
+    # backfill; same shape as app.services.stats.recompute_stmts
+    op.execute("""
+        INSERT INTO project_stats (project_id, members_count, tasks_total, tasks_done, tasks_overdue)
+        SELECT p.id,
+               (SELECT count(*) FROM project_members m WHERE m.project_id = p.id),
+               (SELECT count(*) FROM tasks t WHERE t.project_id = p.id),
+               (SELECT count(*) FROM tasks t WHERE t.project_id = p.id AND t.status = 'done'),
+               (SELECT count(*) FROM tasks t WHERE t.project_id = p.id AND t.status <> 'done'
+                                              AND t.due_date < CURRENT_DATE)
+        FROM projects p
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_project_members_user_project', table_name='project_members')
+    op.drop_table('project_stats')
@@ -0,0 +1,26 @@
+"""thread messages keyset index
+
+Revision ID: cc7bf5ae70a4
+Revises: 5f4b218e4dc5
+Create Date: 2026-10-17 10:03:17.558920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'cc7bf5ae70a4'
+down_revision: Union[str, None] = '5f4b218e4dc5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_thread_messages_thread_created_id', 'thread_messages', ['thread_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_thread_messages_thread_created_id', table_name='thread_messages')
@@ -0,0 +1,40 @@
+# app/api/etag.py
+"""
+Conditional GETs for the list endpoints.
+
+A list's ETag covers the kind, the project's version (project_stats,
+advanced by every write through bump_stats) and the request's query string,
+so a cursor page or a filter has its own validator. Anything else a body
+shows (member names and avatars, comment counts) is only written by paths
+that also call bump_stats; a new write path for them must do the same.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+# always revalidate, but let the browser keep the body for a 304
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts) -> str:
+    """Weak validator over whatever determines the response body."""
+    raw = "|".join(map(str, parts)).encode()
+    return 'W/"%s"' % hashlib.blake2b(raw, digest_size=12).hexdigest()
+
+def query_key(request: Request) -> str:
+    """Canonical query string: parameter order and repeats never change the key."""
+    return "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def not_modified(request: Request, response: Response, etag: str) -> Response | None:
+    """Put the validators on `response`; a ready 304 when If-None-Match already names `etag`."""
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    response.headers.update(headers)
+    inm = request.headers.get("if-none-match")
+    if not inm:
+        return None
+    if inm.strip() == "*" or _opaque(etag) in {_opaque(t) for t in inm.split(",")}:
+        return Response(status_code=304, headers=headers)
+    return None
@@ -0,0 +1,136 @@
+# app/api/export.py
+"""
+Streaming project export (GET /projects/{id}/export).
+
+`export_chunks` is an async generator of bytes for a StreamingResponse. It
+opens its own session, since the request's session is closed once the
+handler returns. On Postgres that session reads in one REPEATABLE READ
+transaction, so every section comes from the same snapshot. Each section
+is a server-side cursor read yield_per rows at a time, and each batch is
+encoded and sent before the next one is fetched. Memory therefore stays at
+one batch whatever the project's size, and the first line goes out before
+any big query runs. Task events include archived months
+(app/services/event_archive.py).
+
+Formats:
+- ndjson: one object per line, {"record": "<kind>", ...columns}. The
+  first line is the project itself.
+- csv: one section per kind. Each section starts with a header row whose
+  first cell is "record", and sections are separated by an empty line.
+"""
+import csv
+import io
+from datetime import date, datetime
+from enum import Enum
+from typing import AsyncIterator
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.api.fastjson import dumps
+from app.db.pool import long_running
+from app.models.comment import TaskComment
+from app.models.membership import ProjectMember
+from app.models.project import Project
+from app.models.task import Task
+from app.models.thread import ProjectThread, ThreadMessage
+from app.models.user import User
+from app.services.event_archive import COLUMNS as EVENT_COLUMNS, stream_events
+
+BATCH = 1000
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _sections(project_id: int) -> list[tuple[str, object]]:
+    """(record kind, statement) in export order; events are added separately."""
+    return [
+        ("project", select(Project.id, Project.name, Project.description, Project.due_date,
+                           Project.is_template, Project.created_at).where(Project.id == project_id)),
+        ("member", select(ProjectMember.user_id, User.name, User.email, ProjectMember.role)
+            .join(User, User.id == ProjectMember.user_id)
+            .where(ProjectMember.project_id == project_id)
+            .order_by(ProjectMember.user_id)),
+        ("task", select(Task.id, Task.title, Task.description, Task.status, Task.priority, Task.due_date,
+                        Task.assignee_id, Task.created_by_id, Task.created_at, Task.updated_at)
+            .where(Task.project_id == project_id)
+            .order_by(Task.id)),
+        ("comment", select(TaskComment.id, TaskComment.task_id, TaskComment.author_id,
+                           TaskComment.body, TaskComment.created_at)
+            .join(Task, Task.id == TaskComment.task_id)
+            .where(Task.project_id == project_id)
+            .order_by(TaskComment.id)),
+        ("thread", select(ProjectThread.id, ProjectThread.title, ProjectThread.created_by_id,
+                          ProjectThread.created_at)
+            .where(ProjectThread.project_id == project_id)
+            .order_by(ProjectThread.id)),
+        ("message", select(ThreadMessage.id, ThreadMessage.thread_id, ThreadMessage.parent_message_id,
+                           ThreadMessage.author_id, ThreadMessage.body, ThreadMessage.created_at)
+            .join(ProjectThread, ProjectThread.id == ThreadMessage.thread_id)
+            .where(ProjectThread.project_id == project_id)
+            .order_by(ThreadMessage.id)),
+    ]
+
+
+def _plain(v):
+    if isinstance(v, Enum):
+        return v.value
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    return v
+
+
+class _Encoder:
+    """Turns (kind, columns, rows) batches into bytes for one format."""
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self.started = False
+        self.buf = io.StringIO()
+        self.writer = csv.writer(self.buf, lineterminator="\n")
+
+    def header(self, kind: str, columns: list[str]) -> bytes:
+        if self.fmt != "csv":
+            return b""  # ndjson lines carry their own keys
+        lead = "\n" if self.started else ""
+        self.started = True
+        return (lead + ",".join(["record", *columns]) + "\n").encode()
+
+    def rows(self, kind: str, columns: list[str], rows) -> bytes:
+        if self.fmt == "ndjson":
+            return b"".join(
+                dumps({"record": kind, **{c: _plain(v) for c, v in zip(columns, row)}}) + b"\n" for row in rows
+            )
+        for row in rows:
+            # nested JSON (event data) goes into a single cell
+            self.writer.writerow([kind, *(dumps(v).decode() if isinstance(v, (dict, list)) else _plain(v) for v in row)])
+        out = self.buf.getvalue().encode()
+        self.buf.seek(0)
+        self.buf.truncate()
+        return out
+
+
+async def export_chunks(bind: AsyncEngine, project_id: int, fmt: str, batch: int = BATCH) -> AsyncIterator[bytes]:
+    enc = _Encoder(fmt)
+    long_running()  # a big project streams for longer than a request's statement_timeout
+    async with AsyncSession(bind=bind) as db:
+        if bind.dialect.name == "postgresql":
+            await db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        for kind, stmt in _sections(project_id):
+            result = await db.stream(stmt.execution_options(yield_per=batch))
+            columns = list(result.keys())
+            if head := enc.header(kind, columns):
+                yield head
+            async for rows in result.partitions():
+                yield enc.rows(kind, columns, rows)
+
+        columns = [c for c in EVENT_COLUMNS if c != "project_id"]
+        if head := enc.header("event", columns):
+            yield head
+        rows = []
+        async for e in stream_events(db, project_id=project_id, batch=batch):
+            rows.append([getattr(e, c) for c in columns])
+            if len(rows) >= batch:
+                yield enc.rows("event", columns, rows)
+                rows = []
+        if rows:
+            yield enc.rows("event", columns, rows)
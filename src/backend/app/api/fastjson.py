@@ -0,0 +1,42 @@
+# app/api/fastjson.py
+"""
+Opt-in fast path for big list responses (FAST_JSON=1).
+
+Handlers that support it build plain dicts straight from SQL rows and
+return them through json_response(). FastAPI passes a returned Response
+through as-is, so there is no per-row model, no second validation against
+response_model, and no jsonable_encoder walk. The route keeps its
+response_model, so the OpenAPI schema is unchanged. The dict builders are
+the same ones the model path uses, so both paths emit the same JSON.
+
+orjson (the `fast` extra) does the encoding; without it the stdlib encoder
+is used, and the validation pass is still skipped.
+"""
+import json
+from datetime import date, datetime
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # optional: pip install .[fast]
+    orjson = None
+
+def _default(v):
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    raise TypeError(f"{type(v).__name__} is not JSON serializable")
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+def json_response(content, response: Response | None = None, status_code: int = 200) -> Response:
+    """Encoded `content` as a Response, keeping headers already set on the injected `response`."""
+    out = Response(dumps(content), status_code=status_code, media_type="application/json")
+    if response is not None:
+        for k, v in response.headers.items():
+            if k != "content-length":
+                out.headers.append(k, v)
+    return out
@@ -0,0 +1,39 @@
+# app/api/pagination.py
+import base64
+import json
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+PREV_CURSOR_HEADER = "X-Prev-Cursor"
+
+def encode_cursor(*values) -> str:
+    """Opaque keyset cursor: the sort key of the last row on the page."""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, arity: int) -> list:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != arity:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def cursor_key(cursor: str, *parsers) -> tuple:
+    """Decode a cursor and convert each value with its parser (int, datetime.fromisoformat, ...).
+
+    Values that decode but do not parse are a 400 too, never a 500.
+    """
+    values = decode_cursor(cursor, len(parsers))
+    try:
+        return tuple(parse(v) for parse, v in zip(parsers, values))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def set_next_cursor(response: Response, cursor: str | None) -> None:
+    # bodies stay plain lists so existing clients keep working
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
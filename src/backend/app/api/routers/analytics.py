@@ -1,17 +1,25 @@
 # app/api/routers/analytics.py
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date, timedelta
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.pool import statement_timeout
+from app.db.session import get_read_db
 from app.api.routers.auth import get_current_user
-from app.models.user import User
-from app.models.project import Project
-from app.models.membership import ProjectMember
-from app.models.task import Task, TaskStatus
+from app.services import analytics
+from app.services.authz import require_member
+from app.services.leaderboard import read_leaderboard, utc_day
+from app.services.principals import Principal
 
-router = APIRouter(prefix="/analytics", tags=["analytics"])
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(statement_timeout(settings.DB_ANALYTICS_STATEMENT_TIMEOUT_MS))],
+)
 
 class LeaderOut(BaseModel):
     userId: int
@@ -19,53 +27,103 @@ class LeaderOut(BaseModel):
     avatar: str | None = None
     score: float
 
-def ensure_member(db: Session, project_id: int, user_id: int):
-    exists = db.scalar(
-        select(ProjectMember).where(
-            ProjectMember.project_id == project_id,
-            ProjectMember.user_id == user_id
-        )
-    )
-    if not exists:
-        raise HTTPException(status_code=403, detail="Not a member of this project")
+class BurndownPointOut(BaseModel):
+    day: date
+    created: int
+    completed: int
+    reopened: int
+    remaining: int
+
+class VelocityWeekOut(BaseModel):
+    weekStart: date
+    completed: int
+
+class VelocityOut(BaseModel):
+    weeks: list[VelocityWeekOut]
+    average: float
+
+class CycleTimeOut(BaseModel):
+    start: date
+    end: date
+    completed: int
+    # hours; None when nothing was completed in the range
+    p50: float | None = None
+    p75: float | None = None
+    p90: float | None = None
+    p95: float | None = None
+
+MAX_RANGE_DAYS = 731
+
+def _range(start: date | None, end: date | None, default_days: int) -> tuple[date, date]:
+    end = end or utc_day()
+    start = start or end - timedelta(days=default_days - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"range is limited to {MAX_RANGE_DAYS} days")
+    return start, end
 
 @router.get("/leaderboard/{project_id}", response_model=list[LeaderOut])
-def leaderboard(project_id: int, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
-    p = db.get(Project, project_id)
-    if not p:
-        raise HTTPException(status_code=404, detail="Project not found")
-    ensure_member(db, project_id, me.id)
-
-    rows = db.execute(
-        select(
-            User.id,
-            User.name,
-            User.avatar_url,
-            func.count(Task.id).label("done_ct"),
-        )
-        .select_from(ProjectMember)
-        .join(User, User.id == ProjectMember.user_id)
-        .join(Task, (Task.project_id == ProjectMember.project_id) & (Task.assignee_id == User.id), isouter=True)
-        .where(ProjectMember.project_id == project_id, Task.status == TaskStatus.done)
-        .group_by(User.id, User.name, User.avatar_url)
-        .order_by(func.count(Task.id).desc())
-    ).all()
-
-    # include members with 0 if needed
-    # quick pass: collect existing ids
-    have = {r.id for r in rows}
-    zeros = db.execute(
-        select(User.id, User.name, User.avatar_url)
-        .join(ProjectMember, ProjectMember.user_id == User.id)
-        .where(ProjectMember.project_id == project_id, User.id.not_in(have))
-    ).all()
-
-    out: list[LeaderOut] = []
-    for r in rows:
-        out.append(LeaderOut(userId=r.id, name=r.name or "Member", avatar=r.avatar_url, score=float(r.done_ct)))
-    for z in zeros:
-        out.append(LeaderOut(userId=z.id, name=z.name or "Member", avatar=z.avatar_url, score=0.0))
-
-    # final sort
-    out.sort(key=lambda x: x.score, reverse=True)
-    return out
+async def leaderboard(
+    project_id: int,
+    window: Literal["all", "7d", "30d"] = "all",
+    db: AsyncSession = Depends(get_read_db),
+    me: Principal = Depends(get_current_user),
+):
+    """Completed tasks per member, from the incrementally maintained daily rollup."""
+    await require_member(db, project_id, me.id)
+    rows = await read_leaderboard(db, project_id, window)
+    return [
+        LeaderOut(userId=r.id, name=r.name or "Member", avatar=r.avatar_url, score=float(r.score))
+        for r in rows
+    ]
+
+@router.get("/{project_id}/burndown", response_model=list[BurndownPointOut])
+async def burndown(
+    project_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    me: Principal = Depends(get_current_user),
+):
+    """Open tasks at the end of each UTC day (default: the last 30 days)."""
+    await require_member(db, project_id, me.id)
+    start, end = _range(start, end, 30)
+    return [
+        BurndownPointOut(day=d.day, created=d.created, completed=d.completed, reopened=d.reopened, remaining=d.remaining)
+        for d in await analytics.burndown(db, project_id, start, end)
+    ]
+
+@router.get("/{project_id}/velocity", response_model=VelocityOut)
+async def velocity(
+    project_id: int,
+    weeks: int = Query(8, ge=1, le=104),
+    db: AsyncSession = Depends(get_read_db),
+    me: Principal = Depends(get_current_user),
+):
+    """Tasks completed (net of reopens) per ISO week, the current week last."""
+    await require_member(db, project_id, me.id)
+    rows = await analytics.velocity(db, project_id, weeks)
+    return VelocityOut(
+        weeks=[VelocityWeekOut(weekStart=w, completed=n) for w, n in rows],
+        average=round(sum(n for _, n in rows) / len(rows), 2),
+    )
+
+@router.get("/{project_id}/cycle-time", response_model=CycleTimeOut)
+async def cycle_time(
+    project_id: int,
+    start: date | None = None,
+    end: date | None = None,
+    db: AsyncSession = Depends(get_read_db),
+    me: Principal = Depends(get_current_user),
+):
+    """Cycle-time percentiles for tasks completed in the range (default: the last 90 days), within 2%."""
+    await require_member(db, project_id, me.id)
+    start, end = _range(start, end, 90)
+    n, q = await analytics.cycle_time(db, project_id, start, end)
+
+    def hours(p: float) -> float | None:
+        return round(q[p] / 60, 2) if q[p] is not None else None
+
+    return CycleTimeOut(start=start, end=end, completed=n,
+                        p50=hours(0.5), p75=hours(0.75), p90=hours(0.9), p95=hours(0.95))
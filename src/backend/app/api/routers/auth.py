@@ -1,13 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel, EmailStr
-from app.db.session import get_db
+from app.db.pool import statement_timeout
+from app.db.session import get_async_db
 from app.models.user import User
-from app.core.security import hash_password, verify_password, create_access_token, decode_token
+from app.services.principals import Principal, principal_cache
+from app.core.config import settings
+from app.core.security import HasherSaturated, create_access_token, decode_token, password_hasher
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(
+    prefix="/auth",
+    tags=["auth"],
+    dependencies=[Depends(statement_timeout(settings.DB_AUTH_STATEMENT_TIMEOUT_MS))],
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 class SignupIn(BaseModel):
@@ -23,45 +30,80 @@ class UserOut(BaseModel):
     avatar_url: str | None = None
     class Config: from_attributes = True
 
+def _hasher_busy() -> HTTPException:
+    # shed auth load fast instead of letting it queue behind bcrypt
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, retry shortly",
+        headers={"Retry-After": str(settings.PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
 class TokenOut(BaseModel):
     access_token: str
     token_type: str = "bearer"
     user: UserOut
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)) -> Principal:
+    return await principal_from_token(db, token)
+
+async def principal_from_token(db: AsyncSession, token: str) -> Principal:
+    """Shared by the bearer dependency and WebSocket handshakes."""
     try:
         payload = decode_token(token)
         email = payload.get("sub")
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
-    user = db.scalar(select(User).where(User.email == email))
+    uid = payload.get("uid")
+    principal = principal_cache.get(email)
+    if principal is not None and (uid is None or principal.id == uid):
+        return principal
+
+    if uid is not None:
+        user = await db.get(User, uid)
+        if user and user.email != email:
+            user = None  # email changed since the token was issued
+    else:
+        # tokens issued before `uid` was added
+        user = await db.scalar(select(User).where(User.email == email))
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="User inactive or not found")
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(email, principal)
+    return principal
 
 @router.post("/signup", response_model=UserOut)
-def signup(data: SignupIn, db: Session = Depends(get_db)):
-    if db.scalar(select(User).where(User.email == data.email)):
+async def signup(data: SignupIn, db: AsyncSession = Depends(get_async_db)):
+    if await db.scalar(select(User).where(User.email == data.email)):
         raise HTTPException(status_code=400, detail="Email already registered")
+    try:
+        hashed = await password_hasher.hash(data.password)
+    except HasherSaturated:
+        raise _hasher_busy()
     u = User(
         email=data.email,
         name=data.name,
         avatar_url=data.avatar_url,
-        hashed_password=hash_password(data.password),
+        hashed_password=hashed,
         is_active=True,
     )
-    db.add(u); db.commit(); db.refresh(u)
+    db.add(u); await db.commit(); await db.refresh(u)
     return u
 
 @router.post("/login", response_model=TokenOut)
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     # OAuth2 form fields: username, password
-    user = db.scalar(select(User).where(User.email == form.username))
-    if not user or not user.hashed_password or not verify_password(form.password, user.hashed_password):
+    user = await db.scalar(select(User).where(User.email == form.username))
+    if not user or not user.hashed_password:
+        raise HTTPException(status_code=400, detail="Incorrect email or password")
+    try:
+        ok = await password_hasher.verify(form.password, user.hashed_password)
+    except HasherSaturated:
+        raise _hasher_busy()
+    if not ok:
         raise HTTPException(status_code=400, detail="Incorrect email or password")
-    token = create_access_token(user.email)
+    token = create_access_token(user.email, user_id=user.id)
     return TokenOut(access_token=token, user=user)  # includes user for convenience
 
 @router.get("/me", response_model=UserOut)
-def me(current_user: User = Depends(get_current_user)):
+async def me(current_user: Principal = Depends(get_current_user)):
     return current_user
@@ -1,7 +1,48 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core import diagnostics
+from app.core.config import settings
+from app.core.metrics import registry
+from app.core.security import password_hasher
+from app.db.pool import pool_status
+from app.db.session import async_engine, engine, replica_engines
 
 router = APIRouter()
 
 @router.get("/health", tags=["system"])
 def health_check():
     return {"status": "ok"}
+
+@router.get("/health/password-hasher", tags=["system"])
+def password_hasher_stats():
+    return password_hasher.stats()
+
+@router.get("/health/db-pool", tags=["system"])
+def db_pool_stats():
+    """Per-engine pool saturation for this worker."""
+    engines = {"sync": engine.pool, "async": async_engine.sync_engine.pool}
+    engines.update({f"replica{i}": e.sync_engine.pool for i, e in enumerate(replica_engines)})
+    return {
+        "engines": {name: pool_status(p) for name, p in engines.items()},
+        "timeouts": registry.pool_timeouts,
+    }
+
+@router.get("/metrics", tags=["system"], response_class=PlainTextResponse)
+def metrics():
+    """Prometheus text exposition for this worker."""
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    hasher = {
+        f"password_hasher_{k}": v
+        for k, v in password_hasher.stats().items()
+        if isinstance(v, (int, float))
+    }
+    return PlainTextResponse(registry.render(hasher), media_type="text/plain; version=0.0.4")
+
+@router.get("/debug/queries", tags=["system"])
+def recent_query_findings(limit: int = Query(50, ge=1, le=500)):
+    """Recent requests that broke a query budget or ran a slow statement, newest first."""
+    if not settings.DIAGNOSTICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Diagnostics are disabled")
+    return diagnostics.recent(limit)
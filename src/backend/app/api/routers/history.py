@@ -0,0 +1,69 @@
+# app/api/routers/history.py
+from datetime import date, datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_read_db
+from app.api.routers.auth import get_current_user
+from app.api.routers.tasks import TaskStatusLiteral, status_out
+from app.models.task import Task, TaskStatus
+from app.services.authz import require_member
+from app.services.history import State, project_state_at, task_state_at
+from app.services.principals import Principal
+
+router = APIRouter(prefix="/history", tags=["history"])
+
+class TaskStateOut(BaseModel):
+    id: int
+    title: str | None = None
+    description: str | None = None
+    status: TaskStatusLiteral | None = None
+    priority: str | None = None
+    dueDate: date | None = None
+    assigneeId: int | None = None
+
+class ProjectStateOut(BaseModel):
+    projectId: int
+    at: datetime
+    tasks: list[TaskStateOut]
+
+def to_state_out(task_id: int, s: State) -> TaskStateOut:
+    status = s.get("status")  # stored spelling in events and snapshots
+    return TaskStateOut(
+        id=task_id,
+        title=s.get("title"),
+        description=s.get("description"),
+        status=status_out(TaskStatus(status)) if status else None,
+        priority=s.get("priority"),
+        dueDate=s.get("due_date"),
+        assigneeId=s.get("assignee_id"),
+    )
+
+def _as_of(at: datetime | None) -> datetime:
+    if at is None:
+        return datetime.now(timezone.utc)
+    return at if at.tzinfo else at.replace(tzinfo=timezone.utc)
+
+@router.get("/tasks/{task_id}", response_model=TaskStateOut)
+async def task_history(task_id: int, at: datetime | None = None, db: AsyncSession = Depends(get_read_db), me: Principal = Depends(get_current_user)):
+    """A task as it was at `at` (ISO timestamp, default now)."""
+    t = await db.get(Task, task_id)
+    if not t:
+        raise HTTPException(status_code=404, detail="Task not found")
+    await require_member(db, t.project_id, me.id)
+    s = await task_state_at(db, t, _as_of(at))
+    if s is None:
+        raise HTTPException(status_code=404, detail="Task did not exist at that time")
+    return to_state_out(t.id, s)
+
+@router.get("/projects/{project_id}", response_model=ProjectStateOut)
+async def project_history(project_id: int, at: datetime | None = None, db: AsyncSession = Depends(get_read_db), me: Principal = Depends(get_current_user)):
+    """The whole board as it was at `at` (ISO timestamp, default now)."""
+    await require_member(db, project_id, me.id)
+    when = _as_of(at)
+    board = await project_state_at(db, project_id, when)
+    tasks = [to_state_out(int(k), s) for k, s in board.items()]
+    tasks.sort(key=lambda x: x.id, reverse=True)
+    return ProjectStateOut(projectId=project_id, at=when, tasks=tasks)
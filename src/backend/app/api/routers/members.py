@@ -1,13 +1,16 @@
 # app/api/routers/members.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request, Response
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db, get_read_db
+from app.api.etag import make_etag, not_modified, query_key
 from app.api.routers.auth import get_current_user
+from app.services.authz import invalidate_memberships, member_role, require_member
+from app.services.principals import Principal
+from app.services.stats import bump_stats, project_version
 from app.models.user import User
-from app.models.project import Project
 from app.models.membership import ProjectMember, ProjectRole
 
 router = APIRouter(prefix="/projects", tags=["members"])
@@ -26,28 +29,26 @@ class AddMemberIn(BaseModel):
     email: EmailStr
     name: str | None = None
 
-def require_member(db: Session, project_id: int, user_id: int):
-    exists = db.scalar(
-        select(ProjectMember).where(
-            ProjectMember.project_id == project_id,
-            ProjectMember.user_id == user_id
-        )
-    )
-    if not exists:
-        raise HTTPException(status_code=403, detail="Not a member of this project")
-
 @router.get("/{project_id}/members", response_model=list[MemberOut])
-def list_members(project_id: int, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
-    p = db.get(Project, project_id)
-    if not p:
-        raise HTTPException(status_code=404, detail="Project not found")
-    require_member(db, project_id, me.id)
+async def list_members(
+    project_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    me: Principal = Depends(get_current_user),
+):
+    await require_member(db, project_id, me.id)
+    version = await project_version(db, project_id)
+    if version is not None:
+        cached = not_modified(request, response, make_etag("members", project_id, version, query_key(request)))
+        if cached is not None:
+            return cached
 
-    rows = db.execute(
+    rows = (await db.execute(
         select(User, ProjectMember.role)
         .join(ProjectMember, ProjectMember.user_id == User.id)
         .where(ProjectMember.project_id == project_id)
-    ).all()
+    )).all()
 
     out: list[MemberOut] = []
     for u, role in rows:
@@ -64,30 +65,24 @@ def list_members(project_id: int, db: Session = Depends(get_db), me: User = Depe
     return out
 
 @router.post("/{project_id}/members", response_model=MemberOut, status_code=201)
-def add_member(project_id: int, payload: AddMemberIn, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
-    p = db.get(Project, project_id)
-    if not p:
-        raise HTTPException(status_code=404, detail="Project not found")
-    require_member(db, project_id, me.id)
+async def add_member(project_id: int, payload: AddMemberIn, db: AsyncSession = Depends(get_async_db), me: Principal = Depends(get_current_user)):
+    await require_member(db, project_id, me.id)
 
     # find or create user by email (hackathon-friendly)
-    user = db.scalar(select(User).where(User.email == payload.email))
+    user = await db.scalar(select(User).where(User.email == payload.email))
     if not user:
         user = User(email=payload.email, name=payload.name or payload.email.split("@")[0], is_active=True)
-        db.add(user); db.flush()
+        db.add(user); await db.flush()
 
     # add membership if not exists
-    exists = db.scalar(
-        select(ProjectMember).where(
-            ProjectMember.project_id == project_id,
-            ProjectMember.user_id == user.id
-        )
-    )
-    if not exists:
+    _, role = await member_role(db, project_id, user.id)
+    # nothing pending when already a member (the user row pre-existed); a rollback
+    # here would expire `user` and force lazy IO on the async session
+    if role is None:
         db.add(ProjectMember(project_id=project_id, user_id=user.id, role=ProjectRole.member))
-        db.commit()
-    else:
-        db.rollback()
+        await bump_stats(db, project_id, members=1)
+        await db.commit()
+        invalidate_memberships(user.id)
 
     return MemberOut(
         id=user.id, name=user.name, email=user.email, role="member",
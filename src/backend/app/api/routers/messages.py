@@ -1,55 +1,131 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.db.session import get_db
+import asyncio
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import and_, select, tuple_
+from app.db.session import AsyncSessionLocal, get_async_db, get_read_db
+from app.api.etag import make_etag, not_modified, query_key
+from app.api.routers.auth import principal_from_token
+from app.api.pagination import PREV_CURSOR_HEADER, cursor_key, encode_cursor, set_next_cursor
 from app.models.thread import ProjectThread, ThreadMessage
 from app.models.project import Project
+from app.models.stats import ProjectStats
 from app.models.user import User
+from app.services.authz import require_member
+from app.services.broker import broker
+from app.services.stats import bump_stats
 
 router = APIRouter(prefix="/projects", tags=["messages"])
 
-def _ensure_general_thread(db: Session, project_id: int) -> ProjectThread:
-    thr = (
-        db.query(ProjectThread)
-        .filter(ProjectThread.project_id == project_id, ProjectThread.title == "General")
-        .first()
+async def _ensure_general_thread(db: AsyncSession, project_id: int) -> ProjectThread:
+    thr = await db.scalar(
+        select(ProjectThread)
+        .where(ProjectThread.project_id == project_id, ProjectThread.title == "General")
+        .limit(1)
     )
     if thr:
         return thr
     thr = ProjectThread(project_id=project_id, title="General")
-    db.add(thr); db.flush()
+    db.add(thr); await db.flush()
     return thr
 
+def _message_out(m: ThreadMessage, name: str | None, avatar: str | None) -> dict:
+    return {
+        "id": str(m.id),
+        "author": name or "Member",
+        "authorAvatar": avatar or "",
+        "content": m.body,
+        "timestamp": m.created_at.isoformat(),
+        "isReply": m.parent_message_id is not None,
+        "replyTo": str(m.parent_message_id) if m.parent_message_id else None,
+    }
+
 @router.get("/{project_id}/messages")
-def list_messages(project_id: int, db: Session = Depends(get_db)):
-    if not db.query(Project).filter(Project.id == project_id).first():
+async def list_messages(
+    project_id: int,
+    request: Request,
+    response: Response,
+    before: str | None = None,
+    after: str | None = None,
+    since: int | None = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """
+    General-thread messages, oldest first, keyset-paged on (created_at, id).
+
+    - default / `before`: the newest `limit` messages older than the cursor;
+      X-Prev-Cursor is set when there are older ones.
+    - `after`: the next `limit` messages after the cursor; X-Next-Cursor is
+      set when there are more.
+    - `since=<message id>`: incremental poll, only messages newer than that id.
+      410 when the thread has no such message (deleted, or from another
+      thread): reload with the default page instead.
+
+    Answers If-None-Match with 304 while the project's version and the query are unchanged.
+    """
+    row = (await db.execute(
+        select(Project.id, ProjectThread.id.label("thread_id"), ProjectStats.version)
+        .outerjoin(ProjectThread, and_(ProjectThread.project_id == Project.id, ProjectThread.title == "General"))
+        .outerjoin(ProjectStats, ProjectStats.project_id == Project.id)
+        .where(Project.id == project_id)
+        .limit(1)
+    )).first()
+    if row is None:
         raise HTTPException(status_code=404, detail="Project not found")
-    thr = _ensure_general_thread(db, project_id)
-    rows = (
-        db.query(ThreadMessage, User.name, User.avatar_url)
+    if row.version is not None:
+        cached = not_modified(request, response, make_etag("messages", project_id, row.version, query_key(request)))
+        if cached is not None:
+            return cached
+    if row.thread_id is None:
+        return []  # created lazily by the first post; reads never write
+
+    key = tuple_(ThreadMessage.created_at, ThreadMessage.id)
+    q = (
+        select(ThreadMessage, User.name, User.avatar_url)
         .outerjoin(User, User.id == ThreadMessage.author_id)
-        .filter(ThreadMessage.thread_id == thr.id)
-        .order_by(ThreadMessage.created_at.asc())
-        .all()
+        .where(ThreadMessage.thread_id == row.thread_id)
     )
-    return [
-        {
-            "id": str(m.id),
-            "author": name or "Member",
-            "authorAvatar": avatar or "",
-            "content": m.body,
-            "timestamp": m.created_at.isoformat(),
-            "isReply": m.parent_message_id is not None,
-            "replyTo": str(m.parent_message_id) if m.parent_message_id else None,
-        }
-        for (m, name, avatar) in rows
-    ]
+    forward = after is not None or since is not None
+    if after is not None:
+        ts, mid = cursor_key(after, datetime.fromisoformat, int)
+        q = q.where(key > tuple_(ts, mid))
+    elif since is not None:
+        since_ts = await db.scalar(
+            select(ThreadMessage.created_at).where(ThreadMessage.id == since, ThreadMessage.thread_id == row.thread_id)
+        )
+        if since_ts is None:
+            raise HTTPException(status_code=410, detail="Message not found; reload the latest page")
+        q = q.where(key > tuple_(since_ts, since))
+    elif before is not None:
+        ts, mid = cursor_key(before, datetime.fromisoformat, int)
+        q = q.where(key < tuple_(ts, mid))
+
+    if forward:
+        q = q.order_by(ThreadMessage.created_at.asc(), ThreadMessage.id.asc())
+    else:
+        q = q.order_by(ThreadMessage.created_at.desc(), ThreadMessage.id.desc())
+    rows = (await db.execute(q.limit(limit + 1))).all()
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if not forward:
+        rows.reverse()
+
+    if more and rows:
+        edge = rows[-1][0] if forward else rows[0][0]
+        cursor = encode_cursor(edge.created_at.isoformat(), edge.id)
+        if forward:
+            set_next_cursor(response, cursor)
+        else:
+            response.headers[PREV_CURSOR_HEADER] = cursor
+    return [_message_out(m, name, avatar) for (m, name, avatar) in rows]
 
 @router.post("/{project_id}/messages")
-def post_message(project_id: int, payload: dict, db: Session = Depends(get_db)):
-    if not db.query(Project).filter(Project.id == project_id).first():
+async def post_message(project_id: int, payload: dict, db: AsyncSession = Depends(get_async_db)):
+    if not await db.get(Project, project_id):
         raise HTTPException(status_code=404, detail="Project not found")
-    thr = _ensure_general_thread(db, project_id)
+    thr = await _ensure_general_thread(db, project_id)
     body = (payload.get("content") or "").strip()
     if not body:
         raise HTTPException(status_code=400, detail="content required")
@@ -59,5 +135,47 @@ def post_message(project_id: int, payload: dict, db: Session = Depends(get_db)):
         parent_message_id=payload.get("reply_to_id"),
         body=body,
     )
-    db.add(msg); db.commit(); db.refresh(msg)
+    db.add(msg)
+    await bump_stats(db, project_id)  # new version -> message list ETags change
+    await db.commit(); await db.refresh(msg)
+
+    author = await db.get(User, msg.author_id) if msg.author_id else None
+    await broker.publish(project_id, {
+        "type": "message.created",
+        "message": _message_out(msg, author.name if author else None, author.avatar_url if author else None),
+    })
     return {"id": str(msg.id)}
+
+@router.websocket("/{project_id}/ws")
+async def project_events(websocket: WebSocket, project_id: int, token: str = Query(...)):
+    """
+    Push channel for a project: `message.created` and `task.status_changed`
+    events as JSON frames. Browsers cannot set headers on a WebSocket, so
+    the bearer token comes in the `token` query parameter.
+    """
+    await websocket.accept()
+    # authorize with a short-lived session; the socket itself holds no DB connection
+    async with AsyncSessionLocal() as db:
+        try:
+            me = await principal_from_token(db, token)
+            await require_member(db, project_id, me.id)
+        except HTTPException as e:
+            await websocket.close(code=4000 + e.status_code, reason=str(e.detail))  # 4401/4403/4404
+            return
+
+    async with broker.subscribe(project_id) as queue:
+        async def pump():
+            while True:
+                await websocket.send_json(await queue.get())
+
+        sender = asyncio.create_task(pump())
+        try:
+            # the client has nothing to say; this returns when it goes away
+            while True:
+                msg = await websocket.receive()
+                if msg["type"] == "websocket.disconnect":
+                    break
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
@@ -1,16 +1,24 @@
 from datetime import date
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, select, case
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import get_async_db, get_read_db
+from app.api.etag import make_etag, not_modified, query_key
+from app.api.export import FORMATS, export_chunks
+from app.api.fastjson import json_response
 from app.api.routers.auth import get_current_user
-from app.models.user import User
+from app.services.authz import invalidate_memberships, member_role, require_member
+from app.services.principals import Principal
+from app.services.stats import bump_stats, overdue_count
+from app.services.templates import CloneOptions, clone_project
 from app.models.project import Project
 from app.models.membership import ProjectMember, ProjectRole
-from app.models.task import Task, TaskStatus
+from app.models.stats import ProjectStats
 
 from pydantic import BaseModel, Field
 
@@ -23,6 +31,18 @@ class ProjectCreate(BaseModel):
     description: str = ""
     due_date: date | None = None
 
+class ProjectClone(BaseModel):
+    name: str | None = Field(None, min_length=1, max_length=200)
+    as_template: bool = False
+    include_comments: bool = True
+    include_messages: bool = True
+
+class TemplateOut(BaseModel):
+    id: int
+    name: str
+    description: str | None = None
+    totalTasks: int
+
 class ProjectCardOut(BaseModel):
     id: int
     name: str
@@ -30,6 +50,7 @@ class ProjectCardOut(BaseModel):
     members: int
     tasksCompleted: int
     totalTasks: int
+    overdueTasks: int = 0
     dueDate: date | None = None
     status: Literal["active", "completed", "overdue"]
     color: str
@@ -51,80 +72,84 @@ def compute_status(total: int, done: int, due: date | None) -> Literal["active",
 # ---------- Endpoints ----------
 
 @router.get("", response_model=list[ProjectCardOut])
-def list_my_projects(db: Session = Depends(get_db), me: User = Depends(get_current_user)):
+async def list_my_projects(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    me: Principal = Depends(get_current_user),
+):
     """
     Return only projects where the current user is a member,
     shaped exactly like the dashboard expects.
     """
-    # members count per project
-    members_ct = (
-        select(ProjectMember.project_id, func.count(ProjectMember.user_id).label("members"))
-        .group_by(ProjectMember.project_id)
-        .subquery()
-    )
-
-    # tasks summary per project
-    tasks_sum = (
-        select(
-            Task.project_id,
-            func.count(Task.id).label("total"),
-            func.sum(
-                case((Task.status == TaskStatus.done, 1), else_=0)
-            ).label("done"),
-        )
-        .group_by(Task.project_id)
-        .subquery()
-    )
+    # cheap validator first: (project, version) per membership, plus today's
+    # date because "overdue" and the card status move with the calendar
+    versions = (await db.execute(
+        select(ProjectMember.project_id, ProjectStats.version)
+        .outerjoin(ProjectStats, ProjectStats.project_id == ProjectMember.project_id)
+        .where(ProjectMember.user_id == me.id)
+        .order_by(ProjectMember.project_id)
+    )).all()
+    etag = make_etag("projects", me.id, date.today(), query_key(request), *(f"{pid}:{v}" for pid, v in versions))
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
 
+    # one indexed join: the caller's memberships -> projects -> maintained counters
     q = (
         select(
             Project.id,
             Project.name,
             Project.description,
             Project.due_date,
-            members_ct.c.members,
-            func.coalesce(tasks_sum.c.done, 0).label("tasksCompleted"),
-            func.coalesce(tasks_sum.c.total, 0).label("totalTasks"),
+            ProjectStats.members_count.label("members"),
+            ProjectStats.tasks_done.label("tasksCompleted"),
+            ProjectStats.tasks_total.label("totalTasks"),
+            overdue_count(Project.id).label("overdueTasks"),
         )
-        .select_from(Project)  # be explicit about the FROM root
-        .join(ProjectMember, ProjectMember.project_id == Project.id)
-        .join(members_ct, members_ct.c.project_id == Project.id, isouter=True)
-        .join(tasks_sum, tasks_sum.c.project_id == Project.id, isouter=True)
+        .select_from(ProjectMember)
+        .join(Project, Project.id == ProjectMember.project_id)
+        .join(ProjectStats, ProjectStats.project_id == Project.id, isouter=True)
         .where(ProjectMember.user_id == me.id)
         .order_by(Project.id.desc())
     )
 
-    rows = db.execute(q).all()
+    rows = (await db.execute(q)).all()
 
     # map to response
-    out: list[ProjectCardOut] = []
+    out: list[dict] = []
     palette = ["bg-blue-500", "bg-green-500", "bg-purple-500", "bg-orange-500", "bg-pink-500", "bg-teal-500"]
     for idx, r in enumerate(rows):
         due = r.due_date
         total = int(r.totalTasks or 0)
         done = int(r.tasksCompleted or 0)
-        out.append(ProjectCardOut(
+        out.append(dict(
             id=int(r.id),
             name=r.name,
             description=r.description or "",
             members=int(r.members or 1),
             tasksCompleted=done,
             totalTasks=total,
+            overdueTasks=int(r.overdueTasks or 0),
             dueDate=due,
             status=compute_status(total, done, due),
             color=palette[idx % len(palette)],
         ))
-    return out
+    if settings.FAST_JSON:
+        return json_response(out, response)
+    return [ProjectCardOut(**d) for d in out]
 
 
 @router.post("", response_model=ProjectCardOut, status_code=201)
-def create_project(payload: ProjectCreate, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
+async def create_project(payload: ProjectCreate, db: AsyncSession = Depends(get_async_db), me: Principal = Depends(get_current_user)):
     p = Project(name=payload.name, description=payload.description or "", due_date=payload.due_date)
-    db.add(p); db.flush()
+    db.add(p); await db.flush()
 
     # add creator as owner
     db.add(ProjectMember(project_id=p.id, user_id=me.id, role=ProjectRole.owner))
-    db.commit(); db.refresh(p)
+    db.add(ProjectStats(project_id=p.id, members_count=1))
+    await db.commit(); await db.refresh(p)
+    invalidate_memberships(me.id)
 
     # return shaped card (empty counts)
     return ProjectCardOut(
@@ -141,15 +166,99 @@ def create_project(payload: ProjectCreate, db: Session = Depends(get_db), me: Us
 
 
 @router.post("/{project_id}/join", status_code=204)
-def join_project(project_id: int, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
-    p = db.get(Project, project_id)
-    if not p:
+async def join_project(project_id: int, db: AsyncSession = Depends(get_async_db), me: Principal = Depends(get_current_user)):
+    exists, role = await member_role(db, project_id, me.id)
+    if not exists:
         raise HTTPException(status_code=404, detail="Project not found")
-
-    exists = db.scalar(
-        select(ProjectMember).where(ProjectMember.project_id == project_id, ProjectMember.user_id == me.id)
-    )
-    if exists:
+    if role is not None:
         return
     db.add(ProjectMember(project_id=project_id, user_id=me.id, role=ProjectRole.member))
-    db.commit()
+    await bump_stats(db, project_id, members=1)
+    await db.commit()
+    invalidate_memberships(me.id)
+
+
+@router.get("/templates", response_model=list[TemplateOut])
+async def list_templates(db: AsyncSession = Depends(get_async_db), me: Principal = Depends(get_current_user)):
+    """Public templates, plus the ones you are a member of."""
+    mine = select(ProjectMember.project_id).where(ProjectMember.project_id == Project.id, ProjectMember.user_id == me.id)
+    rows = await db.execute(
+        select(Project.id, Project.name, Project.description, ProjectStats.tasks_total)
+        .outerjoin(ProjectStats, ProjectStats.project_id == Project.id)
+        .where(Project.is_template, or_(Project.template_public, mine.exists()))
+        .order_by(Project.name, Project.id)
+    )
+    return [
+        TemplateOut(id=r.id, name=r.name, description=r.description, totalTasks=int(r.tasks_total or 0))
+        for r in rows
+    ]
+
+
+@router.post("/{project_id}/clone", response_model=ProjectCardOut, status_code=201)
+async def clone(
+    project_id: int,
+    payload: ProjectClone,
+    db: AsyncSession = Depends(get_async_db),
+    me: Principal = Depends(get_current_user),
+):
+    """Copy a project you belong to, or instantiate a template you can see.
+
+    Saving a copy as a template takes owner or admin on the source, and only
+    owners and admins bring the other members along.
+    """
+    source = (await db.execute(
+        select(Project.is_template, Project.template_public).where(Project.id == project_id)
+    )).one_or_none()
+    if source is None:
+        raise HTTPException(status_code=404, detail="Project not found")
+    _, role = await member_role(db, project_id, me.id)
+    if role is None and not (source.is_template and source.template_public):
+        raise HTTPException(status_code=404, detail="Project not found")
+    manages = role in (ProjectRole.owner, ProjectRole.admin)
+    if payload.as_template and not manages:
+        raise HTTPException(status_code=403, detail="Only owners and admins can save a project as a template")
+
+    options = CloneOptions(**payload.model_dump(), include_members=manages and not source.is_template)
+    new_id = await clone_project(db, project_id, me.id, options)
+    await db.commit()
+    invalidate_memberships(me.id)
+
+    r = (await db.execute(
+        select(Project.id, Project.name, Project.description, Project.due_date, ProjectStats,
+               overdue_count(Project.id).label("overdue"))
+        .join(ProjectStats, ProjectStats.project_id == Project.id)
+        .where(Project.id == new_id)
+    )).one()
+    stats = r.ProjectStats
+    return ProjectCardOut(
+        id=r.id,
+        name=r.name,
+        description=r.description or "",
+        members=stats.members_count,
+        tasksCompleted=stats.tasks_done,
+        totalTasks=stats.tasks_total,
+        overdueTasks=r.overdue,
+        dueDate=r.due_date,
+        status=compute_status(stats.tasks_total, stats.tasks_done, r.due_date),
+        color="bg-blue-500",
+    )
+
+
+@router.get("/{project_id}/export")
+async def export_project(
+    project_id: int,
+    fmt: Literal["ndjson", "csv"] = Query("ndjson", alias="format"),
+    db: AsyncSession = Depends(get_read_db),
+    me: Principal = Depends(get_current_user),
+):
+    """Stream the whole project: members, tasks, comments, threads, messages and events."""
+    await require_member(db, project_id, me.id)
+    return StreamingResponse(
+        # the export reads on its own session against the same engine (primary or replica)
+        export_chunks(db.bind, project_id, fmt),
+        media_type=FORMATS[fmt],
+        headers={
+            "Content-Disposition": f'attachment; filename="project-{project_id}.{fmt}"',
+            "X-Accel-Buffering": "no",  # let proxies pass batches through as they are produced
+        },
+    )
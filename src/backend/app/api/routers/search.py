@@ -0,0 +1,50 @@
+# app/api/routers/search.py
+from datetime import datetime
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_async_db
+from app.api.routers.auth import get_current_user
+from app.services.authz import require_member
+from app.services.principals import Principal
+from app.services.search import KINDS, search
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+SearchKind = Literal["task", "comment", "message"]
+
+class SearchHitOut(BaseModel):
+    type: SearchKind
+    id: int
+    projectId: int
+    taskId: int | None = None
+    title: str | None = None
+    snippet: str
+    rank: float
+    createdAt: datetime
+
+@router.get("", response_model=list[SearchHitOut])
+async def search_everything(
+    q: str = Query(..., min_length=1, max_length=200),
+    project_id: int | None = None,
+    types: list[SearchKind] | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    me: Principal = Depends(get_current_user),
+):
+    """
+    Tasks, comments and thread messages matching `q`, best first, across the
+    caller's projects (or just `project_id`). Snippets are escaped HTML with matches in <mark>.
+    """
+    if project_id is not None:
+        await require_member(db, project_id, me.id)
+    kinds = tuple(k for k in KINDS if not types or k in types)
+    hits = await search(db, me.id, q, project_id=project_id, kinds=kinds, limit=limit)
+    return [
+        SearchHitOut(type=h.kind, id=h.id, projectId=h.project_id, taskId=h.task_id, title=h.title,
+                     snippet=h.snippet, rank=h.rank, createdAt=h.created_at)
+        for h in hits
+    ]
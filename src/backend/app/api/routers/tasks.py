@@ -1,26 +1,50 @@
 # app/api/routers/tasks.py
+from collections import defaultdict
 from datetime import date, datetime
 from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, Field
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.core.config import settings
+from app.db.session import get_async_db, get_read_db
+from app.api.etag import make_etag, not_modified, query_key
+from app.api.fastjson import json_response
+from app.api.pagination import cursor_key, encode_cursor, set_next_cursor
 from app.api.routers.auth import get_current_user
+from app.services.analytics import record_flow
+from app.services.authz import require_member
+from app.services.broker import broker
+from app.services.history import change_events, created_event, task_state
+from app.services.leaderboard import (
+    Credits, apply_credits, completion_event, last_completions, record_completion, revoke_completion, utc_day,
+)
+from app.services.principals import Principal
+from app.services.stats import apply_task_change, bump_stats, project_version, task_counts
 from app.models.user import User
-from app.models.project import Project
-from app.models.membership import ProjectMember
 from app.models.task import Task, TaskStatus, TaskPriority
+from app.models.comment import TaskComment
+from app.models.membership import ProjectMember
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 # ---------- Schemas ----------
 
 TaskStatusLiteral = Literal["todo", "in-progress", "done"]
+# the web client sends the stored spelling, older clients the hyphenated one
+TaskStatusIn = Literal["todo", "in-progress", "in_progress", "done"]
 TaskPriorityLiteral = Literal["low", "medium", "high"]
 
+def parse_status(value: str) -> TaskStatus:
+    """Status input for PATCH /{id}, PATCH /bulk and the list filter: either spelling."""
+    return TaskStatus(value.replace("-", "_"))
+
+def status_out(status: TaskStatus) -> str:
+    """Status in every response: hyphenated, as TaskOut declares."""
+    return status.value.replace("_", "-")
+
 class TaskOut(BaseModel):
     id: int
     title: str
@@ -46,68 +70,151 @@ class TaskUpdate(BaseModel):
     title: str | None = None
     description: str | None = None
     assignee_id: int | None = None
-    status: TaskStatusLiteral | None = None
+    status: TaskStatusIn | None = None
     priority: TaskPriorityLiteral | None = None
     due_date: date | None = None
 
-def ensure_member(db: Session, project_id: int, user_id: int):
-    exists = db.scalar(
-        select(ProjectMember).where(
-            ProjectMember.project_id == project_id,
-            ProjectMember.user_id == user_id
-        )
-    )
-    if not exists:
-        raise HTTPException(status_code=403, detail="Not a member of this project")
-
-def to_task_out(t: Task, assignee: User | None) -> TaskOut:
-    return TaskOut(
-        id=t.id,
-        title=t.title,
-        description=t.description or "",
-        assignee=(assignee.name or assignee.email) if assignee else "Unassigned",
-        assigneeAvatar=(assignee.avatar_url if assignee else None),
-        status=t.status.value,
-        priority=t.priority.value,
-        dueDate=t.due_date,
-        createdAt=t.created_at,
-        comments=0,
-        attachments=0,
+class TaskBulkCreateItem(BaseModel):
+    title: str = Field(..., min_length=1, max_length=300)
+    description: str = ""
+    assignee_id: int | None = None
+    priority: TaskPriorityLiteral = "medium"
+    due_date: date | None = None
+
+class TaskBulkCreate(BaseModel):
+    project_id: int
+    tasks: list[TaskBulkCreateItem] = Field(..., min_length=1, max_length=1000)
+
+class TaskBulkUpdateItem(TaskUpdate):
+    id: int
+
+class TaskBulkUpdate(BaseModel):
+    tasks: list[TaskBulkUpdateItem] = Field(..., min_length=1, max_length=1000)
+
+class BulkItemOut(BaseModel):
+    index: int
+    ok: bool
+    id: int | None = None
+    error: str | None = None
+    task: TaskOut | None = None
+
+async def comment_counts(db: AsyncSession, task_ids: list[int]) -> dict[int, int]:
+    """Comment totals for a whole page in one grouped query (never per task)."""
+    if not task_ids:
+        return {}
+    rows = await db.execute(
+        select(TaskComment.task_id, func.count(TaskComment.id))
+        .where(TaskComment.task_id.in_(task_ids))
+        .group_by(TaskComment.task_id)
     )
+    return {task_id: n for task_id, n in rows}
+
+def task_dict(t, assignee_name: str | None, assignee_email: str | None, assignee_avatar: str | None,
+              comments: int = 0) -> dict:
+    """TaskOut's fields from anything with Task's attribute names (entity or SQL row)."""
+    return {
+        "id": t.id,
+        "title": t.title,
+        "description": t.description or "",
+        "assignee": (assignee_name or assignee_email) if assignee_email else "Unassigned",
+        "assigneeAvatar": assignee_avatar if assignee_email else None,
+        "status": status_out(t.status),
+        "priority": t.priority.value,
+        "dueDate": t.due_date,
+        "createdAt": t.created_at,
+        "comments": comments,
+        "attachments": t.attachments_count or 0,
+    }
+
+def to_task_out(t: Task, assignee: User | None, comments: int = 0) -> TaskOut:
+    if assignee is None:
+        return TaskOut(**task_dict(t, None, None, None, comments))
+    return TaskOut(**task_dict(t, assignee.name, assignee.email, assignee.avatar_url, comments))
+
+# list rows: plain columns, no entity hydration
+_LIST_COLUMNS = (
+    Task.id, Task.title, Task.description, Task.status, Task.priority, Task.due_date,
+    Task.created_at, Task.attachments_count,
+    User.name.label("assignee_name"), User.email.label("assignee_email"), User.avatar_url.label("assignee_avatar"),
+)
 
 @router.get("/by-project/{project_id}", response_model=list[TaskOut])
-def list_tasks(project_id: int, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
-    p = db.get(Project, project_id)
-    if not p:
-        raise HTTPException(status_code=404, detail="Project not found")
-    ensure_member(db, project_id, me.id)
-
-    rows = db.execute(
-        select(Task, User)
+async def list_tasks(
+    project_id: int,
+    request: Request,
+    response: Response,
+    status: list[TaskStatusIn] | None = Query(None),
+    priority: list[TaskPriority] | None = Query(None),
+    assignee_id: int | None = None,
+    due_from: date | None = None,
+    due_to: date | None = None,
+    cursor: str | None = None,
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_read_db),
+    me: Principal = Depends(get_current_user),
+):
+    """
+    One keyset page of a project's tasks, newest first.
+    The cursor for the next page comes back in the X-Next-Cursor header.
+    Answers If-None-Match with 304 while the project's version and the query are unchanged.
+    """
+    await require_member(db, project_id, me.id)
+    version = await project_version(db, project_id)
+    if version is not None:
+        cached = not_modified(request, response, make_etag("tasks", project_id, version, query_key(request)))
+        if cached is not None:
+            return cached
+
+    statuses = sorted({parse_status(s) for s in status or ()})
+    q = (
+        select(*_LIST_COLUMNS)
         .join(User, User.id == Task.assignee_id, isouter=True)
         .where(Task.project_id == project_id)
-        .order_by(Task.id.desc())
-    ).all()
+    )
+    # Predicates follow index column order: (project_id, status, id) or
+    # (assignee_id, status, due_date). For the assignee index, an unfiltered
+    # status becomes IN (all statuses) so a due-date range is still an index range.
+    if assignee_id is not None:
+        q = q.where(Task.assignee_id == assignee_id)
+        if statuses or due_from or due_to:
+            q = q.where(Task.status.in_(statuses or list(TaskStatus)))
+    elif statuses:
+        q = q.where(Task.status.in_(statuses))
+    if due_from:
+        q = q.where(Task.due_date >= due_from)
+    if due_to:
+        q = q.where(Task.due_date <= due_to)
+    if priority:
+        q = q.where(Task.priority.in_(priority))
+    if cursor:
+        (last_id,) = cursor_key(cursor, int)
+        q = q.where(Task.id < last_id)
 
-    out: list[TaskOut] = []
-    for t, assignee in rows:
-        out.append(to_task_out(t, assignee))
-    return out
+    rows = (await db.execute(q.order_by(Task.id.desc()).limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        set_next_cursor(response, encode_cursor(rows[-1].id))
+
+    counts = await comment_counts(db, [r.id for r in rows])
+    out = [
+        task_dict(r, r.assignee_name, r.assignee_email, r.assignee_avatar, counts.get(r.id, 0))
+        for r in rows
+    ]
+    if settings.FAST_JSON:
+        return json_response(out, response)
+    return [TaskOut(**d) for d in out]
 
 @router.post("", response_model=TaskOut, status_code=201)
-def create_task(payload: TaskCreate, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
-    p = db.get(Project, payload.project_id)
-    if not p:
-        raise HTTPException(status_code=404, detail="Project not found")
-    ensure_member(db, payload.project_id, me.id)
+async def create_task(payload: TaskCreate, db: AsyncSession = Depends(get_async_db), me: Principal = Depends(get_current_user)):
+    await require_member(db, payload.project_id, me.id)
 
     assignee: User | None = None
     if payload.assignee_id:
-        assignee = db.get(User, payload.assignee_id)
+        assignee = await db.get(User, payload.assignee_id)
         if not assignee:
             raise HTTPException(status_code=400, detail="Assignee not found")
         # Ensure assignee is in project
-        ensure_member(db, payload.project_id, payload.assignee_id)
+        await require_member(db, payload.project_id, payload.assignee_id)
 
     t = Task(
         project_id=payload.project_id,
@@ -119,23 +226,210 @@ def create_task(payload: TaskCreate, db: Session = Depends(get_db), me: User = D
         due_date=payload.due_date,
         created_by_id=me.id,
     )
-    db.add(t); db.commit(); db.refresh(t)
+    db.add(t); await db.flush()
+    db.add(created_event(t, me.id))
+    await apply_task_change(db, t.project_id, None, task_counts(t.status))
+    await record_flow(db, created=[t])
+    await db.commit(); await db.refresh(t)
 
     return to_task_out(t, assignee)
 
+# ---------- Bulk ----------
+# Declared before /{task_id} so "bulk" is never parsed as a task id.
+
+async def _memberships(db: AsyncSession, pairs: set[tuple[int, int]]) -> set[tuple[int, int]]:
+    """Which (project_id, user_id) pairs are memberships, in one query."""
+    if not pairs:
+        return set()
+    rows = await db.execute(
+        select(ProjectMember.project_id, ProjectMember.user_id)
+        .where(tuple_(ProjectMember.project_id, ProjectMember.user_id).in_(list(pairs)))
+    )
+    return {(p, u) for p, u in rows}
+
+async def _users(db: AsyncSession, user_ids: set[int]) -> dict[int, User]:
+    if not user_ids:
+        return {}
+    return {u.id: u for u in (await db.scalars(select(User).where(User.id.in_(user_ids)))).all()}
+
+@router.post("/bulk", response_model=list[BulkItemOut])
+async def bulk_create_tasks(payload: TaskBulkCreate, db: AsyncSession = Depends(get_async_db), me: Principal = Depends(get_current_user)):
+    """
+    Create many tasks in one project: one membership query, one multi-row
+    INSERT ... RETURNING, one commit. Items that fail validation come back
+    with ok=false and do not stop the rest.
+    """
+    project_id = payload.project_id
+    await require_member(db, project_id, me.id)
+    members = await _memberships(db, {(project_id, i.assignee_id) for i in payload.tasks if i.assignee_id})
+
+    results: list[BulkItemOut | None] = [None] * len(payload.tasks)
+    rows: list[dict] = []
+    slots: list[int] = []
+    for i, item in enumerate(payload.tasks):
+        if item.assignee_id and (project_id, item.assignee_id) not in members:
+            results[i] = BulkItemOut(index=i, ok=False, error="Assignee is not a member of this project")
+            continue
+        rows.append({
+            "project_id": project_id,
+            "title": item.title,
+            "description": item.description or "",
+            "assignee_id": item.assignee_id or None,
+            "status": TaskStatus.todo,
+            "priority": TaskPriority(item.priority),
+            "due_date": item.due_date,
+            "created_by_id": me.id,
+            "attachments_count": 0,
+        })
+        slots.append(i)
+
+    created: list[Task] = []
+    if rows:
+        created = list((await db.scalars(insert(Task).returning(Task, sort_by_parameter_order=True), rows)).all())
+        db.add_all([created_event(t, me.id) for t in created])
+        await bump_stats(db, project_id, total=len(created), done=sum(task_counts(t.status)[1] for t in created))
+        await record_flow(db, created=created)
+        await db.commit()
+
+    users = await _users(db, {t.assignee_id for t in created if t.assignee_id})
+    for i, t in zip(slots, created):
+        results[i] = BulkItemOut(index=i, ok=True, id=t.id, task=to_task_out(t, users.get(t.assignee_id)))
+    return results
+
+_BULK_COLUMNS = (
+    Task.id, Task.project_id, Task.title, Task.description, Task.status, Task.priority,
+    Task.due_date, Task.assignee_id, Task.attachments_count, Task.created_at,
+)
+
+@router.patch("/bulk", response_model=list[BulkItemOut])
+async def bulk_update_tasks(payload: TaskBulkUpdate, db: AsyncSession = Depends(get_async_db), me: Principal = Depends(get_current_user)):
+    """
+    Patch many tasks (any projects the caller belongs to): one load, one
+    membership query for callers and assignees, one executemany UPDATE by
+    primary key, one commit. Each item succeeds or fails on its own.
+    """
+    items = payload.tasks
+    # plain rows, not entities: the bulk UPDATE below leaves nothing stale in the session
+    current = {
+        r.id: r._asdict()
+        for r in await db.execute(select(*_BULK_COLUMNS).where(Task.id.in_({i.id for i in items})))
+    }
+    wanted = {(r["project_id"], me.id) for r in current.values()}
+    wanted |= {(current[i.id]["project_id"], i.assignee_id) for i in items if i.id in current and i.assignee_id}
+    members = await _memberships(db, wanted)
+
+    results: list[BulkItemOut | None] = [None] * len(items)
+    patched: dict[int, Task] = {}
+    params: list[dict] = []
+    done_now: list[Task] = []
+    reopened: list[Task] = []
+    moves: list[tuple[Task, TaskStatus]] = []
+    deltas: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+    seen: set[int] = set()
+    for i, item in enumerate(items):
+        row = current.get(item.id)
+        error = None
+        if row is None:
+            error = "Task not found"
+        elif item.id in seen:
+            error = "Task appears more than once in this batch"
+        elif (row["project_id"], me.id) not in members:
+            error = "Not a member of this project"
+        elif item.assignee_id and (row["project_id"], item.assignee_id) not in members:
+            error = "Assignee is not a member of this project"
+        if error:
+            results[i] = BulkItemOut(index=i, ok=False, id=item.id, error=error)
+            continue
+        seen.add(item.id)
+
+        old = Task(**row)  # transient, never added to the session
+        t = Task(**row)
+        if item.title is not None:
+            t.title = item.title
+        if item.description is not None:
+            t.description = item.description
+        if item.status is not None:
+            t.status = parse_status(item.status)
+        if item.priority is not None:
+            t.priority = TaskPriority(item.priority)
+        if item.due_date is not None:
+            t.due_date = item.due_date
+        if item.assignee_id is not None:
+            t.assignee_id = item.assignee_id or None
+        patched[i] = t
+
+        events = change_events(t, task_state(old), me.id)
+        if not events:
+            continue
+        db.add_all(events)
+        params.append({
+            "id": t.id, "title": t.title, "description": t.description, "status": t.status,
+            "priority": t.priority, "due_date": t.due_date, "assignee_id": t.assignee_id,
+        })
+        b, a = task_counts(old.status), task_counts(t.status)
+        d = deltas[t.project_id]
+        for k in range(2):
+            d[k] += a[k] - b[k]
+        if t.status != old.status:
+            moves.append((t, old.status))
+            if t.status == TaskStatus.done:
+                done_now.append(t)
+            elif old.status == TaskStatus.done:
+                reopened.append(t)
+
+    if params:
+        await db.execute(update(Task), params)  # ORM bulk UPDATE by primary key -> executemany
+
+        credits: Credits = defaultdict(int)
+        today = utc_day()
+        for t in done_now:
+            e = completion_event(t, me.id)
+            db.add(e)
+            credits[(t.project_id, e.actor_id, today)] += 1
+        last = await last_completions(db, reopened)
+        for t in reopened:
+            hit = last.get(t.id)
+            if hit is not None and hit[0] is not None:
+                credits[(t.project_id, hit[0], hit[1])] -= 1
+        await apply_credits(db, credits)
+        await record_flow(db, done=done_now, reopened=reopened)
+
+        for project_id, (total, done) in deltas.items():
+            await bump_stats(db, project_id, total=total, done=done)
+        await db.commit()
+
+        for t, old_status in moves:
+            await broker.publish(t.project_id, {
+                "type": "task.status_changed",
+                "taskId": t.id,
+                "from": status_out(old_status),
+                "to": status_out(t.status),
+                "actorId": me.id,
+            })
+
+    users = await _users(db, {t.assignee_id for t in patched.values() if t.assignee_id})
+    counts = await comment_counts(db, [t.id for t in patched.values()])
+    for i, t in patched.items():
+        results[i] = BulkItemOut(index=i, ok=True, id=t.id,
+                                 task=to_task_out(t, users.get(t.assignee_id), counts.get(t.id, 0)))
+    return results
+
 @router.patch("/{task_id}", response_model=TaskOut)
-def update_task(task_id: int, payload: TaskUpdate, db: Session = Depends(get_db), me: User = Depends(get_current_user)):
-    t = db.get(Task, task_id)
+async def update_task(task_id: int, payload: TaskUpdate, db: AsyncSession = Depends(get_async_db), me: Principal = Depends(get_current_user)):
+    t = await db.get(Task, task_id)
     if not t:
         raise HTTPException(status_code=404, detail="Task not found")
-    ensure_member(db, t.project_id, me.id)
+    await require_member(db, t.project_id, me.id)
+    before = task_counts(t.status)
+    before_state = task_state(t)
+    old_status = t.status
 
     if payload.title is not None:
         t.title = payload.title
     if payload.description is not None:
         t.description = payload.description
     if payload.status is not None:
-        t.status = TaskStatus(payload.status)
+        t.status = parse_status(payload.status)
     if payload.priority is not None:
         t.priority = TaskPriority(payload.priority)
     if payload.due_date is not None:
@@ -144,12 +438,31 @@ def update_task(task_id: int, payload: TaskUpdate, db: Session = Depends(get_db)
         if payload.assignee_id == 0:
             t.assignee_id = None
         else:
-            assignee = db.get(User, payload.assignee_id)
+            assignee = await db.get(User, payload.assignee_id)
             if not assignee:
                 raise HTTPException(status_code=400, detail="Assignee not found")
-            ensure_member(db, t.project_id, payload.assignee_id)
+            await require_member(db, t.project_id, payload.assignee_id)
             t.assignee_id = payload.assignee_id
 
-    db.commit(); db.refresh(t)
-    assignee = db.get(User, t.assignee_id) if t.assignee_id else None
-    return to_task_out(t, assignee)
+    db.add_all(change_events(t, before_state, me.id))
+    if t.status != old_status:
+        if t.status == TaskStatus.done:
+            await record_completion(db, t, me.id)
+            await record_flow(db, done=[t])
+        elif old_status == TaskStatus.done:
+            await revoke_completion(db, t)
+            await record_flow(db, reopened=[t])
+
+    await apply_task_change(db, t.project_id, before, task_counts(t.status))
+    await db.commit(); await db.refresh(t)
+    if t.status != old_status:
+        await broker.publish(t.project_id, {
+            "type": "task.status_changed",
+            "taskId": t.id,
+            "from": status_out(old_status),
+            "to": status_out(t.status),
+            "actorId": me.id,
+        })
+    assignee = await db.get(User, t.assignee_id) if t.assignee_id else None
+    counts = await comment_counts(db, [t.id])
+    return to_task_out(t, assignee, counts.get(t.id, 0))
@@ -8,9 +8,60 @@ except Exception:
 
 class Settings(BaseModel):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
+    # comma-separated read replicas for read-only handlers (see app/db/replicas.py)
+    DATABASE_REPLICA_URLS: list[str] = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    # after a write, the writer reads from the primary for this long, or until the replica has replayed it
+    REPLICA_STICKY_SECONDS: float = float(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+    REPLICA_STICKY_CACHE_SIZE: int = int(os.getenv("REPLICA_STICKY_CACHE_SIZE", "10000"))
+    REPLICA_LSN_CHECK: bool = os.getenv("REPLICA_LSN_CHECK", "1") == "1"
+    # optional override; derived from DATABASE_URL when empty
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # connection pools (per engine, per worker); a checkout waiting longer than DB_POOL_TIMEOUT fails with 503
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "3"))
+    DB_RETRY_AFTER_SECONDS: int = int(os.getenv("DB_RETRY_AFTER_SECONDS", "1"))
+    # Postgres statement_timeout: the default for every connection, and per-route overrides
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+    DB_ANALYTICS_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_ANALYTICS_STATEMENT_TIMEOUT_MS", "30000"))
+    DB_AUTH_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_AUTH_STATEMENT_TIMEOUT_MS", "2000"))
+    # batch work on the request engine (history snapshots, project exports); 0 = no limit
+    DB_LONG_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_LONG_STATEMENT_TIMEOUT_MS", "0"))
     ENV: str = os.getenv("ENV", "dev")
     SECRET_KEY: str = os.getenv("SECRET_KEY", "dev-secret-change-me")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
     JWT_ALGORITHM: str = "HS256"
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = int(os.getenv("PASSWORD_HASH_RETRY_AFTER_SECONDS", "1"))
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    MEMBERSHIP_CACHE_SIZE: int = int(os.getenv("MEMBERSHIP_CACHE_SIZE", "10000"))
+    MEMBERSHIP_CACHE_TTL_SECONDS: float = float(os.getenv("MEMBERSHIP_CACHE_TTL_SECONDS", "60"))
+    HISTORY_SNAPSHOT_EVERY: int = int(os.getenv("HISTORY_SNAPSHOT_EVERY", "500"))
+    # snapshots stop this far behind now (and before the oldest open transaction on Postgres)
+    HISTORY_SNAPSHOT_SETTLE_SECONDS: float = float(os.getenv("HISTORY_SNAPSHOT_SETTLE_SECONDS", "300"))
+    # task_events retention: months older than this move to gzip JSONL files under EVENT_ARCHIVE_DIR
+    EVENT_HOT_MONTHS: int = int(os.getenv("EVENT_HOT_MONTHS", "6"))
+    EVENT_ARCHIVE_DIR: str = os.getenv("EVENT_ARCHIVE_DIR", "./event_archive")
+    # real-time delivery; BROKER_PG_NOTIFY=1 fans out across workers via LISTEN/NOTIFY
+    BROKER_PG_NOTIFY: bool = os.getenv("BROKER_PG_NOTIFY", "0") == "1"
+    BROKER_CHANNEL: str = os.getenv("BROKER_CHANNEL", "synergysphere_events")
+    BROKER_QUEUE_SIZE: int = int(os.getenv("BROKER_QUEUE_SIZE", "256"))
+
+    # /metrics and the per-request instrumentation behind it
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "1") == "1"
+    # per-request query diagnostics (see app/core/diagnostics.py); not for production traffic
+    DIAGNOSTICS_ENABLED: bool = os.getenv("DIAGNOSTICS_ENABLED", "0") == "1"
+    DIAGNOSTICS_QUERY_BUDGET: int = int(os.getenv("DIAGNOSTICS_QUERY_BUDGET", "20"))
+    DIAGNOSTICS_REPEAT_LIMIT: int = int(os.getenv("DIAGNOSTICS_REPEAT_LIMIT", "5"))
+    DIAGNOSTICS_SLOW_QUERY_MS: float = float(os.getenv("DIAGNOSTICS_SLOW_QUERY_MS", "100"))
+    DIAGNOSTICS_EXPLAIN: bool = os.getenv("DIAGNOSTICS_EXPLAIN", "1") == "1"
+    # EXPLAIN ANALYZE runs the slow statement a second time; only for a dev database
+    DIAGNOSTICS_EXPLAIN_ANALYZE: bool = os.getenv("DIAGNOSTICS_EXPLAIN_ANALYZE", "0") == "1"
+    DIAGNOSTICS_KEEP: int = int(os.getenv("DIAGNOSTICS_KEEP", "200"))
+    # list endpoints: build dicts from rows and encode with orjson, skipping response_model validation
+    FAST_JSON: bool = os.getenv("FAST_JSON", "0") == "1"
 
 settings = Settings()
@@ -0,0 +1,212 @@
+"""
+Per-request query diagnostics: budgets, N+1 shapes and slow-query plans.
+
+Off by default (DIAGNOSTICS_ENABLED=1 turns it on). While it is on,
+DiagnosticsMiddleware opens a Trace for every HTTP request, and engine hooks
+record each statement's normalized shape and latency in it. A request is
+reported when it
+
+- issues more than DIAGNOSTICS_QUERY_BUDGET statements,
+- repeats one statement shape more than DIAGNOSTICS_REPEAT_LIMIT times
+  (the N+1 signature), or
+- runs a statement slower than DIAGNOSTICS_SLOW_QUERY_MS. On Postgres a
+  slow SELECT also gets its plan captured with plain `EXPLAIN`, which
+  plans without executing. DIAGNOSTICS_EXPLAIN_ANALYZE=1 switches to
+  `EXPLAIN (ANALYZE, BUFFERS)` inside a savepoint on the same connection.
+  That runs the statement a second time, so keep it to dev databases.
+
+Reports go to the `app.diagnostics` logger as one JSON line each and to a
+ring buffer served at /debug/queries. `track()` opens a Trace around any
+block of code, for scripts and tests. app.core.diagnostics_pytest enforces
+the same budgets in a test suite.
+"""
+import json
+import logging
+import re
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, Iterator
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+log = logging.getLogger("app.diagnostics")
+
+MAX_SLOW_PER_TRACE = 5
+MAX_PLAN_LINES = 60
+
+# IN (...) lists render with one placeholder per element; fold them so
+# `IN (?, ?)` and `IN (?, ?, ?)` count as the same shape
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*(?:%\(\w+\)s|%s|\?|:\w+|\$\d+)\s*,)+\s*(?:%\(\w+\)s|%s|\?|:\w+|\$\d+)\s*\)")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    return _PLACEHOLDER_LIST.sub("(…)", _SPACE.sub(" ", statement).strip())
+
+
+class Trace:
+    __slots__ = ("queries", "shapes", "slow", "started")
+
+    def __init__(self):
+        self.queries = 0
+        self.shapes: Counter[str] = Counter()
+        self.slow: list[dict] = []
+        self.started = perf_counter()
+
+    def problems(self, budget: int, repeat_limit: int) -> list[str]:
+        out = []
+        if self.queries > budget:
+            out.append(f"{self.queries} queries (budget {budget})")
+        for shape, n in self.shapes.most_common():
+            if n <= repeat_limit:
+                break
+            out.append(f"{n}x {shape[:200]}")
+        return out
+
+    def report(self, **context) -> dict:
+        return {
+            **context,
+            "elapsed_ms": round((perf_counter() - self.started) * 1000, 2),
+            "queries": self.queries,
+            "repeated": [
+                {"statement": s, "count": n}
+                for s, n in self.shapes.most_common()
+                if n > settings.DIAGNOSTICS_REPEAT_LIMIT
+            ],
+            "slow": self.slow,
+        }
+
+
+_trace: ContextVar[Trace | None] = ContextVar("query_trace", default=None)
+
+# recent flagged requests, newest last (served at /debug/queries)
+findings: deque[dict] = deque(maxlen=settings.DIAGNOSTICS_KEEP)
+_findings_lock = threading.Lock()
+
+# called with (trace, context) for every finished request trace; the pytest plugin listens here
+observers: list[Callable[[Trace, dict], None]] = []
+
+
+@contextmanager
+def track() -> Iterator[Trace]:
+    trace = Trace()
+    token = _trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _trace.reset(token)
+
+
+# ---------- SQLAlchemy hooks ----------
+
+def _explain(conn, statement: str, parameters) -> list[str] | None:
+    """The statement's plan on a fresh DBAPI cursor, isolated by a savepoint.
+
+    Never raises: diagnostics must not change a request's outcome.
+    """
+    prefix = "EXPLAIN (ANALYZE, BUFFERS) " if settings.DIAGNOSTICS_EXPLAIN_ANALYZE else "EXPLAIN "
+    cur = None
+    saved = False
+    try:
+        cur = conn.connection.dbapi_connection.cursor()
+        cur.execute("SAVEPOINT diag_explain")
+        saved = True
+        cur.execute(prefix + statement, parameters)
+        plan = [row[0] for row in cur.fetchall()][:MAX_PLAN_LINES]
+        cur.execute("RELEASE SAVEPOINT diag_explain")
+        return plan
+    except Exception:
+        log.debug("EXPLAIN failed", exc_info=True)
+        if saved:
+            try:
+                cur.execute("ROLLBACK TO SAVEPOINT diag_explain")
+            except Exception:
+                log.debug("rollback after EXPLAIN failed", exc_info=True)
+        return None
+    finally:
+        if cur is not None:
+            try:
+                cur.close()
+            except Exception:
+                pass
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _trace.get() is not None:
+        conn.info.setdefault("diag_t0", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _trace.get()
+    starts = conn.info.get("diag_t0")
+    if trace is None or not starts:
+        return
+    ms = (perf_counter() - starts.pop()) * 1000
+    shape = statement_shape(statement)
+    trace.queries += 1
+    trace.shapes[shape] += 1
+    if ms < settings.DIAGNOSTICS_SLOW_QUERY_MS or len(trace.slow) >= MAX_SLOW_PER_TRACE:
+        return
+    entry: dict = {"statement": shape, "ms": round(ms, 2)}
+    if (
+        settings.DIAGNOSTICS_EXPLAIN
+        and not executemany
+        and conn.dialect.name == "postgresql"
+        and shape.lstrip("( ").upper().startswith(("SELECT", "WITH"))
+    ):
+        entry["plan"] = _explain(conn, statement, parameters)
+    trace.slow.append(entry)
+
+
+def install(*engines) -> None:
+    """Attach the hooks (idempotent). Pass async_engine.sync_engine for async engines."""
+    for engine in engines:
+        if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def finish(trace: Trace, **context) -> dict | None:
+    """Judge a finished trace; log and keep it when it breaks a budget."""
+    report = None
+    problems = trace.problems(settings.DIAGNOSTICS_QUERY_BUDGET, settings.DIAGNOSTICS_REPEAT_LIMIT)
+    if problems or trace.slow:
+        report = trace.report(**context, problems=problems)
+        log.warning(json.dumps(report, default=str))
+        with _findings_lock:
+            findings.append(report)
+    for observe in observers:
+        observe(trace, context)
+    return report
+
+
+def recent(limit: int = 50) -> list[dict]:
+    with _findings_lock:
+        return list(findings)[-limit:][::-1]
+
+
+# ---------- ASGI ----------
+
+class DiagnosticsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with track() as trace:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                finish(
+                    trace,
+                    method=scope["method"],
+                    route=getattr(scope.get("route"), "path", None) or "unmatched",
+                    path=scope["path"],
+                )
@@ -0,0 +1,72 @@
+"""
+pytest plugin: fail tests whose requests break the query budgets.
+
+    pytest -p app.core.diagnostics_pytest
+    # or, in a conftest.py:  pytest_plugins = ["app.core.diagnostics_pytest"]
+
+The plugin turns diagnostics on before the app is imported, so every request
+a test sends through the app (TestClient, httpx ASGITransport) is traced.
+A test fails if any of its requests issues more than `query_budget`
+statements or repeats one statement shape more than `query_repeat_limit`
+times. Both are ini options; `@pytest.mark.query_budget(queries=3, repeats=1)`
+overrides them for one test. For service-level code, the `query_trace`
+fixture traces the test body itself:
+
+    def test_bulk_is_set_based(db, query_trace):
+        ...
+        assert query_trace.queries <= 4
+"""
+import os
+
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addini("query_budget", "max DB statements per request", default="20")
+    parser.addini("query_repeat_limit", "max repeats of one statement shape per request", default="5")
+
+
+def pytest_configure(config):
+    # settings are read at import time, so this must precede `import app.main`
+    os.environ.setdefault("DIAGNOSTICS_ENABLED", "1")
+    config.addinivalue_line(
+        "markers", "query_budget(queries=None, repeats=None): per-test DB query budgets"
+    )
+
+
+def _limit(item, key: str, ini: str) -> int:
+    marker = item.get_closest_marker("query_budget")
+    if marker is not None and marker.kwargs.get(key) is not None:
+        return int(marker.kwargs[key])
+    return int(item.config.getini(ini))
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    from app.core import diagnostics
+
+    budget = _limit(item, "queries", "query_budget")
+    repeats = _limit(item, "repeats", "query_repeat_limit")
+    broken: list[str] = []
+
+    def observe(trace, context):
+        problems = trace.problems(budget, repeats)
+        if problems:
+            broken.append(f"{context.get('method')} {context.get('route')}: " + "; ".join(problems))
+
+    diagnostics.observers.append(observe)
+    try:
+        result = yield
+    finally:
+        diagnostics.observers.remove(observe)
+    if broken:
+        pytest.fail("Query budget exceeded:\n  " + "\n  ".join(broken), pytrace=False)
+    return result
+
+
+@pytest.fixture
+def query_trace():
+    from app.core import diagnostics
+
+    with diagnostics.track() as trace:
+        yield trace
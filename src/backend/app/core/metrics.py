@@ -0,0 +1,273 @@
+"""
+In-process request and database metrics, rendered in Prometheus text format.
+
+MetricsMiddleware (pure ASGI, no extra task per request) times each request
+and puts a RequestStats in a contextvar. Engine events and the timed pool
+classes add to it: SQLAlchemy runs async-engine events in a greenlet that
+shares the request's context, so sync and async sessions both count. On the
+way out the middleware folds everything into per-route series keyed by the
+route template (`/api/v1/tasks/{task_id}`), so label cardinality stays at
+the number of routes. Work outside a request still lands in the global
+db_* series.
+
+Each worker keeps its own numbers; scrape every worker, or run one per pod.
+"""
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.db.pool import pool_status
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _num(v) -> str:
+    return f"{v:.6f}" if isinstance(v, float) else str(v)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_request() -> RequestStats | None:
+    return _current.get()
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> list[str]:
+        out, acc = [], 0
+        sep = "," if labels else ""
+        for le, n in zip((*self.buckets, "+Inf"), self.counts):
+            acc += n
+            out.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {acc}')
+        plain = f"{{{labels}}}" if labels else ""
+        out.append(f"{name}_sum{plain} {_num(self.sum)}")
+        out.append(f"{name}_count{plain} {self.count}")
+        return out
+
+
+class RouteMetrics:
+    __slots__ = ("duration", "queries", "statuses", "db_queries", "db_seconds", "pool_wait_seconds", "response_bytes")
+
+    def __init__(self):
+        self.duration = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.statuses: dict[int, int] = {}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        self.response_bytes = 0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes: dict[tuple[str, str], RouteMetrics] = {}
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.pool_waits = Histogram(LATENCY_BUCKETS)
+        self.pool_timeouts = 0
+        self.pools: dict[str, object] = {}
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float,
+                        stats: RequestStats, response_bytes: int) -> None:
+        with self._lock:
+            m = self.routes.get((method, route))
+            if m is None:
+                m = self.routes[(method, route)] = RouteMetrics()
+            m.duration.observe(seconds)
+            m.queries.observe(stats.queries)
+            m.statuses[status] = m.statuses.get(status, 0) + 1
+            m.db_queries += stats.queries
+            m.db_seconds += stats.db_seconds
+            m.pool_wait_seconds += stats.pool_wait_seconds
+            m.response_bytes += response_bytes
+
+    def observe_query(self, seconds: float) -> None:
+        with self._lock:
+            self.db_queries += 1
+            self.db_seconds += seconds
+        stats = _current.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += seconds
+
+    def observe_pool_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.pool_waits.observe(seconds)
+        stats = _current.get()
+        if stats is not None:
+            stats.pool_wait_seconds += seconds
+
+    def observe_pool_timeout(self) -> None:
+        with self._lock:
+            self.pool_timeouts += 1
+
+    def render(self, extra: dict[str, float] | None = None) -> str:
+        lines: list[str] = []
+
+        def family(name: str, kind: str, help_: str) -> None:
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            routes = sorted(self.routes.items())
+
+            family("http_requests_total", "counter", "Requests by route template and status.")
+            for (method, route), m in routes:
+                for status, n in sorted(m.statuses.items()):
+                    lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {n}')
+            family("http_request_duration_seconds", "histogram", "Request latency by route template.")
+            for (method, route), m in routes:
+                lines += m.duration.lines("http_request_duration_seconds", f'method="{method}",route="{route}"')
+            family("http_request_db_queries", "histogram", "DB statements per request.")
+            for (method, route), m in routes:
+                lines += m.queries.lines("http_request_db_queries", f'method="{method}",route="{route}"')
+            for name, attr, help_ in (
+                ("http_db_queries_total", "db_queries", "DB statements issued while serving the route."),
+                ("http_db_seconds_total", "db_seconds", "Time spent executing DB statements."),
+                ("http_db_pool_wait_seconds_total", "pool_wait_seconds", "Time spent waiting for a pooled connection."),
+                ("http_response_bytes_total", "response_bytes", "Response body bytes sent."),
+            ):
+                family(name, "counter", help_)
+                for (method, route), m in routes:
+                    lines.append(f'{name}{{method="{method}",route="{route}"}} {_num(getattr(m, attr))}')
+
+            family("db_queries_total", "counter", "DB statements on all engines, in or out of requests.")
+            lines.append(f"db_queries_total {self.db_queries}")
+            family("db_seconds_total", "counter", "Time spent executing DB statements.")
+            lines.append(f"db_seconds_total {_num(self.db_seconds)}")
+            family("db_pool_wait_seconds", "histogram", "Connection checkout wait.")
+            lines += self.pool_waits.lines("db_pool_wait_seconds", "")
+            family("db_pool_timeouts_total", "counter", "Checkouts that gave up waiting (answered 503).")
+            lines.append(f"db_pool_timeouts_total {self.pool_timeouts}")
+
+        statuses = sorted((name, pool_status(p)) for name, p in self.pools.items())
+        for key, help_ in (
+            ("checked_out", "Connections currently checked out."),
+            ("size", "Configured pool size."),
+            ("overflow", "Connections open beyond the pool size."),
+            ("saturation", "Checked out / (size + max overflow)."),
+        ):
+            family(f"db_pool_{key}", "gauge", help_)
+            for name, st in statuses:
+                if st:
+                    lines.append(f'db_pool_{key}{{engine="{name}"}} {_num(st[key])}')
+        for key, value in sorted((extra or {}).items()):
+            lines.append(f"{key} {_num(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+# ---------- SQLAlchemy hooks ----------
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_t0", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_t0")
+    if starts:
+        registry.observe_query(perf_counter() - starts.pop())
+
+
+def _handle_error(exception_context):
+    # a failed statement never reaches after_cursor_execute
+    starts = exception_context.connection.info.get("metrics_t0") if exception_context.connection else None
+    if starts:
+        registry.observe_query(perf_counter() - starts.pop())
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Count and time every statement on `engine` (pass async_engine.sync_engine for async)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+    registry.pools[name] = engine.pool
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited."""
+
+    def _do_get(self):
+        t0 = perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            registry.observe_pool_timeout()
+            raise
+        finally:
+            registry.observe_pool_wait(perf_counter() - t0)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        t0 = perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            registry.observe_pool_timeout()
+            raise
+        finally:
+            registry.observe_pool_wait(perf_counter() - t0)
+
+
+# ---------- ASGI ----------
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status, size = 500, 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        t0 = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - t0
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"  # template, not the raw path
+            registry.observe_request(scope["method"], route, status, elapsed, stats, size)
@@ -1,3 +1,8 @@
+import asyncio
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
 from passlib.context import CryptContext
 import jwt
@@ -11,10 +16,90 @@ def hash_password(p: str) -> str:
 def verify_password(p: str, hp: str) -> bool:
     return pwd_context.verify(p, hp)
 
-def create_access_token(sub: str, expires_minutes: int | None = None) -> str:
+def create_access_token(sub: str, expires_minutes: int | None = None, user_id: int | None = None) -> str:
     expire = datetime.now(timezone.utc) + timedelta(minutes=expires_minutes or settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {"sub": sub, "exp": expire}
+    if user_id is not None:
+        payload["uid"] = user_id  # lets auth resolve by primary key
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
 
 def decode_token(token: str) -> dict:
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+
+
+# ---------- Password hashing pool ----------
+
+class HasherSaturated(Exception):
+    """Raised instead of queueing when the hashing pool is full."""
+
+
+class PasswordHasher:
+    """bcrypt on a dedicated process pool with a bounded admission queue.
+
+    Hashing never runs on the event loop or the shared threadpool, so a login
+    storm only ever occupies `workers` processes; anything beyond
+    `workers + max_pending` is rejected immediately.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._pool: ProcessPoolExecutor | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self._latencies: deque[float] = deque(maxlen=1024)
+
+    def _executor(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: never fork a process that owns an event loop and DB pools
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def _run(self, fn, *args):
+        if self.in_flight >= self.workers + self.max_pending:
+            self.rejected += 1
+            raise HasherSaturated()
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    async def hash(self, p: str) -> str:
+        return await self._run(hash_password, p)
+
+    async def verify(self, p: str, hp: str) -> bool:
+        return await self._run(verify_password, p, hp)
+
+    def stats(self) -> dict:
+        lat = sorted(self._latencies)
+
+        def pct(q: float) -> float | None:
+            return round(lat[min(len(lat) - 1, int(q * len(lat)))], 4) if lat else None
+
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.workers),
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_p50_s": pct(0.50),
+            "latency_p95_s": pct(0.95),
+            "latency_max_s": round(lat[-1], 4) if lat else None,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
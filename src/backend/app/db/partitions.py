@@ -0,0 +1,92 @@
+# src/backend/app/db/partitions.py
+"""
+Monthly range partitions of task_events (Postgres).
+
+Migration 1376f66ce685 turns task_events into a table partitioned by
+created_at, one partition per UTC month named task_events_pYYYY_MM, plus a
+task_events_default partition that catches anything outside them. Inserts
+and reads go through the parent as before; each partition carries its own
+small indexes, and an old month can be detached and dropped whole once
+archived (app/scripts/archive_events.py).
+
+Everything here takes a sync Connection and leaves committing to the caller.
+"""
+from datetime import date, datetime, timezone
+
+from sqlalchemy import text
+
+PARENT = "task_events"
+DEFAULT = "task_events_default"
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+def add_months(month: date, n: int) -> date:
+    y, m = divmod(month.year * 12 + month.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+def month_bounds(month: date) -> tuple[datetime, datetime]:
+    """[start, end) of a UTC month as aware datetimes."""
+    lo = datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+    hi = add_months(month, 1)
+    return lo, datetime(hi.year, hi.month, 1, tzinfo=timezone.utc)
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y_%m}"
+
+
+def is_partitioned(conn) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.scalar(text("SELECT relkind FROM pg_class WHERE oid = to_regclass(:t)"), {"t": PARENT}) == "p"
+
+def existing_months(conn) -> list[date]:
+    """Months that have their own partition, oldest first."""
+    names = conn.scalars(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:t)"
+    ), {"t": PARENT})
+    prefix = f"{PARENT}_p"
+    return sorted(
+        date(int(n[len(prefix):len(prefix) + 4]), int(n[-2:]), 1)
+        for n in names if n.startswith(prefix)
+    )
+
+def ensure_partitions(conn, first: date, last: date) -> list[date]:
+    """Create the monthly partitions for [first, last] that are missing; returns the new months.
+
+    Rows that already landed in the default partition for a new month are
+    moved into it (the default is detached meanwhile, as Postgres requires).
+    """
+    have = set(existing_months(conn))
+    created = []
+    month = month_start(first)
+    while month <= last:
+        if month not in have:
+            lo, hi = month_bounds(month)
+            params = {"lo": lo, "hi": hi}
+            stray = conn.scalar(text(
+                f"SELECT EXISTS (SELECT 1 FROM {DEFAULT} WHERE created_at >= :lo AND created_at < :hi)"
+            ), params)
+            if stray:
+                conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {DEFAULT}"))
+            conn.execute(text(
+                f"CREATE TABLE {partition_name(month)} PARTITION OF {PARENT} "
+                f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+            ))
+            if stray:
+                conn.execute(text(
+                    f"WITH moved AS (DELETE FROM {DEFAULT} WHERE created_at >= :lo AND created_at < :hi RETURNING *) "
+                    f"INSERT INTO {PARENT} SELECT * FROM moved"
+                ), params)
+                conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {DEFAULT} DEFAULT"))
+            created.append(month)
+        month = add_months(month, 1)
+    return created
+
+def drop_partition(conn, month: date) -> None:
+    name = partition_name(month)
+    conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
@@ -0,0 +1,94 @@
+# src/backend/app/db/pool.py
+"""
+Pool sizing, checkout backpressure and statement timeouts.
+
+Every engine gets the DB_POOL_* sizing. A checkout that waits longer than
+DB_POOL_TIMEOUT_SECONDS raises sqlalchemy.exc.TimeoutError, which app.main
+turns into 503 + Retry-After, so a burst of slow queries sheds load instead
+of queueing every request behind them.
+
+On Postgres each connection of the request-serving engines (primary and
+replicas, async) starts with statement_timeout = DB_STATEMENT_TIMEOUT_MS;
+the sync engine the maintenance scripts use has no default limit. A router
+can move its own limit with `dependencies=[Depends(statement_timeout(ms))]`;
+sessions opened in that request then run `SET LOCAL statement_timeout` at
+the start of each transaction. Long batch work on the async engine (the
+history snapshot job, project exports) calls `long_running()` first, which
+does the same with DB_LONG_STATEMENT_TIMEOUT_MS.
+"""
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+_route_timeout: ContextVar[int | None] = ContextVar("statement_timeout_ms", default=None)
+
+
+def engine_options(url: str, timed_pool=None, statement_timeout: bool = True) -> dict:
+    """create_engine/create_async_engine kwargs for `url`; `statement_timeout` applies the request default."""
+    backend = make_url(url).get_backend_name()
+    # SQLite picks its own pool (SingletonThreadPool/StaticPool for :memory:); leave it alone
+    if backend == "sqlite":
+        return {}
+    opts: dict = dict(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    )
+    if timed_pool is not None:
+        opts["poolclass"] = timed_pool
+    if statement_timeout and backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        opts["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+    return opts
+
+
+def pool_status(pool) -> dict:
+    """Saturation snapshot of a QueuePool; {} for pools without a fixed size."""
+    if not hasattr(pool, "size"):
+        return {}
+    size, max_overflow = pool.size(), pool._max_overflow
+    capacity = size + max(max_overflow, 0)  # -1 means unbounded overflow
+    checked_out = pool.checkedout()
+    return {
+        "size": size,
+        "max_overflow": max_overflow,
+        "checked_out": checked_out,
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "saturation": round(checked_out / capacity, 3) if capacity else 0.0,
+    }
+
+
+# ---------- Per-route statement timeouts ----------
+
+def statement_timeout(ms: int):
+    """Router dependency: run this route's statements under `ms` instead of the default."""
+    async def _set_timeout():
+        _route_timeout.set(ms)
+    return _set_timeout
+
+
+def long_running() -> None:
+    """Run the rest of this task/context under DB_LONG_STATEMENT_TIMEOUT_MS (0: no limit)."""
+    _route_timeout.set(settings.DB_LONG_STATEMENT_TIMEOUT_MS)
+
+
+def _after_begin(session, transaction, connection):
+    ms = _route_timeout.get()
+    if ms is not None and ms != settings.DB_STATEMENT_TIMEOUT_MS and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(ms)}")
+
+
+def install() -> None:
+    if not event.contains(Session, "after_begin", _after_begin):
+        event.listen(Session, "after_begin", _after_begin)
+
+
+def is_statement_timeout(exc: BaseException) -> bool:
+    """Postgres cancelled the statement (SQLSTATE 57014: statement_timeout)."""
+    orig = getattr(exc, "orig", None)
+    return getattr(orig, "sqlstate", None) == "57014" or getattr(orig, "pgcode", None) == "57014"
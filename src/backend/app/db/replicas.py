@@ -0,0 +1,111 @@
+# src/backend/app/db/replicas.py
+"""
+Read-your-writes stickiness for replica routing.
+
+Read-only handlers take `get_read_db` (app/db/session.py), which hands out a
+session on one of the DATABASE_REPLICA_URLS engines, round robin. Request
+sessions from `get_async_db` carry the caller's key (the bearer token's
+subject); when one of them commits a write, the key is pinned to the primary
+for REPLICA_STICKY_SECONDS. On Postgres the primary's WAL position after the
+commit is recorded too, and a pinned read goes to the replica anyway once
+that replica has replayed past it (one `pg_last_wal_replay_lsn()` query).
+
+Pins live in a per-worker TTLCache. A user whose next read lands on another
+worker can still see replica lag there; route by user at the balancer, or
+keep REPLICA_STICKY_SECONDS above the usual lag.
+"""
+from itertools import count
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.requests import HTTPConnection
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import decode_token
+
+# sticky key -> primary WAL LSN after the write ("" until it is known)
+sticky: TTLCache[str, str] = TTLCache(
+    maxsize=settings.REPLICA_STICKY_CACHE_SIZE,
+    ttl=settings.REPLICA_STICKY_SECONDS,
+)
+
+_turn = count()
+
+
+def pick(choices: list):
+    return choices[next(_turn) % len(choices)]
+
+
+def sticky_key(conn: HTTPConnection) -> str | None:
+    """The caller's token subject, or None for anonymous requests."""
+    scheme, _, token = conn.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_token(token).get("sub")
+    except Exception:
+        return None
+
+
+# ---------- Primary side ----------
+
+def _is_pg(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+def _wrote(session: Session) -> None:
+    session.info["wrote"] = True
+
+def _after_flush(session, flush_context):
+    _wrote(session)
+
+def _do_orm_execute(state):
+    # bulk UPDATE/INSERT/DELETE statements never go through a flush
+    if state.is_insert or state.is_update or state.is_delete:
+        _wrote(state.session)
+
+def _after_commit(session: Session):
+    key = session.info.get("sticky_key")
+    if session.info.pop("wrote", False) and key:
+        sticky.set(key, "")
+        session.info["pin_lsn"] = True
+
+def _after_rollback(session: Session):
+    session.info.pop("wrote", None)
+
+
+def install() -> None:
+    """Track writes on request sessions (idempotent; only sessions with a sticky_key are pinned)."""
+    if not event.contains(Session, "after_commit", _after_commit):
+        event.listen(Session, "after_flush", _after_flush)
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
+        event.listen(Session, "after_commit", _after_commit)
+        event.listen(Session, "after_rollback", _after_rollback)
+
+
+async def record_lsn(db: AsyncSession) -> None:
+    """After the handler: pin the writer to the primary's current WAL position."""
+    key = db.info.get("sticky_key")
+    if not db.info.pop("pin_lsn", False) or not key or not settings.REPLICA_LSN_CHECK or not _is_pg(db):
+        return
+    lsn = await db.scalar(text("SELECT pg_current_wal_lsn()::text"))
+    if lsn:
+        sticky.set(key, lsn)
+
+
+# ---------- Replica side ----------
+
+async def caught_up(db: AsyncSession, key: str | None) -> bool:
+    """May `key` read from this replica session?"""
+    if key is None:
+        return True
+    lsn = sticky.get(key)
+    if lsn is None:
+        return True  # not pinned
+    if not lsn or not settings.REPLICA_LSN_CHECK or not _is_pg(db):
+        return False
+    # NULL when the "replica" is not in recovery (e.g. pointed at the primary)
+    return bool(await db.scalar(
+        text("SELECT coalesce(pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn), true)"), {"lsn": lsn}
+    ))
@@ -1,10 +1,23 @@
 # src/backend/app/db/session.py
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from starlette.requests import HTTPConnection
 from app.core.config import settings
+from app.core import diagnostics
+from app.db import pool, replicas
+from app.db.pool import engine_options
+from app.core.metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument_engine
 
-# create engine once
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+def _engine_options(url: str, timed, statement_timeout: bool = True) -> dict:
+    return engine_options(url, timed if settings.METRICS_ENABLED else None, statement_timeout)
+
+# create engine once; scripts use it for whole-table work, so no default statement_timeout
+engine = create_engine(
+    settings.DATABASE_URL, pool_pre_ping=True,
+    **_engine_options(settings.DATABASE_URL, TimedQueuePool, statement_timeout=False),
+)
 
 # classic session factory
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
@@ -16,3 +29,66 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ---------- Async ----------
+
+# sync drivers -> async drivers (psycopg 3 speaks both)
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg",
+    "postgresql+psycopg2": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+def async_database_url(url: str) -> str:
+    """Map DATABASE_URL onto a driver usable by create_async_engine."""
+    u = make_url(url)
+    return u.set(drivername=_ASYNC_DRIVERS.get(u.drivername, u.drivername)).render_as_string(hide_password=False)
+
+def _async_engine(url: str):
+    return create_async_engine(url, pool_pre_ping=True, **_engine_options(url, TimedAsyncAdaptedQueuePool))
+
+_async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = _async_engine(_async_url)
+
+# read replicas (async only; the read-heavy handlers are async)
+replica_engines = [_async_engine(async_database_url(u)) for u in settings.DATABASE_REPLICA_URLS]
+
+if settings.METRICS_ENABLED:
+    instrument_engine(engine, "sync")
+    instrument_engine(async_engine.sync_engine, "async")
+    for i, e in enumerate(replica_engines):
+        instrument_engine(e.sync_engine, f"replica{i}")
+if settings.DIAGNOSTICS_ENABLED:
+    diagnostics.install(engine, async_engine.sync_engine, *(e.sync_engine for e in replica_engines))
+if replica_engines:
+    replicas.install()
+pool.install()
+
+# expire_on_commit=False: handlers read attributes after commit without lazy IO
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+ReplicaSessionLocals = [
+    async_sessionmaker(bind=e, autoflush=False, expire_on_commit=False) for e in replica_engines
+]
+
+# FastAPI dependency (async handlers)
+async def get_async_db(conn: HTTPConnection):
+    async with AsyncSessionLocal() as db:
+        if not ReplicaSessionLocals:
+            yield db
+            return
+        # a commit that wrote pins this caller to the primary (app/db/replicas.py)
+        db.info["sticky_key"] = replicas.sticky_key(conn)
+        yield db
+        await replicas.record_lsn(db)
+
+# FastAPI dependency for read-only handlers: a replica unless the caller wrote recently
+async def get_read_db(conn: HTTPConnection):
+    if ReplicaSessionLocals:
+        async with replicas.pick(ReplicaSessionLocals)() as db:
+            if await replicas.caught_up(db, replicas.sticky_key(conn)):
+                yield db
+                return
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,23 @@
+# src/backend/app/db/upsert.py
+from sqlalchemy.dialects import postgresql, sqlite
+
+_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def upsert_increment_stmt(dialect_name: str, model, keys: list[str], rows: list[dict], counters: list[str]):
+    """INSERT ... ON CONFLICT (keys) DO UPDATE SET c = c + excluded.c, for every counter column."""
+    insert = _INSERTS.get(dialect_name)
+    if insert is None:
+        raise NotImplementedError(f"upsert not supported on {dialect_name}")
+    stmt = insert(model).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={c: getattr(model, c) + getattr(stmt.excluded, c) for c in counters},
+    )
+
+async def upsert_increment(db, model, keys: list[str], rows: list[dict], counters: list[str]) -> None:
+    """Accumulate counter deltas into rollup rows, creating them on first touch."""
+    if rows:
+        await db.execute(upsert_increment_stmt(db.get_bind().dialect.name, model, keys, rows, counters))
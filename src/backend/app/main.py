@@ -1,6 +1,10 @@
 # src/backend/app/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from sqlalchemy import exc as sa_exc
 
 # Routers
 from app.api.routers.health import router as health_router
@@ -11,14 +15,50 @@ from app.api.routers.members import router as members_router
 from app.api.routers.analytics import router as analytics_router
 from app.api.routers.auth import router as auth_router
 from app.api.routers.demo import router as demo_router
+from app.api.routers.history import router as history_router
+from app.api.routers.search import router as search_router
+
+from app.core.config import settings
+from app.core.diagnostics import DiagnosticsMiddleware
+from app.core.metrics import MetricsMiddleware
+from app.core.security import password_hasher
+from app.db.pool import is_statement_timeout
+from app.services.broker import broker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await broker.start()
+    yield
+    await broker.stop()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
     title="SynergySphere API",
     version="0.1.0",
     description="Backend for SynergySphere Hackathon MVP",
+    lifespan=lifespan,
 )
 
+# fail fast instead of queueing behind a saturated pool or a runaway query
+def _db_busy(detail: str) -> JSONResponse:
+    return JSONResponse(
+        status_code=503,
+        content={"detail": detail},
+        headers={"Retry-After": str(settings.DB_RETRY_AFTER_SECONDS)},
+    )
+
+@app.exception_handler(sa_exc.TimeoutError)
+async def pool_timeout_handler(request: Request, exc: sa_exc.TimeoutError):
+    return _db_busy("Database is busy, retry shortly")
+
+@app.exception_handler(sa_exc.OperationalError)
+async def statement_timeout_handler(request: Request, exc: sa_exc.OperationalError):
+    if is_statement_timeout(exc):
+        return _db_busy("Query took too long, retry shortly")
+    raise exc
+
 # Allow CORS (open for hackathon; restrict later)
 app.add_middleware(
     CORSMiddleware,
@@ -26,8 +66,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Prev-Cursor", "ETag"],
 )
 
+if settings.DIAGNOSTICS_ENABLED:
+    app.add_middleware(DiagnosticsMiddleware)
+
+# outermost, so its timing covers CORS and everything below it
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Mount routers
 app.include_router(health_router)
 app.include_router(projects_router, prefix="/api/v1", tags=["projects"])
@@ -37,6 +85,8 @@ app.include_router(messages_router, prefix="/api/v1", tags=["messages"])
 app.include_router(members_router, prefix="/api/v1", tags=["members"])
 app.include_router(analytics_router, prefix="/api/v1", tags=["analytics"])
 app.include_router(demo_router, prefix="/api/v1", tags=["demo"])
+app.include_router(history_router, prefix="/api/v1", tags=["history"])
+app.include_router(search_router, prefix="/api/v1", tags=["search"])
 
 @app.get("/")
 def root():
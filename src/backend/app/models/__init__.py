@@ -1 +1 @@
-from . import user, project, membership, task, comment, thread, events  # noqa: F401
+from . import user, project, membership, task, comment, thread, events, stats  # noqa: F401
@@ -1,6 +1,6 @@
 import enum
-from datetime import datetime
-from sqlalchemy import DateTime, Enum, ForeignKey, String, text
+from datetime import date, datetime
+from sqlalchemy import JSON, BigInteger, Date, DateTime, Enum, ForeignKey, Index, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 from app.db.base import Base
 
@@ -10,14 +10,56 @@ class TaskEventType(str, enum.Enum):
     reassigned = "reassigned"
     completed = "completed"
     comment_added = "comment_added"
+    updated = "updated"
 
+# On Postgres task_events is partitioned by month of created_at (app/db/partitions.py), so its
+# primary key there is (id, created_at); months past retention live in archive files instead.
 class TaskEvent(Base):
     __tablename__ = "task_events"
     id: Mapped[int] = mapped_column(primary_key=True)
-    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"), index=True)
-    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), index=True)
+    task_id: Mapped[int] = mapped_column(ForeignKey("tasks.id", ondelete="CASCADE"))
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"))
     actor_id: Mapped[int | None] = mapped_column(ForeignKey("users.id", ondelete="SET NULL"))
     type: Mapped[TaskEventType] = mapped_column(Enum(TaskEventType), index=True)
     from_status: Mapped[str | None] = mapped_column(String(32))
     to_status: Mapped[str | None] = mapped_column(String(32))
+    # created: full task state; updated/reassigned: the fields that changed (new values)
+    data: Mapped[dict | None] = mapped_column(JSON)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+
+# replay tails: WHERE project_id|task_id = ? AND created_at > :taken_at ORDER BY id (months prune the range)
+Index("ix_task_events_project_id_id", TaskEvent.project_id, TaskEvent.id)
+Index("ix_task_events_task_id_id", TaskEvent.task_id, TaskEvent.id)
+
+class ProjectSnapshot(Base):
+    """Board state with every event created at or before `taken_at` applied; reads replay only later events."""
+    __tablename__ = "project_snapshots"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"))
+    last_event_id: Mapped[int]  # highest event id applied (0: none); for inspection, not for replay
+    taken_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))  # covers every event created at or before this
+    state: Mapped[dict] = mapped_column(JSON)  # {task_id: {field: value}}
+
+Index("ix_project_snapshots_project_taken", ProjectSnapshot.project_id, ProjectSnapshot.taken_at)
+
+class TaskEventArchive(Base):
+    """One archived month of task_events: a gzip JSONL file in EVENT_ARCHIVE_DIR (app/services/event_archive.py)."""
+    __tablename__ = "task_event_archives"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    month: Mapped[date] = mapped_column(Date, unique=True)  # first day, UTC
+    file_name: Mapped[str] = mapped_column(String(255))
+    rows: Mapped[int]
+    min_event_id: Mapped[int]
+    max_event_id: Mapped[int]
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
+
+class TaskEventArchiveChunk(Base):
+    """Where one project's events sit in an archive file: a gzip member at [offset, offset + length)."""
+    __tablename__ = "task_event_archive_chunks"
+    archive_id: Mapped[int] = mapped_column(ForeignKey("task_event_archives.id", ondelete="CASCADE"), primary_key=True)
+    project_id: Mapped[int] = mapped_column(primary_key=True, index=True)  # no FK: archives outlive projects
+    offset: Mapped[int] = mapped_column(BigInteger)
+    length: Mapped[int] = mapped_column(BigInteger)
+    rows: Mapped[int]
+    min_event_id: Mapped[int]
+    max_event_id: Mapped[int]
@@ -1,5 +1,5 @@
 import enum
-from sqlalchemy import ForeignKey, Enum, Boolean
+from sqlalchemy import ForeignKey, Enum, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
@@ -19,3 +19,6 @@ class ProjectMember(Base):
 
     project = relationship("Project", back_populates="members")
     user = relationship("User", back_populates="memberships")
+
+# "my projects": the PK leads with project_id, so look-ups by user need their own index
+Index("ix_project_members_user_project", ProjectMember.user_id, ProjectMember.project_id)
@@ -1,5 +1,5 @@
 from datetime import datetime, date
-from sqlalchemy import String, DateTime, Date, text
+from sqlalchemy import Boolean, String, DateTime, Date, false, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.db.base import Base
 
@@ -9,6 +9,10 @@ class Project(Base):
     name: Mapped[str] = mapped_column(String(200), index=True)
     description: Mapped[str | None] = mapped_column(String(1000))
     due_date: Mapped[date | None]
+    # templates are cloned, never worked in (app/services/templates.py)
+    is_template: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
+    # a template is listed to its own members, or to everyone when public (server-created, e.g. the demo)
+    template_public: Mapped[bool] = mapped_column(Boolean, default=False, server_default=false())
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
 
     members = relationship("ProjectMember", back_populates="project", cascade="all, delete-orphan")
@@ -0,0 +1,40 @@
+from datetime import date, datetime
+from sqlalchemy import Date, DateTime, ForeignKey, Integer, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+class ProjectStats(Base):
+    """Per-project counters kept in step with writes (see app/services/stats.py)."""
+    __tablename__ = "project_stats"
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    members_count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    tasks_total: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    tasks_done: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    # +1 on every write to the project's tasks, members or messages; list ETags derive from it
+    version: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"), onupdate=func.now())
+
+class LeaderboardDay(Base):
+    """Completed tasks credited to a member per UTC day (see app/services/leaderboard.py)."""
+    __tablename__ = "project_leaderboard_daily"
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    completed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+class FlowDay(Base):
+    """Tasks created, completed and reopened per project per UTC day (see app/services/analytics.py)."""
+    __tablename__ = "project_flow_daily"
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    created: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    completed: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    reopened: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+
+class CycleTimeDay(Base):
+    """Cycle-time histogram per project per UTC day; log-spaced buckets, merged by summing counts."""
+    __tablename__ = "project_cycle_time_daily"
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), primary_key=True)
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    bucket: Mapped[int] = mapped_column(Integer, primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
@@ -18,7 +18,7 @@ class TaskPriority(str, enum.Enum):
 class Task(Base):
     __tablename__ = "tasks"
     id: Mapped[int] = mapped_column(primary_key=True)
-    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"), index=True)
+    project_id: Mapped[int] = mapped_column(ForeignKey("projects.id", ondelete="CASCADE"))
     title: Mapped[str] = mapped_column(String(300), index=True)
     description: Mapped[str | None] = mapped_column(String(4000))
     status: Mapped[TaskStatus] = mapped_column(Enum(TaskStatus), default=TaskStatus.todo, index=True)
@@ -34,5 +34,9 @@ class Task(Base):
     assignee = relationship("User", foreign_keys=[assignee_id], back_populates="tasks_assigned")
     comments = relationship("TaskComment", back_populates="task", cascade="all, delete-orphan")
 
-Index("ix_tasks_project_status", Task.project_id, Task.status)
+# trailing id: keyset pages (ORDER BY id DESC) come straight off the index
+Index("ix_tasks_project_id_id", Task.project_id, Task.id)
+Index("ix_tasks_project_status", Task.project_id, Task.status, Task.id)
 Index("ix_tasks_assignee_status_due", Task.assignee_id, Task.status, Task.due_date)
+# overdue counts at read time (app/services/stats.py overdue_count)
+Index("ix_tasks_project_status_due", Task.project_id, Task.status, Task.due_date)
@@ -26,3 +26,6 @@ class ThreadMessage(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=text("now()"))
 
     thread = relationship("ProjectThread", back_populates="messages")
+
+# keyset paging / incremental polling: WHERE thread_id = ? AND (created_at, id) > (?, ?)
+Index("ix_thread_messages_thread_created_id", ThreadMessage.thread_id, ThreadMessage.created_at, ThreadMessage.id)
@@ -0,0 +1,94 @@
+"""
+task_events retention: keep partitions ahead, move old months to archive files.
+
+    python -m app.scripts.archive_events              # keep EVENT_HOT_MONTHS hot
+    python -m app.scripts.archive_events --dry-run
+    python -m app.scripts.archive_events --hot-months 12
+
+Schedule it daily (e.g. from cron). On a partitioned Postgres table it first
+creates the partitions for this month and the next three, then for each
+month before the hot window: writes EVENT_ARCHIVE_DIR/task_events_YYYY_MM.jsonl.gz,
+records it (and where each project's events start in the file) in
+task_event_archives / task_event_archive_chunks and drops the month's partition, in one
+transaction per month. Elsewhere (SQLite, or a month that only has rows in
+the default partition) the rows are deleted instead of the partition dropped.
+History and analytics repair keep reading archived months through
+app.services.event_archive.
+"""
+import argparse
+from datetime import datetime, timezone
+
+from sqlalchemy import func, insert, select
+
+from app.core.config import settings
+from app.db import partitions
+from app.db.session import engine
+from app.models.events import TaskEvent, TaskEventArchive, TaskEventArchiveChunk
+from app.services import event_archive
+
+AHEAD_MONTHS = 3
+
+
+def archive_month(month, dry_run: bool) -> int:
+    """Archive one month; returns the rows moved (or that would be)."""
+    lo, hi = partitions.month_bounds(month)
+    in_month = (TaskEvent.created_at >= lo, TaskEvent.created_at < hi)
+    with engine.begin() as conn:
+        if dry_run:
+            return conn.scalar(select(func.count()).select_from(TaskEvent).where(*in_month)) or 0
+        written = event_archive.write_month(conn, month)
+        if written is not None:
+            archive_id = conn.scalar(insert(TaskEventArchive).values(
+                month=month, file_name=written.file_name, rows=written.rows,
+                min_event_id=written.min_event_id, max_event_id=written.max_event_id,
+            ).returning(TaskEventArchive.id))
+            conn.execute(insert(TaskEventArchiveChunk), [{"archive_id": archive_id, **c} for c in written.chunks])
+        if partitions.is_partitioned(conn) and month in partitions.existing_months(conn):
+            partitions.drop_partition(conn, month)
+        elif written is not None:
+            conn.execute(TaskEvent.__table__.delete().where(*in_month))
+        return written.rows if written else 0
+
+
+def run(hot_months: int, dry_run: bool) -> None:
+    this_month = partitions.month_start(datetime.now(timezone.utc).date())
+    cutoff = partitions.add_months(this_month, -hot_months)
+
+    with engine.begin() as conn:
+        if partitions.is_partitioned(conn) and not dry_run:
+            created = partitions.ensure_partitions(conn, this_month, partitions.add_months(this_month, AHEAD_MONTHS))
+            for m in created:
+                print(f"  created {partitions.partition_name(m)}")
+        oldest = conn.scalar(select(func.min(TaskEvent.created_at)))
+        archived = set(conn.scalars(select(TaskEventArchive.month)))
+
+    if oldest is None:
+        print("No task events.")
+        return
+    month = partitions.month_start(oldest.astimezone(timezone.utc).date() if oldest.tzinfo else oldest.date())
+    total = 0
+    while month < cutoff:
+        if month in archived:
+            # rows for an archived month can only be stragglers inserted afterwards; leave them hot
+            print(f"  {month:%Y-%m}: already archived, skipped")
+        else:
+            n = archive_month(month, dry_run)
+            total += n
+            print(f"  {month:%Y-%m}: {n:,} events {'would be ' if dry_run else ''}archived")
+        month = partitions.add_months(month, 1)
+    print(f"Done: {total:,} events {'would be ' if dry_run else ''}archived (keeping {hot_months} months hot).")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Partition maintenance and archival for task_events.")
+    ap.add_argument("--hot-months", type=int, default=settings.EVENT_HOT_MONTHS,
+                    help="months (before the current one) kept in the table")
+    ap.add_argument("--dry-run", action="store_true", help="report what would be archived")
+    args = ap.parse_args()
+    if args.hot_months < 1:
+        ap.error("--hot-months must be >= 1")
+    run(args.hot_months, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
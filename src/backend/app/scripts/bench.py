@@ -0,0 +1,220 @@
+"""
+Endpoint benchmarks with latency percentiles and regression baselines.
+
+Boots app.main:app in-process (httpx over ASGI, lifespan included) against
+whatever DATABASE_URL points at, usually a database filled by
+app.scripts.seed. It logs in as a seeded user and drives each scenario in
+turn at the given concurrency:
+
+    python -m app.scripts.bench --requests 2000 --concurrency 50 --save bench/baseline.json
+    python -m app.scripts.bench --baseline bench/baseline.json --threshold 0.2
+
+Per scenario it reports p50/p95/p99 latency, throughput, errors and DB
+queries per request. Queries are counted with engine events, so scenarios
+run one after another and the count is the phase total divided by requests.
+With --baseline it exits 1 when a scenario's p95 or throughput is worse by
+more than --threshold, or when it issues more queries per request than
+before. Needs the `bench` extra (httpx).
+"""
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from itertools import count
+
+import httpx
+from sqlalchemy import event
+
+from app.db.session import async_engine, engine
+from app.main import app
+
+API = "/api/v1"
+SCENARIOS = ("projects", "tasks", "task_update", "messages", "leaderboard", "login")
+
+
+class QueryCounter:
+    """Statements executed on either engine since the last reset()."""
+
+    def __init__(self):
+        self.n = 0
+        for e in (engine, async_engine.sync_engine):
+            event.listen(e, "before_cursor_execute", self._hit)
+
+    def _hit(self, *args) -> None:
+        self.n += 1
+
+    def reset(self) -> int:
+        n, self.n = self.n, 0
+        return n
+
+
+def percentile(sorted_ms: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_ms:
+        return 0.0
+    k = max(0, min(len(sorted_ms) - 1, round(p / 100 * len(sorted_ms)) - 1))
+    return sorted_ms[k]
+
+
+class Bench:
+    def __init__(self, client: httpx.AsyncClient, email: str, password: str):
+        self.client = client
+        self.email = email
+        self.password = password
+        self.headers: dict[str, str] = {}
+        self.project_id = 0
+        self.task_id = 0
+        self._priorities = count()
+
+    async def login(self) -> httpx.Response:
+        return await self.client.post(f"{API}/auth/login", data={"username": self.email, "password": self.password})
+
+    async def setup(self) -> None:
+        r = await self.login()
+        r.raise_for_status()
+        self.headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        r = await self.client.get(f"{API}/projects", headers=self.headers)
+        r.raise_for_status()
+        projects = r.json()
+        if not projects:
+            sys.exit(f"{self.email} is not in any project; seed the database first")
+        # the busiest project is the interesting one
+        self.project_id = max(projects, key=lambda p: p["totalTasks"])["id"]
+        r = await self.client.get(f"{API}/tasks/by-project/{self.project_id}", params={"limit": 1}, headers=self.headers)
+        r.raise_for_status()
+        tasks = r.json()
+        self.task_id = tasks[0]["id"] if tasks else 0
+
+    def request(self, scenario: str):
+        c, h, pid = self.client, self.headers, self.project_id
+        if scenario == "projects":
+            return c.get(f"{API}/projects", headers=h)
+        if scenario == "tasks":
+            return c.get(f"{API}/tasks/by-project/{pid}", params={"limit": 100}, headers=h)
+        if scenario == "task_update":
+            priority = ("low", "medium", "high")[next(self._priorities) % 3]
+            return c.patch(f"{API}/tasks/{self.task_id}", json={"priority": priority}, headers=h)
+        if scenario == "messages":
+            return c.get(f"{API}/projects/{pid}/messages", params={"limit": 50}, headers=h)
+        if scenario == "leaderboard":
+            return c.get(f"{API}/analytics/leaderboard/{pid}", params={"window": "30d"}, headers=h)
+        if scenario == "login":
+            return self.login()
+        raise ValueError(scenario)
+
+    async def run(self, scenario: str, requests: int, concurrency: int, queries: QueryCounter) -> dict:
+        gate = asyncio.Semaphore(concurrency)
+        latencies: list[float] = []
+        errors = 0
+
+        async def one():
+            nonlocal errors
+            async with gate:
+                t0 = time.perf_counter()
+                r = await self.request(scenario)
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if r.status_code >= 400:
+                    errors += 1
+
+        queries.reset()
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        return {
+            "requests": requests,
+            "errors": errors,
+            "throughput_rps": round(requests / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "queries_per_request": round(queries.reset() / requests, 2),
+        }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Human-readable regressions of `results` against `baseline`."""
+    problems = []
+    for name, now in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        if now["p95_ms"] > before["p95_ms"] * (1 + threshold):
+            problems.append(f"{name}: p95 {before['p95_ms']}ms -> {now['p95_ms']}ms")
+        if now["throughput_rps"] < before["throughput_rps"] * (1 - threshold):
+            problems.append(f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} req/s")
+        if now["queries_per_request"] > before["queries_per_request"] + 0.01:
+            problems.append(f"{name}: queries/request {before['queries_per_request']} -> {now['queries_per_request']}")
+        if now["errors"] > before["errors"]:
+            problems.append(f"{name}: errors {before['errors']} -> {now['errors']}")
+    return problems
+
+
+async def bench(args) -> dict:
+    queries = QueryCounter()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            b = Bench(client, args.email, args.password)
+            await b.setup()
+            results = {}
+            for name in args.scenarios:
+                if name == "task_update" and not b.task_id:
+                    continue
+                await b.run(name, args.warmup, args.concurrency, queries)  # pools, caches, JIT-ish paths
+                # bcrypt bounds login; a full-size run would only measure the hasher queue
+                n = max(1, args.requests // 10) if name == "login" else args.requests
+                results[name] = await b.run(name, n, args.concurrency, queries)
+                r = results[name]
+                print(f"{name:<12} p50 {r['p50_ms']:>8.2f}ms  p95 {r['p95_ms']:>8.2f}ms  p99 {r['p99_ms']:>8.2f}ms  "
+                      f"{r['throughput_rps']:>8.1f} req/s  {r['queries_per_request']:>5.2f} q/req  {r['errors']} err")
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--email", default="user1@example.com", help="seeded user to log in as")
+    ap.add_argument("--password", default="password")
+    ap.add_argument("--requests", type=int, default=1000, help="per scenario (login runs a tenth)")
+    ap.add_argument("--concurrency", type=int, default=50)
+    ap.add_argument("--warmup", type=int, default=50)
+    ap.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    ap.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    ap.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline; exit 1 on regression")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    args = ap.parse_args()
+
+    results = asyncio.run(bench(args))
+
+    if args.save:
+        doc = {
+            "meta": {
+                "taken_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "dialect": engine.dialect.name,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+            },
+            "results": results,
+        }
+        with open(args.save, "w") as f:
+            json.dump(doc, f, indent=2)
+        print(f"Saved baseline to {args.save}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        problems = compare(results, baseline, args.threshold)
+        if problems:
+            print("Regressions:")
+            for p in problems:
+                print(f"  {p}")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (threshold {args.threshold:.0%}).")
+
+
+if __name__ == "__main__":
+    main()
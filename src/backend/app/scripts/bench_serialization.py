@@ -0,0 +1,82 @@
+"""
+Per-row cost of the list_tasks response: model path vs FAST_JSON path.
+
+No database involved; it serializes synthetic rows shaped like the list
+query's result, the same way each path does:
+
+- model: TaskOut per row, then FastAPI's response_model pass (validate the
+  list again, dump to JSON-safe Python) and the stdlib JSON encoder
+- fast:  the same dicts straight to app.api.fastjson.dumps (orjson when
+  installed)
+
+    python -m app.scripts.bench_serialization --rows 100 500 5000
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from app.api import fastjson
+from app.api.routers.tasks import TaskOut, task_dict
+from app.models.task import TaskPriority, TaskStatus
+
+
+def _rows(n: int) -> list:
+    now = datetime.now(timezone.utc)
+    statuses, priorities = list(TaskStatus), list(TaskPriority)
+    return [
+        SimpleNamespace(
+            id=i, title=f"Task {i} with a realistic title", description="Some description " * 4,
+            status=statuses[i % 3], priority=priorities[i % 3],
+            due_date=date.today() + timedelta(days=i % 30), created_at=now - timedelta(minutes=i),
+            attachments_count=i % 4,
+            assignee_name=f"User {i % 17}", assignee_email=f"user{i % 17}@example.com",
+            assignee_avatar="https://i.pravatar.cc/100?img=3",
+        )
+        for i in range(n)
+    ]
+
+
+def model_path(rows, adapter: TypeAdapter) -> bytes:
+    models = [TaskOut(**task_dict(r, r.assignee_name, r.assignee_email, r.assignee_avatar, 2)) for r in rows]
+    # what FastAPI does with a response_model: validate, dump to JSON-safe python, encode
+    validated = adapter.validate_python(models)
+    return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+
+
+def fast_path(rows) -> bytes:
+    return fastjson.dumps([task_dict(r, r.assignee_name, r.assignee_email, r.assignee_avatar, 2) for r in rows])
+
+
+def _per_row_us(fn, rows, repeat: int) -> float:
+    fn(rows)  # warm up
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(rows) * 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--rows", type=int, nargs="+", default=[100, 500, 5000])
+    ap.add_argument("--repeat", type=int, default=20, help="best of N")
+    args = ap.parse_args()
+
+    adapter = TypeAdapter(list[TaskOut])
+    encoder = "orjson" if fastjson.orjson is not None else "stdlib json (install the `fast` extra for orjson)"
+    print(f"fast path encoder: {encoder}")
+    print(f"{'rows':>6}  {'model µs/row':>13}  {'fast µs/row':>12}  {'speed-up':>8}")
+    for n in args.rows:
+        rows = _rows(n)
+        before = _per_row_us(lambda r: model_path(r, adapter), rows, args.repeat)
+        after = _per_row_us(fast_path, rows, args.repeat)
+        print(f"{n:>6}  {before:>13.2f}  {after:>12.2f}  {before / after:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
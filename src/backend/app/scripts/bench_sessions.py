@@ -0,0 +1,78 @@
+"""
+Sync vs async session throughput on the same dataset.
+
+Runs the `list_tasks` query shape against one project, first through the sync
+SessionLocal on a bounded thread pool (what sync `def` handlers get from
+Starlette, 40 threads by default), then through AsyncSessionLocal on a single
+event loop.
+
+    python -m app.scripts.bench_sessions --project-id 1 --requests 2000 --concurrency 200
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal, AsyncSessionLocal, async_engine, engine
+from app.models.task import Task
+from app.models.user import User
+
+
+def _stmt(project_id: int):
+    return (
+        select(Task, User)
+        .join(User, User.id == Task.assignee_id, isouter=True)
+        .where(Task.project_id == project_id)
+        .order_by(Task.id.desc())
+    )
+
+
+def run_sync(project_id: int, requests: int, threads: int) -> float:
+    def one(_):
+        with SessionLocal() as db:
+            db.execute(_stmt(project_id)).all()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(requests)))
+    return time.perf_counter() - started
+
+
+async def run_async(project_id: int, requests: int, concurrency: int) -> float:
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with gate, AsyncSessionLocal() as db:
+            (await db.execute(_stmt(project_id))).all()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    await async_engine.dispose()
+    return elapsed
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--project-id", type=int, default=1)
+    ap.add_argument("--requests", type=int, default=1000)
+    ap.add_argument("--threads", type=int, default=40, help="sync pool size (Starlette default: 40)")
+    ap.add_argument("--concurrency", type=int, default=200, help="in-flight async requests")
+    args = ap.parse_args()
+
+    # warm both pools so connection setup is not measured
+    run_sync(args.project_id, args.threads, args.threads)
+    asyncio.run(run_async(args.project_id, args.concurrency, args.concurrency))
+
+    sync_s = run_sync(args.project_id, args.requests, args.threads)
+    async_s = asyncio.run(run_async(args.project_id, args.requests, args.concurrency))
+    engine.dispose()
+
+    print(f"sync  ({args.threads} threads):     {args.requests / sync_s:8.1f} req/s  ({sync_s:.2f}s)")
+    print(f"async ({args.concurrency} in flight): {args.requests / async_s:8.1f} req/s  ({async_s:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Rebuild derived tables from their source rows.
+
+    python -m app.scripts.repair stats                  # every project
+    python -m app.scripts.repair stats --project 12 40  # just these
+    python -m app.scripts.repair leaderboard            # from hot task_events; archived days are kept
+    python -m app.scripts.repair analytics              # flow + cycle-time rollups (reads archives too)
+
+Overdue counts are computed when read, so nothing here needs a daily run.
+"""
+import argparse
+
+from app.db.session import SessionLocal
+from app.services import analytics, event_archive, leaderboard, stats
+
+
+def _run(stmts: list) -> None:
+    with SessionLocal() as db:
+        for stmt in stmts:
+            db.execute(stmt)
+        db.commit()
+
+
+def repair_stats(project_ids: list[int] | None) -> None:
+    _run(stats.recompute_stmts(project_ids))
+
+
+def repair_leaderboard(project_ids: list[int] | None) -> None:
+    with SessionLocal() as db:
+        since = event_archive.hot_since(db)
+    _run(leaderboard.rebuild_stmts(project_ids, since))
+
+
+def repair_analytics(project_ids: list[int] | None) -> None:
+    with SessionLocal() as db:
+        analytics.rebuild(db, project_ids)
+        db.commit()
+
+
+TARGETS = {
+    "stats": repair_stats,
+    "leaderboard": repair_leaderboard,
+    "analytics": repair_analytics,
+}
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild derived tables from their source rows.")
+    ap.add_argument("target", choices=sorted(TARGETS))
+    ap.add_argument("--project", type=int, nargs="+", dest="project_ids", help="limit to these project ids")
+    args = ap.parse_args()
+    print(f"Repairing {args.target}…")
+    TARGETS[args.target](args.project_ids)
+    print("Repair complete.")
+
+
+if __name__ == "__main__":
+    main()
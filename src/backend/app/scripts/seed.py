@@ -1,89 +1,311 @@
+"""
+Deterministic synthetic data for demos and capacity planning.
+
+    python -m app.scripts.seed                                     # small demo set
+    python -m app.scripts.seed --users 50000 --projects 20000 --tasks 10000000
+
+The same --seed and --anchor on an empty database give the same rows, so a
+perf problem seen on one machine can be rebuilt on another. Project sizes
+are heavy-tailed (most projects are small, a few are huge), users join
+projects by popularity, older tasks are more likely to be done, and every
+task carries the events its status implies, so history, stats, the
+leaderboard and the analytics rollups have real input.
+
+Rows go in with COPY on Postgres and batched executemany elsewhere, in one
+transaction. Ids are assigned here (continuing from the current maximum),
+and the Postgres sequences are moved past them at the end.
+"""
+import argparse
+import enum
+import json
+import math
 import random
-from datetime import date, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, func, select, text
+
 from app.core.config import settings
-from app.db.base import Base
-from app.models.user import User
-from app.models.project import Project
-from app.models.membership import ProjectMember, ProjectRole
-from app.models.task import Task, TaskStatus, TaskPriority
+from app.core.security import hash_password
+from app.db import partitions
 from app.models.comment import TaskComment
-from app.models.thread import ProjectThread, ThreadMessage
 from app.models.events import TaskEvent, TaskEventType
+from app.models.membership import ProjectMember, ProjectRole
+from app.models.project import Project
+from app.models.task import Task, TaskPriority, TaskStatus
+from app.models.thread import ProjectThread, ThreadMessage
+from app.models.user import User
+from app.services import analytics
+from app.services.leaderboard import rebuild_stmts
+from app.services.stats import recompute_stmts
 
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 
-def run():
-    print("Seeding database…")
-    with Session(engine) as db:
-        # Users
-        alice = User(name="Alice Patel", email="alice@example.com", avatar_url="https://i.pravatar.cc/100?img=1")
-        bob   = User(name="Bob Singh",   email="bob@example.com",   avatar_url="https://i.pravatar.cc/100?img=2")
-        cara  = User(name="Cara Rao",    email="cara@example.com",  avatar_url="https://i.pravatar.cc/100?img=3")
-        db.add_all([alice, bob, cara]); db.flush()
-
-        # Project
-        proj = Project(name="SynergySphere MVP", description="Hackathon project", due_date=date.today()+timedelta(days=14))
-        db.add(proj); db.flush()
-
-        # Memberships
-        db.add_all([
-            ProjectMember(project_id=proj.id, user_id=alice.id, role=ProjectRole.owner),
-            ProjectMember(project_id=proj.id, user_id=bob.id,   role=ProjectRole.member),
-            ProjectMember(project_id=proj.id, user_id=cara.id,  role=ProjectRole.member),
+SEED_PASSWORD = "password"
+EXECUTEMANY_BATCH = 10_000
+ID_CHUNK = 1_000  # project ids per repair statement (keeps IN lists small for SQLite)
+
+FIRST = ["Alice", "Bob", "Cara", "Dev", "Esha", "Farid", "Gita", "Hugo", "Isha", "Jon",
+         "Kavya", "Leo", "Maya", "Nikhil", "Olga", "Priya", "Quinn", "Ravi", "Sara", "Tom"]
+LAST = ["Patel", "Singh", "Rao", "Iyer", "Khan", "Smith", "Garcia", "Chen", "Müller", "Das"]
+VERBS = ["Design", "Implement", "Fix", "Review", "Refactor", "Document", "Test", "Deploy", "Plan", "Migrate"]
+NOUNS = ["login screen", "project list API", "task board", "notifications", "search", "billing page",
+         "onboarding flow", "settings panel", "CI pipeline", "analytics dashboard", "mobile layout"]
+COMMENTS = ["Looks good, starting now.", "Blocked on review.", "Pushed a first pass.",
+            "Can we split this?", "Done on my side.", "Needs a test.", "Moving to next sprint."]
+MESSAGES = ["Morning all!", "Standup in 5.", "I'll take the API tasks.", "I'm on the UI.",
+            "Deploy is green.", "Who owns the flaky test?", "Retro notes are up."]
+
+TASK_COLS = ("id", "project_id", "title", "description", "status", "priority", "due_date",
+             "assignee_id", "created_by_id", "attachments_count", "created_at", "updated_at")
+EVENT_COLS = ("id", "task_id", "project_id", "actor_id", "type", "from_status", "to_status", "data", "created_at")
+COMMENT_COLS = ("id", "task_id", "author_id", "body", "created_at")
+MESSAGE_COLS = ("id", "thread_id", "author_id", "parent_message_id", "body", "created_at")
+
+
+def _copy_value(v):
+    if isinstance(v, enum.Enum):
+        return v.value
+    if isinstance(v, dict):
+        return json.dumps(v, separators=(",", ":"))
+    return v
+
+
+class Sink:
+    """Bulk row writer on one connection: COPY on Postgres, executemany elsewhere."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.use_copy = conn.dialect.name == "postgresql"
+        self.counts: dict[str, int] = {}
+
+    def write(self, model, columns: tuple[str, ...], rows: list[tuple]) -> None:
+        if not rows:
+            return
+        table = model.__table__
+        if self.use_copy:
+            raw = self.conn.connection.driver_connection  # psycopg, same transaction
+            with raw.cursor() as cur:
+                with cur.copy(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN") as cp:
+                    for row in rows:
+                        cp.write_row([_copy_value(v) for v in row])
+        else:
+            for i in range(0, len(rows), EXECUTEMANY_BATCH):
+                self.conn.execute(table.insert(), [dict(zip(columns, r)) for r in rows[i:i + EXECUTEMANY_BATCH]])
+        self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+
+
+def allocate(total: int, weights: list[float]) -> list[int]:
+    """Split `total` proportionally to `weights` (the remainder goes round-robin)."""
+    s = sum(weights)
+    out = [int(total * w / s) for w in weights]
+    for i in range(total - sum(out)):
+        out[i % len(out)] += 1
+    return out
+
+
+class Generator:
+    def __init__(self, args, sink: Sink):
+        self.args = args
+        self.sink = sink
+        self.rng = random.Random(args.seed)
+        self.anchor = datetime(args.anchor.year, args.anchor.month, args.anchor.day, 12, tzinfo=timezone.utc)
+        self.start = self.anchor - timedelta(days=args.days)
+        conn = sink.conn
+        self.next_id = {
+            m: (conn.scalar(select(func.coalesce(func.max(m.id), 0))) or 0) + 1
+            for m in (User, Project, ProjectThread, Task, TaskEvent, TaskComment, ThreadMessage)
+        }
+        self.tasks: list[tuple] = []
+        self.events: list[tuple] = []
+        self.comments: list[tuple] = []
+        self.messages: list[tuple] = []
+
+    def ids(self, model, n: int) -> range:
+        first = self.next_id[model]
+        self.next_id[model] = first + n
+        return range(first, first + n)
+
+    def between(self, a: datetime, b: datetime) -> datetime:
+        return a + (b - a) * self.rng.random()
+
+    # ---------- fixed-size tables ----------
+
+    def users(self) -> list[int]:
+        rng = self.rng
+        pw = hash_password(SEED_PASSWORD)  # one hash for everyone; bcrypt per row would dominate
+        ids = self.ids(User, self.args.users)
+        self.sink.write(User, ("id", "email", "name", "avatar_url", "hashed_password", "is_active", "created_at"), [
+            (uid, f"user{uid}@example.com", f"{rng.choice(FIRST)} {rng.choice(LAST)}",
+             f"https://i.pravatar.cc/100?img={uid % 70 + 1}", pw, True,
+             self.start - timedelta(days=rng.randint(0, 365)))
+            for uid in ids
         ])
+        return list(ids)
+
+    def projects(self, user_ids: list[int]) -> list[tuple[int, int, list[int], datetime, int]]:
+        """(project_id, thread_id, member ids, created_at, task count) for each new project."""
+        rng, n = self.rng, self.args.projects
+        sizes = allocate(self.args.tasks, [rng.paretovariate(1.16) for _ in range(n)])
+
+        # membership popularity: a few users are in many projects
+        popular = user_ids[:]
+        rng.shuffle(popular)
+        cum, acc = [], 0.0
+        for rank in range(len(popular)):
+            acc += 1 / (rank + 1) ** 0.6
+            cum.append(acc)
 
-        # Tasks
-        titles = [
-            "Design login screen",
-            "Implement project list API",
-            "Task board drag-n-drop",
-            "Threaded messages UI",
-            "Basic notifications",
-            "Deploy to Vercel/Render",
-        ]
-        assignees = [alice, bob, cara]
-        tasks = []
-        for i, title in enumerate(titles, start=1):
-            assignee = random.choice(assignees)
-            status = random.choice([TaskStatus.todo, TaskStatus.in_progress, TaskStatus.done])
-            t = Task(
-                project_id=proj.id,
-                title=title,
-                description=f"{title} description…",
-                status=status,
-                priority=random.choice([TaskPriority.low, TaskPriority.medium, TaskPriority.high]),
-                due_date=date.today() + timedelta(days=random.randint(1, 10)),
-                assignee_id=assignee.id,
-                created_by_id=alice.id,
-                attachments_count=random.randint(0, 3),
-            )
-            db.add(t); db.flush()
-            tasks.append(t)
-            # events
-            db.add(TaskEvent(task_id=t.id, project_id=proj.id, actor_id=alice.id, type=TaskEventType.created))
+        out, project_rows, member_rows, thread_rows = [], [], [], []
+        pids, tids = self.ids(Project, n), self.ids(ProjectThread, n)
+        for pid, tid, size in zip(pids, tids, sizes):
+            want = int(2 + rng.lognormvariate(0, 0.5) * math.sqrt(size) / 2)
+            want = max(1, min(want, 200, len(user_ids)))
+            if want * 4 >= len(user_ids):
+                members = rng.sample(user_ids, want)
+            else:
+                members, seen = [], set()
+                while len(members) < want:
+                    u = rng.choices(popular, cum_weights=cum)[0]
+                    if u not in seen:
+                        seen.add(u)
+                        members.append(u)
+            created = self.between(self.start, self.start + (self.anchor - self.start) / 4)
+            project_rows.append((pid, f"{rng.choice(NOUNS).capitalize()} {pid}", "Generated project",
+                                 (self.anchor + timedelta(days=rng.randint(-30, 90))).date(), created))
+            for j, uid in enumerate(members):
+                r = rng.random()
+                role = ProjectRole.owner if j == 0 else ProjectRole.admin if r < 0.1 else ProjectRole.viewer if r < 0.15 else ProjectRole.member
+                member_rows.append((pid, uid, role, True, True))
+            thread_rows.append((tid, pid, "General", members[0], created))
+            out.append((pid, tid, members, created, size))
+
+        self.sink.write(Project, ("id", "name", "description", "due_date", "created_at"), project_rows)
+        self.sink.write(ProjectMember, ("project_id", "user_id", "role", "notify_mentions", "notify_due_soon"), member_rows)
+        self.sink.write(ProjectThread, ("id", "project_id", "title", "created_by_id", "created_at"), thread_rows)
+        return out
+
+    # ---------- per-project rows, flushed in batches ----------
+
+    def project_body(self, pid: int, tid: int, members: list[int], created: datetime, size: int) -> None:
+        rng, anchor = self.rng, self.anchor
+        span = (anchor - created).total_seconds() or 1.0
+        for task_id in self.ids(Task, size):
+            t0 = self.between(created, anchor)
+            age = (anchor - t0).total_seconds() / span  # 1.0 = as old as the project
+            r = rng.random()
+            status = TaskStatus.done if r < 0.15 + 0.6 * age else TaskStatus.in_progress if r < 0.4 + 0.5 * age else TaskStatus.todo
+            priority = rng.choices((TaskPriority.low, TaskPriority.medium, TaskPriority.high), (3, 5, 2))[0]
+            due = (t0 + timedelta(days=rng.randint(1, 45))).date() if rng.random() < 0.8 else None
+            assignee = rng.choice(members) if rng.random() < 0.85 else None
+            creator = rng.choice(members)
+            title = f"{rng.choice(VERBS)} {rng.choice(NOUNS)} #{task_id}"
+            desc = f"{title} description"
+
+            state = {"title": title, "description": desc, "status": "todo", "priority": priority.value,
+                     "due_date": due.isoformat() if due else None, "assignee_id": assignee}
+            events = [(TaskEventType.created, creator, None, None, state, t0)]
+            last = t0
             if status != TaskStatus.todo:
-                db.add(TaskEvent(task_id=t.id, project_id=proj.id, actor_id=assignee.id,
-                                 type=TaskEventType.status_changed, from_status="todo", to_status=status.value))
+                last = self.between(t0, anchor)
+                events.append((TaskEventType.status_changed, assignee or creator, "todo", "in_progress", None, last))
             if status == TaskStatus.done:
-                db.add(TaskEvent(task_id=t.id, project_id=proj.id, actor_id=assignee.id, type=TaskEventType.completed))
-
-            # comment
-            db.add(TaskComment(task_id=t.id, author_id=assignee.id, body="Looks good, starting now."))
-
-        # Thread + messages
-        thr = ProjectThread(project_id=proj.id, title="General")
-        db.add(thr); db.flush()
-        db.add_all([
-            ThreadMessage(thread_id=thr.id, author_id=alice.id, body="Welcome to the project!"),
-            ThreadMessage(thread_id=thr.id, author_id=bob.id, body="I’ll take the API tasks."),
-            ThreadMessage(thread_id=thr.id, author_id=cara.id, body="I’m on the UI."),
-        ])
+                last = self.between(last, anchor)
+                actor = assignee or creator
+                events.append((TaskEventType.status_changed, actor, "in_progress", "done", None, last))
+                events.append((TaskEventType.completed, actor, None, None, None, last))
+            for eid, (etype, actor, frm, to, data, at) in zip(self.ids(TaskEvent, len(events)), events):
+                self.events.append((eid, task_id, pid, actor, etype, frm, to, data, at))
+
+            self.tasks.append((task_id, pid, title, desc, status, priority, due, assignee, creator,
+                               0 if rng.random() < 0.8 else rng.randint(1, 4), t0, last))
+
+            n_comments = int(rng.expovariate(1 / self.args.comments_per_task)) if self.args.comments_per_task else 0
+            for cid in self.ids(TaskComment, n_comments):
+                self.comments.append((cid, task_id, rng.choice(members), rng.choice(COMMENTS), self.between(t0, anchor)))
+
+        n_messages = int(len(members) * self.args.messages_per_member * rng.uniform(0.5, 1.5))
+        stamps = sorted(self.between(created, anchor) for _ in range(n_messages))
+        mids = list(self.ids(ThreadMessage, n_messages))
+        for k, (mid, at) in enumerate(zip(mids, stamps)):
+            parent = mids[rng.randrange(k)] if k and rng.random() < 0.15 else None
+            self.messages.append((mid, tid, rng.choice(members), parent, rng.choice(MESSAGES), at))
+
+    def flush(self) -> None:
+        # FK order: tasks before their events and comments
+        self.sink.write(Task, TASK_COLS, self.tasks)
+        self.sink.write(TaskEvent, EVENT_COLS, self.events)
+        self.sink.write(TaskComment, COMMENT_COLS, self.comments)
+        self.sink.write(ThreadMessage, MESSAGE_COLS, self.messages)
+        self.tasks, self.events, self.comments, self.messages = [], [], [], []
+
+
+def _bump_sequences(conn) -> None:
+    if conn.dialect.name != "postgresql":
+        return  # SQLite's rowid allocation already continues from max(id)
+    for model in (User, Project, ProjectThread, Task, TaskEvent, TaskComment, ThreadMessage):
+        name = model.__table__.name
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), (SELECT max(id) FROM {name}))"
+        ))
+
+
+def run(args) -> None:
+    print(f"Seeding database (seed={args.seed}, anchor={args.anchor})…")
+    t_start = time.perf_counter()
+    with engine.begin() as conn:
+        sink = Sink(conn)
+        gen = Generator(args, sink)
+        if partitions.is_partitioned(conn):
+            partitions.ensure_partitions(conn, gen.start.date(), gen.anchor.date())
+        user_ids = gen.users()
+        projects = gen.projects(user_ids)
+
+        done = 0
+        for pid, tid, members, created, size in projects:
+            gen.project_body(pid, tid, members, created, size)
+            if len(gen.tasks) >= args.batch:
+                done += len(gen.tasks)
+                gen.flush()
+                elapsed = time.perf_counter() - t_start
+                print(f"  {done:,}/{args.tasks:,} tasks ({done / elapsed:,.0f}/s)")
+        gen.flush()
+
+        _bump_sequences(conn)
+        project_ids = [p[0] for p in projects]
+        for i in range(0, len(project_ids), ID_CHUNK):
+            chunk = project_ids[i:i + ID_CHUNK]
+            for stmt in [*recompute_stmts(chunk), *rebuild_stmts(chunk)]:
+                conn.execute(stmt)
+            analytics.rebuild(conn, chunk)
+
+    elapsed = time.perf_counter() - t_start
+    print("Seed complete in %.1fs:" % elapsed)
+    for table, n in sink.counts.items():
+        print(f"  {table:<20} {n:>12,}")
+    if user_ids:
+        print(f"Log in as user{user_ids[0]}@example.com / {SEED_PASSWORD}")
+    if projects:
+        print(f"Project ids: {projects[0][0]}–{projects[-1][0]}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Generate deterministic synthetic data.")
+    ap.add_argument("--users", type=int, default=30)
+    ap.add_argument("--projects", type=int, default=5)
+    ap.add_argument("--tasks", type=int, default=300, help="total across all projects")
+    ap.add_argument("--comments-per-task", type=float, default=1.5, help="mean (exponential)")
+    ap.add_argument("--messages-per-member", type=float, default=5.0, help="mean General-thread messages per member")
+    ap.add_argument("--days", type=int, default=180, help="history length before the anchor date")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--anchor", type=date.fromisoformat, default=date.today(),
+                    help="'today' of the dataset (YYYY-MM-DD); pin it for identical output across days")
+    ap.add_argument("--batch", type=int, default=50_000, help="tasks generated per write batch")
+    args = ap.parse_args()
+    if args.users < 1 or args.projects < 1 or args.tasks < 0:
+        ap.error("--users and --projects must be >= 1 and --tasks >= 0")
+    run(args)
 
-        db.commit()
-        print("Seed complete.")
-        print(f"Project id: {proj.id}")
 
 if __name__ == "__main__":
-    run()
+    main()
@@ -0,0 +1,96 @@
+"""
+Take history snapshots for projects whose replay tail has grown.
+
+    python -m app.scripts.snapshot_history                 # every project
+    python -m app.scripts.snapshot_history --project 3 7
+
+Schedule it (e.g. hourly). A point-in-time read then replays at most one
+interval's worth of events on top of the nearest snapshot. This job is the
+only writer of project_snapshots; history reads never write.
+
+A snapshot covers every event created at or before its taken_at, so
+taken_at must be a time after which no older event can still commit: it is
+HISTORY_SNAPSHOT_SETTLE_SECONDS behind the database clock, and on Postgres
+also just before the oldest open transaction (an event's created_at is its
+transaction's start).
+"""
+import argparse
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.pool import long_running
+from app.db.session import AsyncSessionLocal, async_engine
+from app.models.events import ProjectSnapshot, TaskEvent
+from app.models.project import Project
+from app.services.event_archive import stream_events
+from app.services.history import apply_event, base_snapshot
+
+OPEN_SINCE = text(
+    "SELECT now(), min(xact_start) FROM pg_stat_activity "
+    "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+)
+
+
+async def settled_until(db: AsyncSession) -> datetime:
+    """Latest time whose events are all committed."""
+    margin = timedelta(seconds=settings.HISTORY_SNAPSHOT_SETTLE_SECONDS)
+    if db.bind.dialect.name != "postgresql":
+        return datetime.now(timezone.utc) - margin
+    now, oldest = (await db.execute(OPEN_SINCE)).one()
+    if oldest is not None and oldest - timedelta(microseconds=1) < now - margin:
+        return oldest - timedelta(microseconds=1)  # timestamptz is microsecond precision
+    return now - margin
+
+
+async def snapshot_project(project_id: int, min_tail: int, until: datetime) -> bool:
+    async with AsyncSessionLocal() as db:
+        snap = await base_snapshot(db, project_id)
+        since = snap.taken_at if snap else None
+        if since is not None and since >= until:
+            return False
+        tail = select(func.count()).select_from(TaskEvent).where(
+            TaskEvent.project_id == project_id, TaskEvent.created_at <= until
+        )
+        if since is not None:
+            tail = tail.where(TaskEvent.created_at > since)
+        n = await db.scalar(tail)
+        if not n or n < min_tail:
+            return False
+
+        board = {k: dict(v) for k, v in (snap.state if snap else {}).items()}
+        last_id = snap.last_event_id if snap else 0
+        async for e in stream_events(db, project_id=project_id, since=since, until=until):
+            apply_event(board, e)
+            last_id = max(last_id, e.id)
+        db.add(ProjectSnapshot(project_id=project_id, last_event_id=last_id, taken_at=until, state=board))
+        await db.commit()
+        return True
+
+
+async def run(project_ids: list[int] | None, min_tail: int):
+    long_running()
+    async with AsyncSessionLocal() as db:
+        ids = project_ids or list(await db.scalars(select(Project.id).order_by(Project.id)))
+        until = await settled_until(db)
+    taken = 0
+    for pid in ids:
+        taken += await snapshot_project(pid, min_tail, until)
+    await async_engine.dispose()
+    print(f"{datetime.now(timezone.utc):%Y-%m-%d %H:%M} snapshots taken: {taken}/{len(ids)}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Take history snapshots for projects with long replay tails.")
+    ap.add_argument("--project", type=int, nargs="+", dest="project_ids")
+    ap.add_argument("--min-tail", type=int, default=max(1, settings.HISTORY_SNAPSHOT_EVERY // 4),
+                    help="only snapshot projects with at least this many new events")
+    args = ap.parse_args()
+    asyncio.run(run(args.project_ids, args.min_tail))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# app/services/analytics.py
+"""
+Burndown, velocity and cycle-time rollups.
+
+Task write paths add to two daily tables in the same transaction as their
+events, with the same upsert-increment the leaderboard uses:
+
+- project_flow_daily: tasks created, completed and reopened per UTC day.
+  Burndown is a running sum of created - completed + reopened; velocity
+  sums completed - reopened per ISO week.
+- project_cycle_time_daily: a histogram of cycle times per day. A task's
+  cycle runs from its latest move to in_progress (its creation when it never
+  had one) to its completion. Buckets are log-spaced with ratio GAMMA, so any
+  percentile read back is within ALPHA of the true value, and days merge by
+  summing counts: a year-long range is a GROUP BY over at most
+  buckets x days rows, without touching task_events.
+
+Reopening keeps the finished cycle in the histogram and counts a reopen in
+the flow table. `python -m app.scripts.repair analytics` rebuilds both
+tables from tasks and task_events (archive files included) with the same
+rules. Cycle starts on the write path read hot rows first and fall back to
+the archived months of the task's project.
+"""
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.upsert import upsert_increment
+from app.models.events import TaskEvent, TaskEventType
+from app.models.stats import CycleTimeDay, FlowDay
+from app.models.task import Task, TaskStatus
+from app.services.event_archive import iter_events, latest_archived
+from app.services.leaderboard import utc_day
+
+ALPHA = 0.02                       # relative error of a percentile
+GAMMA = (1 + ALPHA) / (1 - ALPHA)
+_LOG_GAMMA = math.log(GAMMA)
+QUANTILES = (0.5, 0.75, 0.9, 0.95)
+
+# (project_id, day) -> [created, completed, reopened]
+Flow = dict[tuple[int, date], list[int]]
+# (project_id, day, bucket) -> count
+Cycles = dict[tuple[int, date, int], int]
+
+
+def new_flow() -> Flow:
+    return defaultdict(lambda: [0, 0, 0])
+
+def new_cycles() -> Cycles:
+    return defaultdict(int)
+
+def _aware(ts: datetime) -> datetime:
+    # SQLite hands back naive timestamps; they are UTC
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+# ---------- Sketch ----------
+
+def bucket_of(minutes: float) -> int:
+    """Bucket k holds (GAMMA**(k-1), GAMMA**k] minutes; anything up to a minute is bucket 0."""
+    return 0 if minutes <= 1 else math.ceil(math.log(minutes) / _LOG_GAMMA)
+
+def bucket_minutes(k: int) -> float:
+    """Representative value of bucket k: within ALPHA of everything in it."""
+    return 2 * GAMMA ** k / (GAMMA + 1)
+
+def cycle_bucket(started: datetime, completed: datetime) -> int:
+    return bucket_of((_aware(completed) - _aware(started)).total_seconds() / 60)
+
+def quantiles(counts: dict[int, int], qs: tuple[float, ...] = QUANTILES) -> dict[float, float | None]:
+    """Percentiles in minutes from merged bucket counts."""
+    n = sum(counts.values())
+    if not n:
+        return {q: None for q in qs}
+    ordered = sorted(counts.items())
+    out = {}
+    for q in qs:
+        rank, seen = max(1, math.ceil(q * n)), 0
+        for k, c in ordered:
+            seen += c
+            if seen >= rank:
+                out[q] = bucket_minutes(k)
+                break
+    return out
+
+
+# ---------- Incremental (task write paths) ----------
+
+async def apply_flow(db: AsyncSession, flow: Flow) -> None:
+    await upsert_increment(
+        db, FlowDay, ["project_id", "day"],
+        [{"project_id": p, "day": d, "created": c, "completed": k, "reopened": r}
+         for (p, d), (c, k, r) in flow.items() if c or k or r],
+        ["created", "completed", "reopened"],
+    )
+
+async def apply_cycles(db: AsyncSession, cycles: Cycles) -> None:
+    await upsert_increment(
+        db, CycleTimeDay, ["project_id", "day", "bucket"],
+        [{"project_id": p, "day": d, "bucket": b, "count": n} for (p, d, b), n in cycles.items() if n],
+        ["count"],
+    )
+
+def _is_start(e) -> bool:
+    return e.type == TaskEventType.status_changed and e.to_status == TaskStatus.in_progress.value
+
+async def cycle_starts(db: AsyncSession, tasks: list) -> dict[int, datetime]:
+    """task_id -> time of its latest move to in_progress (absent: never moved).
+
+    Takes Task-like objects (id, project_id, created_at); tasks with no move
+    in the hot rows are looked up in archived months.
+    """
+    if not tasks:
+        return {}
+    rows = await db.execute(
+        select(TaskEvent.task_id, func.max(TaskEvent.created_at))
+        .where(TaskEvent.task_id.in_([t.id for t in tasks]), TaskEvent.type == TaskEventType.status_changed,
+               TaskEvent.to_status == TaskStatus.in_progress.value)
+        .group_by(TaskEvent.task_id)
+    )
+    out = {task_id: at for task_id, at in rows}
+    missing = [t for t in tasks if t.id not in out]
+    if missing:
+        archived = await latest_archived(db, missing, _is_start)
+        out.update({task_id: e.created_at for task_id, e in archived.items()})
+    return out
+
+async def record_flow(db: AsyncSession, created: list = (), done: list = (), reopened: list = ()) -> None:
+    """Roll today's creates, completions and reopens (Task-like objects) into both tables.
+
+    Completed tasks need `created_at` loaded; their cycle starts are read in
+    one query (archived months only for tasks it misses).
+    """
+    today, now = utc_day(), datetime.now(timezone.utc)
+    flow = new_flow()
+    for t in created:
+        flow[(t.project_id, today)][0] += 1
+    for t in done:
+        flow[(t.project_id, today)][1] += 1
+    for t in reopened:
+        flow[(t.project_id, today)][2] += 1
+    await apply_flow(db, flow)
+    if done:
+        starts = await cycle_starts(db, done)
+        cycles = new_cycles()
+        for t in done:
+            cycles[(t.project_id, today, cycle_bucket(starts.get(t.id) or t.created_at or now, now))] += 1
+        await apply_cycles(db, cycles)
+
+
+# ---------- Reads ----------
+
+@dataclass(frozen=True, slots=True)
+class BurndownDay:
+    day: date
+    created: int
+    completed: int
+    reopened: int
+    remaining: int
+
+async def burndown(db: AsyncSession, project_id: int, start: date, end: date) -> list[BurndownDay]:
+    """Open tasks at the end of each day in [start, end]."""
+    opened = func.coalesce(func.sum(FlowDay.created - FlowDay.completed + FlowDay.reopened), 0)
+    remaining = int(await db.scalar(
+        select(opened).where(FlowDay.project_id == project_id, FlowDay.day < start)
+    ) or 0)
+    rows = {
+        r.day: r for r in await db.execute(
+            select(FlowDay.day, FlowDay.created, FlowDay.completed, FlowDay.reopened)
+            .where(FlowDay.project_id == project_id, FlowDay.day >= start, FlowDay.day <= end)
+        )
+    }
+    out = []
+    day = start
+    while day <= end:
+        r = rows.get(day)
+        c, k, o = (r.created, r.completed, r.reopened) if r else (0, 0, 0)
+        remaining += c - k + o
+        out.append(BurndownDay(day=day, created=c, completed=k, reopened=o, remaining=remaining))
+        day += timedelta(days=1)
+    return out
+
+async def velocity(db: AsyncSession, project_id: int, weeks: int, today: date | None = None) -> list[tuple[date, int]]:
+    """(Monday, tasks completed net of reopens) for the last `weeks` ISO weeks, oldest first."""
+    today = today or utc_day()
+    first = today - timedelta(days=today.weekday()) - timedelta(weeks=weeks - 1)
+    totals = {first + timedelta(weeks=i): 0 for i in range(weeks)}
+    rows = await db.execute(
+        select(FlowDay.day, FlowDay.completed - FlowDay.reopened)
+        .where(FlowDay.project_id == project_id, FlowDay.day >= first, FlowDay.day <= today)
+    )
+    for day, net in rows:
+        totals[day - timedelta(days=day.weekday())] += net
+    return sorted(totals.items())
+
+async def cycle_time(db: AsyncSession, project_id: int, start: date, end: date) -> tuple[int, dict[float, float | None]]:
+    """(tasks completed in [start, end], percentile -> minutes) from the merged histogram."""
+    rows = await db.execute(
+        select(CycleTimeDay.bucket, func.sum(CycleTimeDay.count))
+        .where(CycleTimeDay.project_id == project_id, CycleTimeDay.day >= start, CycleTimeDay.day <= end)
+        .group_by(CycleTimeDay.bucket)
+    )
+    counts = {b: int(n) for b, n in rows}
+    return sum(counts.values()), quantiles(counts)
+
+
+# ---------- Repair ----------
+
+def rebuild(db, project_ids: list[int] | None = None, batch: int = 10_000) -> None:
+    """Recreate both tables from tasks and task_events, archived months included (sync Session or Connection; caller commits)."""
+    def scoped(stmt, col):
+        return stmt.where(col.in_(project_ids)) if project_ids is not None else stmt
+
+    flow, cycles = new_flow(), new_cycles()
+    task_created: dict[int, datetime] = {}
+    for task_id, project_id, created_at in db.execute(
+        scoped(select(Task.id, Task.project_id, Task.created_at), Task.project_id).execution_options(yield_per=batch)
+    ):
+        flow[(project_id, utc_day(_aware(created_at)))][0] += 1
+        task_created[task_id] = created_at
+
+    # one pass over the log (id order within each project), remembering each task's latest start
+    started: dict[int, datetime] = {}
+    for e in iter_events(db, project_ids=project_ids, batch=batch,
+                         types=(TaskEventType.status_changed, TaskEventType.completed)):
+        if e.task_id not in task_created:
+            continue  # deleted task; its events are archived but the task is gone
+        day = utc_day(_aware(e.created_at))
+        if e.type == TaskEventType.status_changed:
+            if e.to_status == TaskStatus.in_progress.value:
+                started[e.task_id] = e.created_at
+            if e.from_status == TaskStatus.done.value:
+                flow[(e.project_id, day)][2] += 1
+        else:
+            flow[(e.project_id, day)][1] += 1
+            start = started.get(e.task_id) or task_created[e.task_id] or e.created_at
+            cycles[(e.project_id, day, cycle_bucket(start, e.created_at))] += 1
+
+    db.execute(scoped(delete(FlowDay), FlowDay.project_id))
+    db.execute(scoped(delete(CycleTimeDay), CycleTimeDay.project_id))
+    flow_rows = [{"project_id": p, "day": d, "created": c, "completed": k, "reopened": r}
+                 for (p, d), (c, k, r) in flow.items()]
+    cycle_rows = [{"project_id": p, "day": d, "bucket": b, "count": n} for (p, d, b), n in cycles.items()]
+    for model, rows in ((FlowDay, flow_rows), (CycleTimeDay, cycle_rows)):
+        for i in range(0, len(rows), batch):
+            db.execute(insert(model), rows[i:i + batch])
@@ -0,0 +1,46 @@
+# app/services/authz.py
+from fastapi import HTTPException
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.membership import ProjectMember, ProjectRole
+from app.models.project import Project
+
+# user_id -> {project_id: role}; only positive results are cached
+membership_cache: TTLCache[int, dict[int, ProjectRole]] = TTLCache(
+    maxsize=settings.MEMBERSHIP_CACHE_SIZE,
+    ttl=settings.MEMBERSHIP_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_memberships(user_id: int) -> None:
+    membership_cache.pop(user_id)
+
+
+async def member_role(db: AsyncSession, project_id: int, user_id: int) -> tuple[bool, ProjectRole | None]:
+    """(project exists, caller's role or None) in one round trip, cache first."""
+    roles = membership_cache.get(user_id)
+    if roles is not None and project_id in roles:
+        return True, roles[project_id]
+
+    row = (await db.execute(
+        select(Project.id, ProjectMember.role)
+        .outerjoin(ProjectMember, and_(ProjectMember.project_id == Project.id, ProjectMember.user_id == user_id))
+        .where(Project.id == project_id)
+    )).first()
+    if row is None:
+        return False, None
+    if row.role is not None:
+        membership_cache.set(user_id, {**(roles or {}), project_id: row.role})
+    return True, row.role
+
+
+async def require_member(db: AsyncSession, project_id: int, user_id: int) -> ProjectRole:
+    exists, role = await member_role(db, project_id, user_id)
+    if not exists:
+        raise HTTPException(status_code=404, detail="Project not found")
+    if role is None:
+        raise HTTPException(status_code=403, detail="Not a member of this project")
+    return role
@@ -0,0 +1,137 @@
+# app/services/broker.py
+"""
+In-process pub/sub for project events (new messages, task status changes).
+
+Subscribers get a bounded asyncio.Queue per connection. A slow client loses
+its oldest events; it never blocks the publisher. With BROKER_PG_NOTIFY on,
+publish() goes through Postgres NOTIFY and every worker, this one included,
+fans out what it hears on LISTEN. So it does not matter which worker holds
+the socket.
+"""
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import psycopg
+from sqlalchemy.engine import make_url
+
+from app.core.config import settings
+
+log = logging.getLogger(__name__)
+
+# NOTIFY payloads are capped at 8000 bytes by Postgres
+_MAX_NOTIFY_BYTES = 7900
+
+
+class Broker:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subs: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self._bridge: "PgNotifyBridge | None" = None
+
+    @asynccontextmanager
+    async def subscribe(self, project_id: int) -> AsyncIterator[asyncio.Queue]:
+        q: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subs[project_id].add(q)
+        try:
+            yield q
+        finally:
+            subs = self._subs.get(project_id)
+            if subs is not None:
+                subs.discard(q)
+                if not subs:
+                    del self._subs[project_id]
+
+    def deliver(self, project_id: int, event: dict) -> None:
+        """Fan out to this worker's subscribers."""
+        for q in self._subs.get(project_id, ()):
+            if q.full():
+                q.get_nowait()  # drop the oldest for slow consumers
+            q.put_nowait(event)
+
+    async def publish(self, project_id: int, event: dict) -> None:
+        if self._bridge is not None:
+            try:
+                await self._bridge.notify(project_id, event)
+                return
+            except Exception:
+                log.exception("NOTIFY failed; delivering locally only")
+        self.deliver(project_id, event)
+
+    async def start(self) -> None:
+        if settings.BROKER_PG_NOTIFY and self._bridge is None:
+            self._bridge = PgNotifyBridge(self, settings.BROKER_CHANNEL)
+            await self._bridge.start()
+
+    async def stop(self) -> None:
+        if self._bridge is not None:
+            await self._bridge.stop()
+            self._bridge = None
+
+
+class PgNotifyBridge:
+    """LISTEN/NOTIFY over two dedicated psycopg connections (outside the SQLAlchemy pool)."""
+
+    def __init__(self, broker: Broker, channel: str):
+        self.broker = broker
+        self.channel = channel
+        self._conninfo = make_url(settings.DATABASE_URL).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._sender = None
+        self._send_lock = asyncio.Lock()
+        self._listener: asyncio.Task | None = None
+
+    async def start(self) -> None:
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._sender is not None:
+            await self._sender.close()
+            self._sender = None
+
+    async def notify(self, project_id: int, event: dict) -> None:
+        payload = json.dumps({"p": project_id, "e": event}, separators=(",", ":"), default=str)
+        if len(payload.encode()) > _MAX_NOTIFY_BYTES:
+            # too big for NOTIFY: ship the envelope, clients refetch the body
+            slim = {k: v for k, v in event.items() if not isinstance(v, dict)}
+            payload = json.dumps({"p": project_id, "e": {**slim, "partial": True}}, default=str)
+        async with self._send_lock:
+            if self._sender is None or self._sender.closed:
+                self._sender = await psycopg.AsyncConnection.connect(self._conninfo, autocommit=True)
+            try:
+                await self._sender.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            except psycopg.OperationalError:
+                await self._sender.close()
+                self._sender = None
+                raise
+
+    async def _listen(self) -> None:
+        backoff = 0.5
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._conninfo, autocommit=True) as conn:
+                    await conn.execute(f'LISTEN "{self.channel}"')
+                    backoff = 0.5
+                    async for n in conn.notifies():
+                        try:
+                            msg = json.loads(n.payload)
+                            self.broker.deliver(int(msg["p"]), msg["e"])
+                        except (ValueError, KeyError, TypeError):
+                            log.warning("dropping malformed notification on %s", self.channel)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("LISTEN connection lost; reconnecting in %.1fs", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+
+
+broker = Broker(queue_size=settings.BROKER_QUEUE_SIZE)
@@ -0,0 +1,300 @@
+# app/services/event_archive.py
+"""
+Cold storage for task_events.
+
+app/scripts/archive_events.py writes each month past EVENT_HOT_MONTHS to
+EVENT_ARCHIVE_DIR/task_events_YYYY_MM.jsonl.gz, records it in
+task_event_archives and drops the month's partition, all in one
+transaction. Inside the file, each project's events (in id order) are a
+gzip member of their own, and task_event_archive_chunks records where each
+member starts and how long it is. Concatenated members are still one valid
+gzip file, so zcat reads it whole, but a reader for one project seeks to
+its member and decompresses nothing else. Gzip JSONL needs nothing beyond
+the standard library; event rows are small and repetitive, so they
+compress about 10x.
+
+Readers that need the log (history replay, analytics repair, export) go
+through `stream_events` / `iter_events`: archived months first, read from
+their files in a worker thread, then hot rows streamed from the table. Both
+yield EventRow, which has the same attributes as a TaskEvent. Write paths
+that need a task's latest completion or start use `latest_archived` when
+the hot rows have none.
+"""
+import asyncio
+import heapq
+import json
+import os
+import zlib
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from itertools import groupby, islice
+from typing import AsyncIterator, Iterable, Iterator, NamedTuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.partitions import add_months, month_bounds, month_start
+from app.models.events import TaskEvent, TaskEventArchive, TaskEventArchiveChunk, TaskEventType
+
+COLUMNS = ("id", "task_id", "project_id", "actor_id", "type", "from_status", "to_status", "data", "created_at")
+READ_BLOCK = 1 << 16
+
+
+class EventRow(NamedTuple):
+    id: int
+    task_id: int
+    project_id: int
+    actor_id: int | None
+    type: TaskEventType
+    from_status: str | None
+    to_status: str | None
+    data: dict | None
+    created_at: datetime
+
+
+class ArchivedMonth(NamedTuple):
+    file_name: str
+    rows: int
+    min_event_id: int
+    max_event_id: int
+    chunks: list[dict]  # task_event_archive_chunks rows, without archive_id
+
+
+def file_name(month: date) -> str:
+    return f"task_events_{month:%Y_%m}.jsonl.gz"
+
+def archive_path(name: str, directory: str | None = None) -> str:
+    return os.path.join(directory or settings.EVENT_ARCHIVE_DIR, name)
+
+
+def _encode(row) -> bytes:
+    d = dict(zip(COLUMNS, row))
+    d["type"] = TaskEventType(d["type"]).value
+    at = d["created_at"]
+    d["created_at"] = (at if at.tzinfo else at.replace(tzinfo=timezone.utc)).isoformat()
+    return json.dumps(d, separators=(",", ":")).encode() + b"\n"
+
+def _decode(line: str | bytes) -> EventRow:
+    d = json.loads(line)
+    d["type"] = TaskEventType(d["type"])
+    d["created_at"] = datetime.fromisoformat(d["created_at"])
+    return EventRow(**d)
+
+
+# ---------- Writing ----------
+
+def write_month(conn, month: date, directory: str | None = None, batch: int = 10_000) -> ArchivedMonth | None:
+    """Write one month's hot rows to its archive file (sync Connection); None when the month is empty.
+
+    The file is written under a temporary name, fsynced and renamed, so a
+    crash never leaves a partial archive behind.
+    """
+    lo, hi = month_bounds(month)
+    name = file_name(month)
+    path = archive_path(name, directory)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    chunks: list[dict] = []
+    chunk = comp = None
+    tmp = path + ".tmp"
+
+    def close_chunk():
+        raw.write(comp.flush())
+        chunk["length"] = raw.tell() - chunk["offset"]
+        chunks.append(chunk)
+
+    with open(tmp, "wb") as raw:
+        for row in conn.execute(
+            select(*(TaskEvent.__table__.c[c] for c in COLUMNS))
+            .where(TaskEvent.created_at >= lo, TaskEvent.created_at < hi)
+            .order_by(TaskEvent.project_id, TaskEvent.id)
+            .execution_options(yield_per=batch)
+        ):
+            if chunk is None or row.project_id != chunk["project_id"]:
+                if chunk is not None:
+                    close_chunk()
+                chunk = {"project_id": row.project_id, "offset": raw.tell(), "rows": 0,
+                         "min_event_id": row.id, "max_event_id": row.id}
+                comp = zlib.compressobj(6, zlib.DEFLATED, 31)  # one gzip member per project
+            raw.write(comp.compress(_encode(row)))
+            chunk["rows"] += 1
+            chunk["max_event_id"] = row.id
+        if chunk is not None:
+            close_chunk()
+        raw.flush()
+        os.fsync(raw.fileno())
+    if not chunks:
+        os.remove(tmp)
+        return None
+    os.replace(tmp, path)
+    return ArchivedMonth(
+        name, sum(c["rows"] for c in chunks),
+        min(c["min_event_id"] for c in chunks), max(c["max_event_id"] for c in chunks), chunks,
+    )
+
+
+# ---------- Reading ----------
+
+def hot_since(db) -> date | None:
+    """First day whose events are all still in task_events, or None when nothing is archived (sync Session)."""
+    newest = db.scalar(select(func.max(TaskEventArchive.month)))
+    return add_months(newest, 1) if newest else None
+
+
+def _keep(e: EventRow, project_id, task_id, after_id, since, until, types) -> bool:
+    return not (e.id <= after_id
+                or (project_id is not None and e.project_id != project_id)
+                or (task_id is not None and e.task_id != task_id)
+                or (since is not None and e.created_at <= since)
+                or (until is not None and e.created_at > until)
+                or (types is not None and e.type not in types))
+
+def read_chunk(name: str, offset: int, length: int, project_id: int | None = None, task_id: int | None = None,
+               after_id: int = 0, since: datetime | None = None, until: datetime | None = None,
+               types: Iterable[TaskEventType] | None = None) -> Iterator[EventRow]:
+    """Matching events from one project's gzip member, decompressed a block at a time."""
+    types = set(types) if types is not None else None
+    d = zlib.decompressobj(31)
+    tail = b""
+    with open(archive_path(name), "rb") as f:
+        f.seek(offset)
+        left = length
+        while left > 0:
+            block = f.read(min(READ_BLOCK, left))
+            if not block:
+                break
+            left -= len(block)
+            *lines, tail = (tail + d.decompress(block)).split(b"\n")
+            for line in lines:
+                e = _decode(line)
+                if _keep(e, project_id, task_id, after_id, since, until, types):
+                    yield e
+    if tail:
+        e = _decode(tail)
+        if _keep(e, project_id, task_id, after_id, since, until, types):
+            yield e
+
+
+def _utc_month(at: datetime) -> date:
+    return month_start(at.astimezone(timezone.utc).date())
+
+def _months(q, since: datetime | None, until: datetime | None):
+    if since is not None:
+        q = q.where(TaskEventArchive.month >= _utc_month(since))
+    if until is not None:
+        q = q.where(TaskEventArchive.month <= _utc_month(until))
+    return q
+
+def _chunks_stmt(project_ids: list[int] | None, after_id: int, since: datetime | None, until: datetime | None):
+    q = (
+        select(TaskEventArchiveChunk.project_id, TaskEventArchive.file_name,
+               TaskEventArchiveChunk.offset, TaskEventArchiveChunk.length)
+        .join(TaskEventArchive, TaskEventArchive.id == TaskEventArchiveChunk.archive_id)
+        .where(TaskEventArchiveChunk.max_event_id > after_id)
+    )
+    if project_ids is not None:
+        q = q.where(TaskEventArchiveChunk.project_id.in_(project_ids))
+    return _months(q, since, until).order_by(TaskEventArchiveChunk.project_id, TaskEventArchive.month)
+
+def _hot(project_ids, task_id, after_id, since, until, types, batch: int):
+    q = select(*(TaskEvent.__table__.c[c] for c in COLUMNS)).where(TaskEvent.id > after_id)
+    if project_ids is not None:
+        q = q.where(TaskEvent.project_id.in_(project_ids))
+    if task_id is not None:
+        q = q.where(TaskEvent.task_id == task_id)
+    if since is not None:
+        q = q.where(TaskEvent.created_at > since)
+    if until is not None:
+        q = q.where(TaskEvent.created_at <= until)
+    if types is not None:
+        q = q.where(TaskEvent.type.in_(list(types)))
+    return q.order_by(TaskEvent.id).execution_options(yield_per=batch)
+
+def _archived(chunks: list, **filters) -> Iterator[EventRow]:
+    """Archived events, in id order within each project (projects one after another)."""
+    # months are written in id order; merging keeps the order even if ids straddle a month boundary
+    for project_id, group in groupby(chunks, key=lambda c: c.project_id):
+        yield from heapq.merge(
+            *(read_chunk(c.file_name, c.offset, c.length, project_id=project_id, **filters) for c in group),
+            key=lambda e: e.id,
+        )
+
+
+async def stream_events(db: AsyncSession, *, project_id: int | None = None, task_id: int | None = None,
+                        after_id: int = 0, since: datetime | None = None, until: datetime | None = None,
+                        types: Iterable[TaskEventType] | None = None, batch: int = 1000) -> AsyncIterator[EventRow]:
+    """Matching events from archive files, then from task_events.
+
+    `since` and `until` bound created_at as (since, until]. Pass
+    `project_id` whenever it is known (also with `task_id`): only that
+    project's archive members are read then.
+    """
+    types = tuple(types) if types is not None else None
+    project_ids = [project_id] if project_id is not None else None
+    chunks = (await db.execute(_chunks_stmt(project_ids, after_id, since, until))).all()
+    if chunks:
+        archived = _archived(chunks, task_id=task_id, after_id=after_id, since=since, until=until, types=types)
+        # gzip + JSON decoding is CPU work; keep it off the event loop a batch at a time
+        while batch_ := await asyncio.to_thread(lambda: list(islice(archived, batch))):
+            for e in batch_:
+                yield e
+    rows = await db.stream(_hot(project_ids, task_id, after_id, since, until, types, batch))
+    async for row in rows:
+        yield EventRow(*row)
+
+
+def iter_events(db, *, project_ids: list[int] | None = None, after_id: int = 0, until: datetime | None = None,
+                types: Iterable[TaskEventType] | None = None, batch: int = 10_000) -> Iterator[EventRow]:
+    """Sync `stream_events` (Session or Connection) over some or all projects.
+
+    Each project's events come in id order, archived before hot; events of
+    different projects interleave.
+    """
+    types = tuple(types) if types is not None else None
+    chunks = db.execute(_chunks_stmt(project_ids, after_id, None, until)).all()
+    yield from _archived(chunks, after_id=after_id, until=until, types=types)
+    for row in db.execute(_hot(project_ids, None, after_id, None, until, types, batch)):
+        yield EventRow(*row)
+
+
+# ---------- Point lookups for write paths ----------
+
+def _latest_in_chunks(chunks: list, pending: dict[int, set[int]], match) -> dict[int, EventRow]:
+    """Scan project members newest month first; a task is settled by the first month that has a match."""
+    found: dict[int, EventRow] = {}
+    for c in chunks:
+        tasks = pending[c.project_id] - found.keys()
+        if not tasks:
+            continue
+        month_hits: dict[int, EventRow] = {}
+        for e in read_chunk(c.file_name, c.offset, c.length, project_id=c.project_id):
+            if e.task_id in tasks and match(e):
+                month_hits[e.task_id] = e  # ascending ids: the last one wins
+        found.update(month_hits)
+    return found
+
+async def latest_archived(db: AsyncSession, tasks: list, match) -> dict[int, EventRow]:
+    """task_id -> the latest archived event with match(e) true, for Task-like objects.
+
+    Only months from each task's creation on are read, so tasks created
+    since the newest archived month cost one indexed query and no file IO.
+    """
+    if not tasks:
+        return {}
+    pending: dict[int, set[int]] = defaultdict(set)
+    for t in tasks:
+        pending[t.project_id].add(t.id)
+    oldest = min((t.created_at for t in tasks if t.created_at is not None), default=None)
+    q = (
+        select(TaskEventArchiveChunk.project_id, TaskEventArchive.file_name,
+               TaskEventArchiveChunk.offset, TaskEventArchiveChunk.length)
+        .join(TaskEventArchive, TaskEventArchive.id == TaskEventArchiveChunk.archive_id)
+        .where(TaskEventArchiveChunk.project_id.in_(list(pending)))
+        .order_by(TaskEventArchive.month.desc())
+    )
+    if oldest is not None:
+        q = q.where(TaskEventArchive.month >= _utc_month(oldest if oldest.tzinfo else oldest.replace(tzinfo=timezone.utc)))
+    chunks = (await db.execute(q)).all()
+    if not chunks:
+        return {}
+    return await asyncio.to_thread(_latest_in_chunks, chunks, pending, match)
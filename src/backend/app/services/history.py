@@ -0,0 +1,110 @@
+# app/services/history.py
+"""
+Event-sourced task history.
+
+Every task write appends TaskEvents that describe the change. A
+ProjectSnapshot is the board with every event created at or before its
+taken_at applied. A point-in-time read starts from the newest snapshot
+taken at or before the requested time, then replays only the events
+created after it. Reads never write: app/scripts/snapshot_history.py takes
+snapshots on a schedule, and only up to a time every open transaction
+started after, so no event can commit behind a snapshot. (Event ids come
+from a sequence at insert time and created_at is the transaction's start,
+so neither alone says which events a snapshot has seen.) Replays read
+through event_archive.stream_events, so they reach months that have been
+moved out to archive files.
+"""
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.events import ProjectSnapshot, TaskEvent, TaskEventType
+from app.models.task import Task
+from app.services.event_archive import EventRow, stream_events
+
+TRACKED = ("title", "description", "status", "priority", "due_date", "assignee_id")
+
+State = dict[str, object]
+
+
+def task_state(t: Task) -> State:
+    """JSON-safe copy of the tracked fields."""
+    return {
+        "title": t.title,
+        "description": t.description,
+        "status": t.status.value if t.status is not None else None,
+        "priority": t.priority.value if t.priority is not None else None,
+        "due_date": t.due_date.isoformat() if t.due_date else None,
+        "assignee_id": t.assignee_id,
+    }
+
+
+def created_event(t: Task, actor_id: int | None) -> TaskEvent:
+    return TaskEvent(task_id=t.id, project_id=t.project_id, actor_id=actor_id,
+                     type=TaskEventType.created, data=task_state(t))
+
+
+def change_events(t: Task, before: State, actor_id: int | None) -> list[TaskEvent]:
+    """Events describing before -> current state of `t` (empty when nothing changed)."""
+    after = task_state(t)
+    events: list[TaskEvent] = []
+    if after["status"] != before["status"]:
+        events.append(TaskEvent(task_id=t.id, project_id=t.project_id, actor_id=actor_id,
+                                type=TaskEventType.status_changed,
+                                from_status=before["status"], to_status=after["status"]))
+    if after["assignee_id"] != before["assignee_id"]:
+        events.append(TaskEvent(task_id=t.id, project_id=t.project_id, actor_id=actor_id,
+                                type=TaskEventType.reassigned, data={"assignee_id": after["assignee_id"]}))
+    edited = {k: after[k] for k in TRACKED if k not in ("status", "assignee_id") and after[k] != before[k]}
+    if edited:
+        events.append(TaskEvent(task_id=t.id, project_id=t.project_id, actor_id=actor_id,
+                                type=TaskEventType.updated, data=edited))
+    return events
+
+
+# ---------- Replay ----------
+
+def apply_event(board: dict[str, State], e: TaskEvent | EventRow) -> None:
+    key = str(e.task_id)
+    if e.type == TaskEventType.created:
+        board[key] = dict(e.data or {})
+        return
+    s = board.setdefault(key, {})  # tasks older than their first recorded event
+    if e.type == TaskEventType.status_changed and e.to_status:
+        s["status"] = e.to_status
+    elif e.type == TaskEventType.completed:
+        s["status"] = "done"
+    elif e.type in (TaskEventType.updated, TaskEventType.reassigned) and e.data:
+        s.update(e.data)
+
+
+async def base_snapshot(db: AsyncSession, project_id: int, at: datetime | None = None) -> ProjectSnapshot | None:
+    """Newest snapshot taken at or before `at` (any time when None)."""
+    q = select(ProjectSnapshot).where(ProjectSnapshot.project_id == project_id)
+    if at is not None:
+        q = q.where(ProjectSnapshot.taken_at <= at)
+    return await db.scalar(q.order_by(ProjectSnapshot.taken_at.desc()).limit(1))
+
+
+async def project_state_at(db: AsyncSession, project_id: int, at: datetime) -> dict[str, State]:
+    """{task_id: state} for every task that existed at `at`."""
+    snap = await base_snapshot(db, project_id, at)
+    board: dict[str, State] = {k: dict(v) for k, v in (snap.state if snap else {}).items()}
+    since = snap.taken_at if snap is not None else None
+    async for e in stream_events(db, project_id=project_id, since=since, until=at):
+        apply_event(board, e)
+    return board
+
+
+async def task_state_at(db: AsyncSession, t: Task, at: datetime) -> State | None:
+    """One task's state at `at`, or None if it did not exist yet."""
+    snap = await base_snapshot(db, t.project_id, at)
+    key = str(t.id)
+    board: dict[str, State] = {}
+    if snap is not None and key in snap.state:
+        board[key] = dict(snap.state[key])
+    since = snap.taken_at if snap is not None else None
+    async for e in stream_events(db, project_id=t.project_id, task_id=t.id, since=since, until=at):
+        apply_event(board, e)
+    return board.get(key)
@@ -0,0 +1,134 @@
+# app/services/leaderboard.py
+"""
+Per-project leaderboard rollup.
+
+Each `completed` task event credits one point to its actor (the assignee at
+completion time) on that UTC day in project_leaderboard_daily. Reopening a
+task takes the point back from the bucket of its latest completion. A read
+for any window sums at most one row per member per day, and never touches
+tasks or task_events.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import Date, and_, cast, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.db.upsert import upsert_increment
+from app.models.events import TaskEvent, TaskEventType
+from app.models.membership import ProjectMember
+from app.models.stats import LeaderboardDay
+from app.models.task import Task, TaskStatus
+from app.models.user import User
+from app.services.event_archive import latest_archived
+
+WINDOWS: dict[str, int | None] = {"all": None, "7d": 7, "30d": 30}
+
+def utc_day(ts: datetime | None = None) -> date:
+    return (ts or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+
+# (project_id, user_id, day) -> points
+Credits = dict[tuple[int, int, date], int]
+
+async def apply_credits(db: AsyncSession, credits: Credits) -> None:
+    """One upsert for any number of buckets (keys must already be unique)."""
+    await upsert_increment(
+        db, LeaderboardDay, ["project_id", "day", "user_id"],
+        [{"project_id": p, "day": d, "user_id": u, "completed": n} for (p, u, d), n in credits.items() if n],
+        ["completed"],
+    )
+
+async def last_completions(db: AsyncSession, tasks: list) -> dict[int, tuple[int | None, date]]:
+    """task_id -> (credited user, UTC day) of each task's most recent `completed` event.
+
+    Takes Task-like objects (id, project_id, created_at). Hot rows answer
+    first; tasks with no completion there are looked up in archived months.
+    """
+    if not tasks:
+        return {}
+    task_ids = [t.id for t in tasks]
+    latest = (
+        select(func.max(TaskEvent.id))
+        .where(TaskEvent.task_id.in_(task_ids), TaskEvent.type == TaskEventType.completed)
+        .group_by(TaskEvent.task_id)
+    )
+    rows = await db.execute(
+        select(TaskEvent.task_id, TaskEvent.actor_id, TaskEvent.created_at).where(TaskEvent.id.in_(latest))
+    )
+    out = {r.task_id: (r.actor_id, utc_day(r.created_at)) for r in rows}
+    missing = [t for t in tasks if t.id not in out]
+    if missing:
+        archived = await latest_archived(db, missing, lambda e: e.type == TaskEventType.completed)
+        out.update({task_id: (e.actor_id, utc_day(e.created_at)) for task_id, e in archived.items()})
+    return out
+
+def completion_event(t, actor_id: int) -> TaskEvent:
+    """`completed` event crediting the assignee (or whoever closed an unassigned task)."""
+    return TaskEvent(task_id=t.id, project_id=t.project_id, actor_id=t.assignee_id or actor_id,
+                     type=TaskEventType.completed)
+
+async def record_completion(db: AsyncSession, t: Task, actor_id: int) -> None:
+    e = completion_event(t, actor_id)
+    db.add(e)
+    await apply_credits(db, {(t.project_id, e.actor_id, utc_day()): 1})
+
+async def revoke_completion(db: AsyncSession, t: Task) -> None:
+    """Undo the point from the task's most recent completion."""
+    last = (await last_completions(db, [t])).get(t.id)
+    if last is not None and last[0] is not None:
+        await apply_credits(db, {(t.project_id, last[0], last[1]): -1})
+
+async def read_leaderboard(db: AsyncSession, project_id: int, window: str = "all") -> list:
+    """(id, name, avatar_url, score) for every member, best first."""
+    scores = select(LeaderboardDay.user_id, func.sum(LeaderboardDay.completed).label("score")).where(
+        LeaderboardDay.project_id == project_id
+    )
+    days = WINDOWS[window]
+    if days is not None:
+        scores = scores.where(LeaderboardDay.day > utc_day() - timedelta(days=days))
+    scores = scores.group_by(LeaderboardDay.user_id).subquery()
+
+    score = func.coalesce(scores.c.score, 0).label("score")
+    return (await db.execute(
+        select(User.id, User.name, User.avatar_url, score)
+        .select_from(ProjectMember)
+        .join(User, User.id == ProjectMember.user_id)
+        .outerjoin(scores, scores.c.user_id == ProjectMember.user_id)
+        .where(ProjectMember.project_id == project_id)
+        .order_by(score.desc(), User.id)
+    )).all()
+
+
+# ---------- Repair ----------
+
+def rebuild_stmts(project_ids: list[int] | None = None, since: date | None = None) -> list:
+    """Recreate the rollup from task_events (Postgres).
+
+    Net effect of every complete/reopen pair: each task that is done now
+    holds exactly one point, on the day of its latest `completed` event.
+    With `since` (the first day not yet archived) only days from then on are
+    rebuilt, and the rows for archived days are kept as they are.
+    """
+    e2 = aliased(TaskEvent)
+    latest = (
+        select(func.max(e2.id))
+        .where(e2.task_id == Task.id, e2.type == TaskEventType.completed)
+        .correlate(Task)
+        .scalar_subquery()
+    )
+    day = cast(func.timezone("UTC", TaskEvent.created_at), Date)
+    src = (
+        select(TaskEvent.project_id, day, TaskEvent.actor_id, func.count())
+        .join(Task, and_(Task.id == TaskEvent.task_id, Task.status == TaskStatus.done))
+        .where(TaskEvent.id == latest, TaskEvent.actor_id.is_not(None))
+        .group_by(TaskEvent.project_id, day, TaskEvent.actor_id)
+    )
+    wipe = delete(LeaderboardDay)
+    if since is not None:
+        src = src.where(TaskEvent.created_at >= datetime(since.year, since.month, since.day, tzinfo=timezone.utc))
+        wipe = wipe.where(LeaderboardDay.day >= since)
+    if project_ids is not None:
+        src = src.where(TaskEvent.project_id.in_(project_ids))
+        wipe = wipe.where(LeaderboardDay.project_id.in_(project_ids))
+    fill = insert(LeaderboardDay).from_select(["project_id", "day", "user_id", "completed"], src)
+    return [wipe, fill]
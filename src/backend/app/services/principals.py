@@ -0,0 +1,59 @@
+# app/services/principals.py
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models.user import User
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Immutable snapshot of the authenticated user, safe to share across requests."""
+    id: int
+    email: str
+    name: str | None
+    avatar_url: str | None
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, u: User) -> "Principal":
+        return cls(id=u.id, email=u.email, name=u.name, avatar_url=u.avatar_url, is_active=bool(u.is_active))
+
+
+# keyed by token subject (the user's email)
+principal_cache: TTLCache[str, Principal] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def invalidate_principal(email: str) -> None:
+    principal_cache.pop(email)
+
+
+# ---------- Invalidation ----------
+
+def _touched_emails(target: User) -> set[str]:
+    emails = {target.email}
+    # an edited email must also drop the entry cached under the old subject
+    emails.update(inspect(target).attrs.email.history.deleted or ())
+    return {e for e in emails if e}
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _on_user_changed(mapper, connection, target: User):
+    emails = _touched_emails(target)
+    for e in emails:
+        invalidate_principal(e)
+    # and again once committed, so a concurrent miss cannot re-cache the old row
+    sess = object_session(target)
+    if sess is not None:
+        sess.info.setdefault("principals_dirty", set()).update(emails)
+
+@event.listens_for(Session, "after_commit")
+def _on_commit(session: Session):
+    for e in session.info.pop("principals_dirty", ()):
+        invalidate_principal(e)
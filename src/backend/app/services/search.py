@@ -0,0 +1,185 @@
+# app/services/search.py
+"""
+Full-text search over task titles/descriptions, task comments and General
+thread messages, limited to projects the caller is a member of.
+
+Postgres matches the stored `search_vector` columns (GIN indexed) against
+websearch_to_tsquery, ranks with ts_rank_cd, and builds ts_headline snippets
+for the final page only. SQLite matches the FTS5 tables and ranks with bm25.
+Each source is cut to `limit` best hits before the union, so the merge and
+the snippets stay small however common the words are. The columns, tables
+and triggers come from migration 9b4317b4a42a.
+
+Snippets are safe to insert as HTML: the database marks hits with control
+characters, and `mark_snippet` escapes the text before turning them into
+<mark> tags.
+"""
+import html
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import DateTime, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+KINDS = ("task", "comment", "message")
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+# hit delimiters the database puts in snippets; swapped for <mark> after escaping
+START, STOP = "\x02", "\x03"
+_DELIMS = re.compile(f"([{START}{STOP}])")
+
+
+@dataclass(frozen=True, slots=True)
+class SearchHit:
+    kind: str
+    id: int
+    project_id: int
+    task_id: int | None
+    title: str | None
+    snippet: str
+    rank: float
+    created_at: datetime
+
+
+# ---------- Postgres ----------
+
+_PG_SOURCES = {
+    "task": """
+        SELECT 'task' AS kind, t.id, t.project_id, t.id AS task_id, t.title,
+               coalesce(t.title, '') || ' — ' || coalesce(t.description, '') AS body,
+               ts_rank_cd(t.search_vector, q.query) AS rank, t.created_at
+        FROM tasks t, q
+        WHERE t.search_vector @@ q.query AND t.project_id IN (SELECT project_id FROM scope)
+        ORDER BY rank DESC LIMIT :limit""",
+    "comment": """
+        SELECT 'comment', c.id, t.project_id, c.task_id, t.title, c.body,
+               ts_rank_cd(c.search_vector, q.query), c.created_at
+        FROM task_comments c JOIN tasks t ON t.id = c.task_id, q
+        WHERE c.search_vector @@ q.query AND t.project_id IN (SELECT project_id FROM scope)
+        ORDER BY 7 DESC LIMIT :limit""",
+    "message": """
+        SELECT 'message', m.id, th.project_id, NULL, th.title, m.body,
+               ts_rank_cd(m.search_vector, q.query), m.created_at
+        FROM thread_messages m JOIN project_threads th ON th.id = m.thread_id, q
+        WHERE m.search_vector @@ q.query AND th.project_id IN (SELECT project_id FROM scope)
+        ORDER BY 7 DESC LIMIT :limit""",
+}
+
+def _pg_sql(kinds: tuple[str, ...], scoped: bool) -> str:
+    scope = "SELECT project_id FROM project_members WHERE user_id = :user_id"
+    if scoped:
+        scope += " AND project_id = :project_id"
+    hits = "\n        UNION ALL\n".join(f"({_PG_SOURCES[k]})" for k in kinds)
+    return f"""
+        WITH scope AS ({scope}),
+             q AS (SELECT websearch_to_tsquery('english', :q) AS query),
+             hits AS ({hits})
+        SELECT hits.kind, hits.id, hits.project_id, hits.task_id, hits.title,
+               ts_headline('english', hits.body, q.query,
+                           'MaxFragments=1, MaxWords=24, MinWords=8, StartSel="' || chr(2) || '", StopSel="' || chr(3) || '"') AS snippet,
+               hits.rank, hits.created_at
+        FROM hits, q
+        ORDER BY hits.rank DESC, hits.created_at DESC
+        LIMIT :limit"""
+
+
+# ---------- SQLite (FTS5) ----------
+
+_SQLITE_SOURCES = {
+    "task": """
+        SELECT 'task' AS kind, t.id, t.project_id, t.id AS task_id, t.title,
+               snippet(tasks_fts, -1, char(2), char(3), '…', 16) AS snippet,
+               -bm25(tasks_fts, 2.0, 1.0) AS rank, t.created_at
+        FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid
+        WHERE tasks_fts MATCH :q AND t.project_id IN (SELECT project_id FROM scope)
+        ORDER BY rank DESC LIMIT :limit""",
+    "comment": """
+        SELECT 'comment', c.id, t.project_id, c.task_id, t.title,
+               snippet(task_comments_fts, 0, char(2), char(3), '…', 16),
+               -bm25(task_comments_fts) AS rank, c.created_at
+        FROM task_comments_fts JOIN task_comments c ON c.id = task_comments_fts.rowid
+             JOIN tasks t ON t.id = c.task_id
+        WHERE task_comments_fts MATCH :q AND t.project_id IN (SELECT project_id FROM scope)
+        ORDER BY rank DESC LIMIT :limit""",
+    "message": """
+        SELECT 'message', m.id, th.project_id, NULL, th.title,
+               snippet(thread_messages_fts, 0, char(2), char(3), '…', 16),
+               -bm25(thread_messages_fts) AS rank, m.created_at
+        FROM thread_messages_fts JOIN thread_messages m ON m.id = thread_messages_fts.rowid
+             JOIN project_threads th ON th.id = m.thread_id
+        WHERE thread_messages_fts MATCH :q AND th.project_id IN (SELECT project_id FROM scope)
+        ORDER BY rank DESC LIMIT :limit""",
+}
+
+def _sqlite_sql(kinds: tuple[str, ...], scoped: bool) -> str:
+    scope = "SELECT project_id FROM project_members WHERE user_id = :user_id"
+    if scoped:
+        scope += " AND project_id = :project_id"
+    # SQLite only allows ORDER BY/LIMIT inside a compound member via a subquery
+    hits = "\n        UNION ALL\n".join(f"SELECT * FROM ({_SQLITE_SOURCES[k]})" for k in kinds)
+    return f"""
+        WITH scope AS ({scope})
+        SELECT * FROM ({hits})
+        ORDER BY rank DESC, created_at DESC
+        LIMIT :limit"""
+
+def mark_snippet(raw: str) -> str:
+    """Escape a delimited snippet and wrap its hits in <mark>.
+
+    Delimiters typed into the content itself can only open or close a mark
+    in turn, so the result is always balanced.
+    """
+    out, open_ = [], False
+    for part in _DELIMS.split(raw):
+        if part == START:
+            if not open_:
+                out.append("<mark>")
+                open_ = True
+        elif part == STOP:
+            if open_:
+                out.append("</mark>")
+                open_ = False
+        else:
+            out.append(html.escape(part, quote=False))
+    if open_:
+        out.append("</mark>")
+    return "".join(out)
+
+def fts5_query(q: str) -> str:
+    """Free text -> FTS5 MATCH syntax: every word must appear, the last one as a prefix."""
+    words = _WORD.findall(q)
+    if not words:
+        return ""
+    quoted = [f'"{w}"' for w in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+async def search(
+    db: AsyncSession,
+    user_id: int,
+    q: str,
+    *,
+    project_id: int | None = None,
+    kinds: tuple[str, ...] = KINDS,
+    limit: int = 20,
+) -> list[SearchHit]:
+    params = {"user_id": user_id, "project_id": project_id, "limit": limit}
+    if db.get_bind().dialect.name == "postgresql":
+        sql = _pg_sql(kinds, project_id is not None)
+        params["q"] = q
+    else:
+        match = fts5_query(q)
+        if not match:
+            return []
+        sql = _sqlite_sql(kinds, project_id is not None)
+        params["q"] = match
+    # typed so SQLite's text timestamps come back as datetimes too
+    rows = await db.execute(text(sql).columns(created_at=DateTime(timezone=True)), params)
+    return [
+        SearchHit(kind=r.kind, id=r.id, project_id=r.project_id, task_id=r.task_id, title=r.title,
+                  snippet=mark_snippet(r.snippet or ""), rank=float(r.rank or 0), created_at=r.created_at)
+        for r in rows
+    ]
@@ -0,0 +1,114 @@
+# app/services/stats.py
+"""
+project_stats maintenance.
+
+Write paths call the bump helpers inside their own transaction. Each bump
+is a single `UPDATE ... SET col = col + :delta`, so concurrent writers
+never lose updates. The dashboard then reads one row per project.
+Overdue tasks are not a counter: whether a task is overdue changes with
+the calendar, not with writes, so `overdue_count` counts them at read time
+off ix_tasks_project_status_due.
+Every bump also advances `version`, which the list endpoints turn into
+ETags, so a write that changes no counter still calls bump_stats.
+`python -m app.scripts.repair stats` rebuilds the table from the source
+rows.
+"""
+from datetime import date
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.membership import ProjectMember
+from app.models.project import Project
+from app.models.stats import ProjectStats
+from app.models.task import Task, TaskStatus
+
+# (total, done)
+TaskCounts = tuple[int, int]
+OPEN_STATUSES = (TaskStatus.todo, TaskStatus.in_progress)
+
+def task_counts(status: TaskStatus) -> TaskCounts:
+    """What a single task contributes to its project's counters."""
+    return 1, int(status == TaskStatus.done)
+
+def overdue_count(project_id, today: date | None = None):
+    """Scalar subquery: open tasks of `project_id` (a value or a correlated column) due before today.
+
+    One range scan per open status on ix_tasks_project_status_due.
+    """
+    return (
+        select(func.count()).select_from(Task)
+        .where(Task.project_id == project_id, Task.status.in_(OPEN_STATUSES), Task.due_date < (today or date.today()))
+        .scalar_subquery()
+    )
+
+def bump_stmt(project_id: int, *, members: int = 0, total: int = 0, done: int = 0):
+    return (
+        update(ProjectStats)
+        .where(ProjectStats.project_id == project_id)
+        .values(
+            members_count=ProjectStats.members_count + members,
+            tasks_total=ProjectStats.tasks_total + total,
+            tasks_done=ProjectStats.tasks_done + done,
+            version=ProjectStats.version + 1,
+        )
+    )
+
+async def bump_stats(db: AsyncSession, project_id: int, *, members: int = 0, total: int = 0, done: int = 0) -> None:
+    """Apply counter deltas and advance the project's version (all deltas may be zero)."""
+    await db.execute(bump_stmt(project_id, members=members, total=total, done=done))
+
+async def project_version(db: AsyncSession, project_id: int) -> int | None:
+    return await db.scalar(select(ProjectStats.version).where(ProjectStats.project_id == project_id))
+
+async def apply_task_change(db: AsyncSession, project_id: int, before: TaskCounts | None, after: TaskCounts | None) -> None:
+    """Shift the counters from a task's old contribution to its new one (None = absent)."""
+    b = before or (0, 0)
+    a = after or (0, 0)
+    await bump_stats(db, project_id, total=a[0] - b[0], done=a[1] - b[1])
+
+
+# ---------- Repair ----------
+
+def recompute_stmts(project_ids: list[int] | None = None) -> list:
+    """Rebuild the counters from the source rows (all projects when None).
+
+    Existing rows are updated in place and their version advanced, so an
+    ETag handed out before the repair can never match afterwards; projects
+    without a row get one.
+    """
+    def counts(project_id):
+        def count_tasks(*conds):
+            return (
+                select(func.count(Task.id))
+                .where(Task.project_id == project_id, *conds)
+                .scalar_subquery()
+            )
+        return [
+            select(func.count()).select_from(ProjectMember)
+            .where(ProjectMember.project_id == project_id).scalar_subquery(),
+            count_tasks(),
+            count_tasks(Task.status == TaskStatus.done),
+        ]
+
+    members, total, done = counts(ProjectStats.project_id)
+    refresh = update(ProjectStats).values(
+        members_count=members,
+        tasks_total=total,
+        tasks_done=done,
+        version=ProjectStats.version + 1,
+    )
+    missing = select(Project.id, *counts(Project.id)).where(
+        ~select(ProjectStats.project_id).where(ProjectStats.project_id == Project.id).exists()
+    )
+    if project_ids is not None:
+        refresh = refresh.where(ProjectStats.project_id.in_(project_ids))
+        missing = missing.where(Project.id.in_(project_ids))
+    fill = insert(ProjectStats).from_select(
+        ["project_id", "members_count", "tasks_total", "tasks_done"], missing
+    )
+    return [refresh, fill]
+
+async def recompute_stats(db: AsyncSession, project_ids: list[int] | None = None) -> None:
+    for stmt in recompute_stmts(project_ids):
+        await db.execute(stmt)
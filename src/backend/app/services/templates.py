@@ -0,0 +1,326 @@
+# app/services/templates.py
+"""
+Set-based project cloning and templates.
+
+clone_project copies a project's memberships, tasks, threads and
+(optionally) comments and messages with INSERT ... SELECT statements, so the
+number of round trips is the same for a 5-task template and a 50k-task
+project. New ids are allocated up front into a temporary `clone_map`
+(kind, old_id, new_id) table: nextval() on Postgres, max(id) + row_number()
+on SQLite (which holds the write lock by then). Child rows join through the
+map to find their new parents.
+
+The clone is owned by the caller. The source's owners are not carried over;
+tasks, comments and messages that referenced them point at the caller
+instead. Other members are copied only with `include_members`, which the
+router sets for owners and admins of a non-template source; without it
+nobody but the caller joins the clone, and tasks assigned to anyone else
+come out unassigned. A clone of a template (`is_template`) also moves every
+date forward by the template's age, so "due in three days" stays three
+days out.
+
+The caller commits. Stats, leaderboard credits, analytics rollups and
+`created` events for the new tasks are written here, in the same
+transaction.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, case, delete, func, insert, literal, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.comment import TaskComment
+from app.models.events import TaskEvent, TaskEventType
+from app.models.membership import ProjectMember, ProjectRole
+from app.models.project import Project
+from app.models.stats import CycleTimeDay, FlowDay, LeaderboardDay
+from app.models.task import Task, TaskPriority, TaskStatus
+from app.models.thread import ProjectThread, ThreadMessage
+from app.models.user import User
+from app.services.leaderboard import utc_day
+from app.services.stats import recompute_stmts
+
+clone_map = Table(
+    "clone_map", MetaData(),
+    Column("kind", String(16), primary_key=True),
+    Column("old_id", Integer, primary_key=True),
+    Column("new_id", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+_CREATE_MAP = (
+    "CREATE TEMPORARY TABLE IF NOT EXISTS clone_map ("
+    "kind varchar(16) NOT NULL, old_id integer NOT NULL, new_id integer NOT NULL, "
+    "PRIMARY KEY (kind, old_id))"
+)
+
+
+@dataclass(frozen=True, slots=True)
+class CloneOptions:
+    name: str | None = None          # default: the source's name
+    as_template: bool = False
+    include_comments: bool = True
+    include_messages: bool = True
+    include_members: bool = False    # ignored for template sources
+
+
+# ---------- SQL helpers ----------
+
+def _is_pg(db: AsyncSession) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+def _remap(col, users: dict[int, int]):
+    return case(users, value=col, else_=col) if users else col
+
+def _assignee(col, users: dict[int, int], owner_id: int, keep_members: bool):
+    if keep_members:
+        return _remap(col, users)
+    # only the caller is a member of the clone
+    return case({**users, owner_id: owner_id}, value=col, else_=None)
+
+def _shift(col, days: int, pg: bool):
+    if not days:
+        return col
+    return col + days if pg else func.date(col, f"{days:+d} days")
+
+def _task_state(pg: bool):
+    """SQL twin of history.task_state, read off the new task rows."""
+    if pg:
+        return func.json_build_object(
+            "title", Task.title, "description", Task.description,
+            "status", Task.status, "priority", Task.priority,
+            "due_date", func.to_char(Task.due_date, "YYYY-MM-DD"), "assignee_id", Task.assignee_id,
+        )
+    return func.json_object(
+        "title", Task.title, "description", Task.description,
+        "status", Task.status, "priority", Task.priority,
+        "due_date", Task.due_date, "assignee_id", Task.assignee_id,
+    )
+
+async def _reset_map(db: AsyncSession, pg: bool) -> None:
+    await db.execute(text(_CREATE_MAP + (" ON COMMIT DROP" if pg else "")))
+    await db.execute(delete(clone_map))
+
+async def _fill_map(db: AsyncSession, pg: bool, kind: str, model, *where) -> None:
+    """Reserve a new id for every source row of `model` matching `where`."""
+    if pg:
+        new_id = func.nextval(func.pg_get_serial_sequence(model.__tablename__, "id"))
+    else:
+        base = select(func.coalesce(func.max(model.id), 0)).scalar_subquery()
+        new_id = base + func.row_number().over(order_by=model.id)
+    await db.execute(
+        insert(clone_map).from_select(["kind", "old_id", "new_id"], select(literal(kind), model.id, new_id).where(*where))
+    )
+
+def _mapped(kind: str):
+    m = clone_map.alias(f"map_{kind}")
+    return m, m.c.kind == kind
+
+
+# ---------- Clone ----------
+
+async def clone_project(db: AsyncSession, source_id: int, owner_id: int, options: CloneOptions = CloneOptions()) -> int | None:
+    """Copy project `source_id` for `owner_id`; returns the new project's id (None: no such project)."""
+    src = (await db.execute(
+        select(Project.name, Project.description, Project.due_date, Project.is_template, Project.created_at)
+        .where(Project.id == source_id)
+    )).one_or_none()
+    if src is None:
+        return None
+    pg = _is_pg(db)
+    days = (date.today() - src.created_at.date()).days if src.is_template and src.created_at else 0
+
+    owners = (await db.scalars(
+        select(ProjectMember.user_id).where(ProjectMember.project_id == source_id, ProjectMember.role == ProjectRole.owner)
+    )).all()
+    users = {uid: owner_id for uid in owners if uid != owner_id}
+
+    pid = await db.scalar(
+        insert(Project).values(
+            name=options.name or src.name,
+            description=src.description,
+            due_date=src.due_date + timedelta(days=days) if src.due_date else None,
+            is_template=options.as_template,
+        ).returning(Project.id)
+    )
+
+    # memberships: (optionally) everyone but the old owners, then the caller as owner
+    keep_members = options.include_members and not src.is_template
+    if keep_members:
+        await db.execute(insert(ProjectMember).from_select(
+            ["project_id", "user_id", "role", "notify_mentions", "notify_due_soon"],
+            select(literal(pid), ProjectMember.user_id, ProjectMember.role,
+                   ProjectMember.notify_mentions, ProjectMember.notify_due_soon)
+            .where(ProjectMember.project_id == source_id, ProjectMember.role != ProjectRole.owner,
+                   ProjectMember.user_id != owner_id),
+        ))
+    await db.execute(insert(ProjectMember).values(project_id=pid, user_id=owner_id, role=ProjectRole.owner))
+
+    await _reset_map(db, pg)
+    await _fill_map(db, pg, "task", Task, Task.project_id == source_id)
+    await _fill_map(db, pg, "thread", ProjectThread, ProjectThread.project_id == source_id)
+    if options.include_messages:
+        await _fill_map(db, pg, "message", ThreadMessage, ThreadMessage.thread_id.in_(
+            select(ProjectThread.id).where(ProjectThread.project_id == source_id)
+        ))
+
+    tm, is_task = _mapped("task")
+    await db.execute(insert(Task).from_select(
+        ["id", "project_id", "title", "description", "status", "priority", "due_date",
+         "assignee_id", "created_by_id", "attachments_count"],
+        select(tm.c.new_id, literal(pid), Task.title, Task.description, Task.status, Task.priority,
+               _shift(Task.due_date, days, pg), _assignee(Task.assignee_id, users, owner_id, keep_members),
+               _remap(Task.created_by_id, users), Task.attachments_count)
+        .select_from(Task).join(tm, (tm.c.old_id == Task.id) & is_task),
+    ))
+
+    # history and leaderboard for the new tasks, read back off the inserted rows
+    event_type = TaskEvent.__table__.c.type.type
+    await db.execute(insert(TaskEvent).from_select(
+        ["task_id", "project_id", "actor_id", "type", "data"],
+        select(Task.id, Task.project_id, literal(owner_id), literal(TaskEventType.created, event_type), _task_state(pg))
+        .where(Task.project_id == pid),
+    ))
+    credited = func.coalesce(Task.assignee_id, owner_id)
+    await db.execute(insert(TaskEvent).from_select(
+        ["task_id", "project_id", "actor_id", "type"],
+        select(Task.id, Task.project_id, credited, literal(TaskEventType.completed, event_type))
+        .where(Task.project_id == pid, Task.status == TaskStatus.done),
+    ))
+    await db.execute(insert(LeaderboardDay).from_select(
+        ["project_id", "day", "user_id", "completed"],
+        select(literal(pid), literal(utc_day()), credited, func.count())
+        .where(Task.project_id == pid, Task.status == TaskStatus.done)
+        .group_by(credited),
+    ))
+    # analytics rollups: everything was created (and the done ones completed) just now
+    is_done = Task.status == TaskStatus.done
+    await db.execute(insert(FlowDay).from_select(
+        ["project_id", "day", "created", "completed"],
+        select(literal(pid), literal(utc_day()), func.count(), func.coalesce(func.sum(case((is_done, 1), else_=0)), 0))
+        .where(Task.project_id == pid)
+        .having(func.count() > 0),
+    ))
+    await db.execute(insert(CycleTimeDay).from_select(
+        ["project_id", "day", "bucket", "count"],
+        select(literal(pid), literal(utc_day()), literal(0), func.count())
+        .where(Task.project_id == pid, is_done)
+        .having(func.count() > 0),
+    ))
+
+    if options.include_comments:
+        await db.execute(insert(TaskComment).from_select(
+            ["task_id", "author_id", "body"],
+            select(tm.c.new_id, _remap(TaskComment.author_id, users), TaskComment.body)
+            .select_from(TaskComment).join(tm, (tm.c.old_id == TaskComment.task_id) & is_task)
+            .order_by(TaskComment.id),
+        ))
+
+    hm, is_thread = _mapped("thread")
+    await db.execute(insert(ProjectThread).from_select(
+        ["id", "project_id", "title", "created_by_id"],
+        select(hm.c.new_id, literal(pid), ProjectThread.title, _remap(ProjectThread.created_by_id, users))
+        .select_from(ProjectThread).join(hm, (hm.c.old_id == ProjectThread.id) & is_thread),
+    ))
+    if options.include_messages:
+        mm, is_message = _mapped("message")
+        parent = clone_map.alias("map_parent")
+        await db.execute(insert(ThreadMessage).from_select(
+            ["id", "thread_id", "author_id", "parent_message_id", "body"],
+            select(mm.c.new_id, hm.c.new_id, _remap(ThreadMessage.author_id, users), parent.c.new_id, ThreadMessage.body)
+            .select_from(ThreadMessage)
+            .join(mm, (mm.c.old_id == ThreadMessage.id) & is_message)
+            .join(hm, (hm.c.old_id == ThreadMessage.thread_id) & is_thread)
+            .outerjoin(parent, (parent.c.old_id == ThreadMessage.parent_message_id) & (parent.c.kind == "message"))
+            .order_by(ThreadMessage.id),
+        ))
+
+    for stmt in recompute_stmts([pid]):
+        await db.execute(stmt)
+    return pid
+
+
+# ---------- Demo template ----------
+
+DEMO_NAME = "SynergySphere Demo"
+
+# placeholder accounts (no password, inactive); "owner" becomes whoever clones
+_DEMO_USERS = {
+    "owner": ("Demo Owner", "owner@demo.invalid"),
+    "bob": ("Bob Singh", "bob@demo.invalid"),
+    "cara": ("Cara Rao", "cara@demo.invalid"),
+}
+# title, status, priority, due in N days, assignee, attachments
+_DEMO_TASKS = [
+    ("Design login screen", TaskStatus.done, TaskPriority.high, 1, "cara", 2),
+    ("Implement projects API", TaskStatus.in_progress, TaskPriority.high, 3, "bob", 1),
+    ("Threaded messages UI", TaskStatus.in_progress, TaskPriority.medium, 5, "cara", 0),
+    ("Task board swimlanes", TaskStatus.todo, TaskPriority.medium, 6, "owner", 1),
+    ("Notifications MVP", TaskStatus.todo, TaskPriority.low, 8, "bob", 0),
+    ("Deploy to demo host", TaskStatus.done, TaskPriority.low, 2, "owner", 0),
+]
+_DEMO_MESSAGES = [
+    ("owner", "Welcome to the demo project!"),
+    ("bob", "I’ll cover the API side."),
+    ("cara", "I’ll take the UI."),
+]
+
+async def _create_demo_template(db: AsyncSession) -> int:
+    emails = {email: key for key, (_, email) in _DEMO_USERS.items()}
+    ids = {emails[r.email]: r.id for r in await db.execute(select(User.id, User.email).where(User.email.in_(emails)))}
+    missing = [
+        dict(name=name, email=email, hashed_password=None, is_active=False)
+        for key, (name, email) in _DEMO_USERS.items() if key not in ids
+    ]
+    if missing:
+        for r in await db.execute(insert(User).returning(User.id, User.email), missing):
+            ids[emails[r.email]] = r.id
+
+    today = date.today()
+    pid = await db.scalar(insert(Project).values(
+        name=DEMO_NAME, description="Pre-populated demo project",
+        due_date=today + timedelta(days=10), is_template=True, template_public=True,
+    ).returning(Project.id))
+    await db.execute(insert(ProjectMember), [
+        dict(project_id=pid, user_id=ids[key], role=ProjectRole.owner if key == "owner" else ProjectRole.member)
+        for key in _DEMO_USERS
+    ])
+    task_ids = (await db.scalars(
+        insert(Task).returning(Task.id, sort_by_parameter_order=True),
+        [
+            dict(project_id=pid, title=title, description=f"{title} details…", status=status, priority=priority,
+                 due_date=today + timedelta(days=due), assignee_id=ids[who], created_by_id=ids["owner"],
+                 attachments_count=files)
+            for title, status, priority, due, who, files in _DEMO_TASKS
+        ],
+    )).all()
+    await db.execute(insert(TaskComment), [
+        dict(task_id=tid, author_id=ids[spec[4]], body="Looks good, starting now.")
+        for tid, spec in zip(task_ids, _DEMO_TASKS)
+    ])
+    thread_id = await db.scalar(
+        insert(ProjectThread).values(project_id=pid, title="General", created_by_id=ids["owner"]).returning(ProjectThread.id)
+    )
+    await db.execute(insert(ThreadMessage), [
+        dict(thread_id=thread_id, author_id=ids[who], body=body) for who, body in _DEMO_MESSAGES
+    ])
+    for stmt in recompute_stmts([pid]):
+        await db.execute(stmt)
+    return pid
+
+async def demo_template(db: AsyncSession) -> int:
+    """Id of the stored demo template, created on first use."""
+    lookup = (
+        select(Project.id).where(Project.is_template, Project.template_public, Project.name == DEMO_NAME)
+        .order_by(Project.id).limit(1)
+    )
+    pid = await db.scalar(lookup)
+    if pid is not None:
+        return pid
+    try:
+        async with db.begin_nested():
+            return await _create_demo_template(db)
+    except IntegrityError:
+        # a concurrent first call created the placeholder users (and template) first
+        return await db.scalar(lookup)
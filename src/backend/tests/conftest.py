@@ -0,0 +1,106 @@
+"""
+Shared fixtures. Tests that touch the database need a disposable Postgres
+database and are skipped without one:
+
+    TEST_DATABASE_URL=postgresql://localhost/synergysphere_test pytest
+
+The schema is rebuilt there from the alembic migrations once per session
+(its `public` schema is dropped first, so never point this at real data).
+"""
+import os
+from dataclasses import dataclass
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+if TEST_DATABASE_URL:
+    # settings are read when app modules are first imported
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ.setdefault("METRICS_ENABLED", "0")
+
+pytest_plugins = ["app.core.diagnostics_pytest", "pytester"]
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope="session")
+def database():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import text
+
+    from app.db.session import engine
+
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+    cfg = Config(os.path.join(BACKEND, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(BACKEND, "alembic"))
+    command.upgrade(cfg, "head")
+    return engine
+
+
+@pytest.fixture
+def client(database):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as c:
+        yield c
+
+
+@dataclass
+class Member:
+    user_id: int
+    email: str
+    token: str
+
+    @property
+    def headers(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"}
+
+
+@pytest.fixture
+def make_member(database):
+    """make_member(project_id=None) -> a new active user (and membership) with a bearer token."""
+    from itertools import count
+
+    from app.core.security import create_access_token
+    from app.db.session import SessionLocal
+    from app.models.membership import ProjectMember, ProjectRole
+    from app.models.user import User
+
+    seq = count()
+
+    def make(project_id: int | None = None, role: ProjectRole = ProjectRole.member) -> Member:
+        with SessionLocal() as db:
+            n = db.query(User).count() + next(seq)
+            user = User(email=f"tester{n}@example.com", name=f"Tester {n}", is_active=True)
+            db.add(user)
+            db.flush()
+            if project_id is not None:
+                db.add(ProjectMember(project_id=project_id, user_id=user.id, role=role))
+            db.commit()
+            return Member(user.id, user.email, create_access_token(user.email, user_id=user.id))
+
+    return make
+
+
+@pytest.fixture
+def project(database):
+    """A fresh project id with its project_stats row."""
+    from app.db.session import SessionLocal
+    from app.models.project import Project
+    from app.services.stats import recompute_stmts
+
+    with SessionLocal() as db:
+        p = Project(name="Test project", description="")
+        db.add(p)
+        db.flush()
+        for stmt in recompute_stmts([p.id]):
+            db.execute(stmt)
+        db.commit()
+        return p.id
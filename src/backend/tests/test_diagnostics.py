@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("pydantic")
+
+BUDGETED = """
+import pytest
+
+from app.core import diagnostics
+
+
+def fake_request(queries, shapes=()):
+    with diagnostics.track() as trace:
+        trace.queries = queries
+        for shape in shapes:
+            trace.shapes[shape] += 1
+    diagnostics.finish(trace, method="GET", route="/fake")
+
+
+@pytest.mark.query_budget(queries=3)
+def test_within_budget():
+    fake_request(3)
+
+
+@pytest.mark.query_budget(queries=3)
+def test_over_budget():
+    fake_request(4)
+
+
+@pytest.mark.query_budget(queries=3, repeats=2)
+def test_repeated_shape():
+    fake_request(3, ["SELECT * FROM tasks WHERE id = %s"] * 3)
+
+
+def test_ini_default():
+    fake_request(2)
+"""
+
+
+def test_query_budget_marker(pytester):
+    pytester.makepyfile(BUDGETED)
+    pytester.makeini("[pytest]\nquery_budget = 2\n")
+    result = pytester.runpytest("-p", "app.core.diagnostics_pytest")
+    result.assert_outcomes(passed=2, failed=2)
+    result.stdout.fnmatch_lines([
+        "*GET /fake: 4 queries (budget 3)*",
+        "*GET /fake: 3x SELECT * FROM tasks WHERE id = %s*",
+    ])
+
+
+def test_statement_shape_folds_in_lists():
+    from app.core.diagnostics import statement_shape
+
+    assert statement_shape("SELECT 1 FROM t WHERE id IN (%s, %s)") == statement_shape(
+        "SELECT 1  FROM t\n WHERE id IN (%s, %s, %s)"
+    )
@@ -0,0 +1,25 @@
+def test_poll_since_unknown_message_is_gone(client, project, make_member):
+    me = make_member(project)
+    url = f"/api/v1/projects/{project}/messages"
+    first = client.post(url, json={"content": "hello", "author_id": me.user_id}).json()
+    second = client.post(url, json={"content": "again", "author_id": me.user_id}).json()
+
+    r = client.get(url, params={"since": first["id"]})
+    assert r.status_code == 200
+    assert [m["id"] for m in r.json()] == [second["id"]]
+    assert client.get(url, params={"since": second["id"]}).json() == []
+
+    r = client.get(url, params={"since": int(second["id"]) + 1000})
+    assert r.status_code == 410
+
+
+def test_cursor_with_wrong_types_is_rejected(client, project, make_member):
+    import base64
+
+    me = make_member(project)
+    url = f"/api/v1/projects/{project}/messages"
+    client.post(url, json={"content": "hello", "author_id": me.user_id})
+    for raw in (b'["yesterday",1]', b'["2026-01-01T00:00:00",null]', b"[1,2]"):
+        cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        for param in ("before", "after"):
+            assert client.get(url, params={param: cursor}).status_code == 400
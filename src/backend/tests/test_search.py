@@ -0,0 +1,15 @@
+import pytest
+
+pytest.importorskip("sqlalchemy")
+
+from app.services.search import START, STOP, mark_snippet  # noqa: E402
+
+
+def test_snippet_escapes_content_around_marks():
+    raw = f'<img src=x onerror="alert(1)"> {START}deadline{STOP} & more'
+    assert mark_snippet(raw) == '&lt;img src=x onerror="alert(1)"&gt; <mark>deadline</mark> &amp; more'
+
+
+def test_snippet_marks_stay_balanced():
+    # delimiters typed into the content itself
+    assert mark_snippet(f"{STOP}a{START}b{START}c") == "a<mark>bc</mark>"
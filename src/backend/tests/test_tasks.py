@@ -0,0 +1,86 @@
+import pytest
+
+
+@pytest.fixture
+def request_queries():
+    """Statements per finished request, in order (as the diagnostics middleware counted them)."""
+    from app.core import diagnostics
+
+    seen: list[int] = []
+
+    def observe(trace, context):
+        seen.append(trace.queries)
+
+    diagnostics.observers.append(observe)
+    yield seen
+    diagnostics.observers.remove(observe)
+
+
+def _add_tasks(project_id: int, user_id: int, n: int) -> dict[int, tuple[int, int]]:
+    """n tasks with 0-2 comments and 0-3 attachments each; task_id -> (comments, attachments)."""
+    from app.db.session import SessionLocal
+    from app.models.comment import TaskComment
+    from app.models.task import Task
+
+    expected = {}
+    with SessionLocal() as db:
+        for i in range(n):
+            t = Task(project_id=project_id, title=f"Task {i}", assignee_id=user_id if i % 2 else None,
+                     created_by_id=user_id, attachments_count=i % 4)
+            db.add(t)
+            db.flush()
+            db.add_all(TaskComment(task_id=t.id, author_id=user_id, body=f"c{j}") for j in range(i % 3))
+            expected[t.id] = (i % 3, i % 4)
+        db.commit()
+    return expected
+
+
+@pytest.mark.query_budget(queries=5, repeats=1)
+def test_list_tasks_counts_without_n_plus_one(client, project, make_member, request_queries):
+    me = make_member(project)
+    url = f"/api/v1/tasks/by-project/{project}"
+    # cold: principal and membership lookups, project version, the page, the grouped comment count
+    small = _add_tasks(project, me.user_id, 3)
+    r = client.get(url, headers=me.headers)
+    assert r.status_code == 200
+
+    # warm caches, so only the per-page statements remain
+    r = client.get(url, headers=me.headers)
+    assert {t["id"]: (t["comments"], t["attachments"]) for t in r.json()} == small
+
+    big = _add_tasks(project, me.user_id, 40)
+    r = client.get(url, headers=me.headers)
+    assert r.status_code == 200
+    assert {t["id"]: (t["comments"], t["attachments"]) for t in r.json()} == {**small, **big}
+
+    # version, page, comment counts: the same for 3 tasks as for 43
+    assert request_queries[1:] == [3, 3]
+
+
+def test_list_tasks_status_filter_accepts_response_spelling(client, project, make_member):
+    me = make_member(project)
+    headers = me.headers
+    ids = [
+        client.post("/api/v1/tasks", json={"project_id": project, "title": f"t{i}"}, headers=headers).json()["id"]
+        for i in range(3)
+    ]
+    assert client.patch(f"/api/v1/tasks/{ids[0]}", json={"status": "in-progress"}, headers=headers).status_code == 200
+
+    url = f"/api/v1/tasks/by-project/{project}"
+    for spelling in ("in-progress", "in_progress"):
+        r = client.get(url, params={"status": spelling}, headers=headers)
+        assert r.status_code == 200
+        assert [t["id"] for t in r.json()] == [ids[0]]
+    r = client.get(url, params=[("status", "todo"), ("status", "in-progress")], headers=headers)
+    assert sorted(t["id"] for t in r.json()) == sorted(ids)
+    assert client.get(url, params={"status": "doing"}, headers=headers).status_code == 422
+
+
+def test_list_tasks_rejects_cursor_with_wrong_types(client, project, make_member):
+    import base64
+
+    me = make_member(project)
+    url = f"/api/v1/tasks/by-project/{project}"
+    for raw in (b'["x"]', b"[null]", b'[{"a":1}]'):
+        cursor = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        assert client.get(url, params={"cursor": cursor}, headers=me.headers).status_code == 400